@@ -1,282 +1,491 @@
 #!/usr/bin/env python3
 import argparse
+import contextlib
 import csv
-from openpyxl import Workbook
-from . import pension_calc_income_assets 
-from . import mtf_calc 
+import importlib
+import io
+import logging
+import sys
+import time
+from . import schedules as rate_schedules
+from .assessment import assess_month
+from . import instrument
+from . import cache as result_cache
+from .results import MonthRow, SimulationResult, present_values
+from .timeline import compile_timeline, load_events, month_index
 import datetime
 
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
-current_year = '1900'
-year_total_mtf = defaultdict(float)
+logger = logging.getLogger(__name__)
 
 
+class SimulationState:
+    """
+    Mutable state of one simulate_finances run. Each run owns its own
+    instance, so simulations can run concurrently in threads.
+    """
 
+    __slots__ = ("assets", "lifetime_means_paid", "current_year", "year_total_mtf")
+
+    def __init__(self, assets, current_year, lifetime_means_paid=0):
+        self.assets = assets
+        self.lifetime_means_paid = lifetime_means_paid
+        self.current_year = current_year
+        # MTF paid per calendar year, for the annual cap
+        self.year_total_mtf = defaultdict(float)
+
+    def copy(self) -> "SimulationState":
+        other = SimulationState(self.assets, self.current_year, self.lifetime_means_paid)
+        other.year_total_mtf.update(self.year_total_mtf)
+        return other
+
+    def snapshot(self, month) -> "Checkpoint":
+        return Checkpoint(
+            month,
+            self.assets,
+            self.lifetime_means_paid,
+            self.current_year,
+            tuple(sorted((year, paid) for year, paid in self.year_total_mtf.items() if paid)),
+        )
 
-from dateutil.relativedelta import relativedelta
+    @classmethod
+    def from_checkpoint(cls, checkpoint) -> "SimulationState":
+        state = cls(checkpoint.assets, checkpoint.current_year, checkpoint.lifetime_means_paid)
+        state.year_total_mtf.update(checkpoint.year_total_mtf)
+        return state
+
+
+# The state of a run before month `month` is computed, as an immutable value
+# (picklable, and JSON-able through _asdict). year_total_mtf holds
+# (year, MTF paid) pairs.
+Checkpoint = namedtuple("Checkpoint", ["month", "assets", "lifetime_means_paid", "current_year", "year_total_mtf"])
+
+
+# The scenario in fin_sim.sh / the web form defaults
+DEFAULT_SCENARIO = {
+    "initial_assets": 140000.0,
+    "rad": 750000.0,
+    "house_value": 1000000.0,
+    "dap_percentage": 7.0,
+    "income_interest_rate": 4.0,
+    "start_date": datetime.date(2025, 11, 4),
+    "months_till_house_sale": 6,
+    "total_months_after_sale": 120,
+    "basic_daily_fee": 63.82,
+    "means_tested_fee": 25.0,
+    "means_tested_lifetime_limit": 82347.0,
+    "special_services_fee": 70.0,
+    "pension_initial": 2200.0,
+    "pension_final": 2200.0,
+    "incidental_expenditure_mthly": 400.0,
+    "asset_interest_percentage": 70.0,
+}
+
+def add_months(start_date: datetime.date, months: int) -> datetime.date:
+    """
+    start_date moved by a number of calendar months, with the day clamped
+    to the end of a shorter month (31 Jan + 1 month is 28/29 Feb).
+    """
+    total = start_date.month - 1 + months
+    year, month = start_date.year + total // 12, total % 12 + 1
+    if start_date.day > 28:
+        # last day of the target month, without importing calendar
+        month_end = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+        return start_date.replace(year=year, month=month, day=min(start_date.day, month_end.day))
+    return start_date.replace(year=year, month=month)
 
 def parse_year(start_date: datetime.date, months: int) -> int:
     """
     Return the year as an integer for start_date incremented by months.
     """
-    new_date = start_date + relativedelta(months=months)
-    return new_date.year
+    # the day never changes the year, so no need to build the date
+    return start_date.year + (start_date.month - 1 + months) // 12
 
-def incr_year(start_date: datetime.date, months: int) -> int:
+def incr_year(start_date: datetime.date, months: int) -> datetime.date:
     """
-    Return the year as an integer for start_date incremented by months.
+    Return the date months calendar months after start_date.
     """
-    new_date = start_date + relativedelta(months=months)
-    return new_date
-
-def simulate_finances(
-    initial_assets,
-    rad,
-    house_value,
-    dap_percentage,
-    income_interest_rate,
-    start_date,
-    months_till_house_sale,
-    total_months_after_sale,
-    basic_daily_fee,
-    means_tested_fee,
-    means_tested_lifetime_limit,
-    special_services_fee,
-    pension_initial,
-    pension_final,
-    incidental_expenditure_mthly,
-    asset_interest_percentage,
-):
-    global current_year, year_total_mtf
-    year_total_mtf.clear()
-
-
-    # Convert daily fees → monthly
-    monthly_basic_special = (basic_daily_fee + special_services_fee) * 30.44
-
-    #not used as means tested is calculated
-    monthly_means_tested = means_tested_fee * 30.44
-
-    assets = initial_assets  # pay RAD up front
-    lifetime_means_paid = 0
+    return add_months(start_date, months)
 
-    rows = []
-
-
-    def apply_month(month_idx, extra_cash=0):
-        nonlocal assets, lifetime_means_paid
+class Simulation:
+    """
+    One household's run, a month at a time: the scenario, the per-run plan
+    (rate schedule index for every month) and its SimulationState.
+
+    step() computes the next month and returns its results.MonthRow (raw,
+    unrounded values); month is the index of the month step() will compute
+    next. simulate_finances_iter simply steps to the end, other callers can
+    stop early or inspect and advance the state between months.
+    schedules is an optional schedules.ScheduleStore; each month uses the
+    rate schedule in force on that month's date (default: the current rules).
+    events is an optional list of timeline events (lump sums, RAD
+    draw-downs, rate and fee changes, ...) on top of the house sale.
+    """
 
+    def __init__(
+        self,
+        initial_assets,
+        rad,
+        house_value,
+        dap_percentage,
+        income_interest_rate,
+        start_date,
+        months_till_house_sale,
+        total_months_after_sale,
+        basic_daily_fee,
+        means_tested_fee,
+        means_tested_lifetime_limit,
+        special_services_fee,
+        pension_initial,
+        pension_final,
+        incidental_expenditure_mthly,
+        asset_interest_percentage,
+        schedules=None,
+        events=None,
+    ):
+        self.initial_assets = initial_assets
+        self.rad = rad
+        self.house_value = house_value
+        self.dap_percentage = dap_percentage
+        self.income_interest_rate = income_interest_rate
+        self.start_date = start_date
+        self.months_till_house_sale = months_till_house_sale
+        self.total_months_after_sale = total_months_after_sale
+        self.means_tested_lifetime_limit = means_tested_lifetime_limit
+        self.incidental_expenditure_mthly = incidental_expenditure_mthly
+        self.asset_interest_percentage = asset_interest_percentage
+        self.n_months = months_till_house_sale + total_months_after_sale
+
+        if schedules is None:
+            schedules = rate_schedules.DEFAULT_SCHEDULES
+        self.schedules = schedules
+        # rate schedule index for every month of the run, looked up once
+        self.schedule_plan = schedules.index_for_months(start_date, self.n_months)
+
+        # Convert daily fees → monthly
+        self.monthly_basic_special = (basic_daily_fee + special_services_fee) * 30.44
+
+        # the house sale plus any extra events, as month inputs and cash per month
+        self.events = list(events or ())
+        self.timeline = compile_timeline(
+            {
+                "rad": rad,
+                "house_value": house_value,
+                "dap_percentage": dap_percentage,
+                "income_interest_rate": income_interest_rate,
+                "start_date": start_date,
+                "months_till_house_sale": months_till_house_sale,
+                "basic_daily_fee": basic_daily_fee,
+                "special_services_fee": special_services_fee,
+                "incidental_expenditure_mthly": incidental_expenditure_mthly,
+                "asset_interest_percentage": asset_interest_percentage,
+            },
+            self.events,
+            n_months=self.n_months,
+        )
 
-        # Lump sum (e.g., house sale)
-        assets += extra_cash
+        #not used as means tested is calculated
+        self.monthly_means_tested = means_tested_fee * 30.44
+
+        # as we iterate through the months we need to identify what year we are in. This allows the annual 
+        #mtf cap to be applied
+        self.state = SimulationState(initial_assets, current_year=parse_year(start_date,0))
+        self.month = 0
+
+        # checked once per run so disabled logging/tracing costs nothing per month
+        self.debug = logger.isEnabledFor(logging.DEBUG)
+        self.timer = instrument.current_timer()
+
+    @property
+    def finished(self) -> bool:
+        return self.month >= self.n_months
+
+    def checkpoint(self) -> Checkpoint:
+        """
+        Snapshot of the run so far; restore() carries on from it.
+        """
+        return self.state.snapshot(self.month)
+
+    def restore(self, checkpoint: Checkpoint):
+        """
+        Continue from a checkpoint of this scenario, or of any scenario with
+        the same prefix_key if the checkpoint is at or before the house sale
+        (and neither has extra events before it).
+        """
+        if not 0 <= checkpoint.month <= self.n_months:
+            raise ValueError(f"checkpoint at month {checkpoint.month} is outside this {self.n_months} month run")
+        self.state = SimulationState.from_checkpoint(checkpoint)
+        self.month = checkpoint.month
+
+    def run_to(self, month) -> list:
+        """
+        Step until month months have been computed; returns their rows.
+        """
+        rows = []
+        while self.month < min(month, self.n_months):
+            rows.append(self.step())
+        return rows
+
+    def step(self) -> MonthRow:
+        """
+        Compute the next month, update the state and return the month's row.
+        """
+        m = self.month
+        if m >= self.n_months:
+            raise IndexError("simulation has no months left")
+        state = self.state
+        state.current_year = parse_year(self.start_date, m)
+        if self.debug:
+            logger.debug("date: %s + %s months, current_year: %s", self.start_date, m, state.current_year)
+        row = self.apply_month(m)
+        self.month = m + 1
+        return row
+
+    def apply_month(self, month_idx):
+        """
+        One month of the plan: the same body before and after the house
+        sale, with the inputs in force and any cash the timeline moves.
+        """
+        state = self.state
+        assets = state.assets
+        lifetime_means_paid = state.lifetime_means_paid
+        means_tested_lifetime_limit = self.means_tested_lifetime_limit
+        timeline = self.timeline
+        debug = self.debug
+
+        rules = self.schedules[self.schedule_plan[month_idx]]
+        inputs = timeline.inputs_at(month_idx)
+
+        # Lump sums (e.g. house sale), after any RAD paid this month
+        cash = timeline.cash.get(month_idx)
+        extra_cash = rad_paid = 0
+        if cash is not None:
+            if debug:
+                logger.debug("month %s: pay %s, receive %s", month_idx, cash.pay, cash.receive)
+            assets -= cash.pay
+            assets += cash.receive
+            extra_cash = cash.house
+            rad_paid = cash.rad_paid
 
         # Interest income per month
-        interest_income = assets * (asset_interest_percentage/ 100)  *(income_interest_rate / 100 / 12)
+        interest_income = assets * inputs.interest_share * inputs.monthly_rate
         assets += interest_income
-        #assets += pension_initial
 
-        # deemed interest for use in pension calculation - annual number returned
-        # requires assets excluding home as the home is ecluded
-        deemed_out = mtf_calc.deemed_income(assets, status='single')#,upper_rate=0.0075)
-    
+        # MTF is only assessed while under the lifetime and annual caps
+        charge_mtf = lifetime_means_paid < means_tested_lifetime_limit and state.year_total_mtf[state.current_year]< rules.annual_cap
+
+        # deemed interest for use in pension calculation, the pension, and the MTF
+        # assessment (on assets plus the month's pension, any RAD paid and the
+        # capped home) in one pass
+        assessed = assess_month(
+            assets, homeowner=inputs.homeowner, assess_fee=charge_mtf,
+            home_val=inputs.home_val, means_extra=inputs.means_extra, rules=rules,
+        )
+        if debug:
+            logger.debug("assessed: %r", assessed)
 
         # pension calc is for fortnioght, hence double for month
         # income is per fortnight. This interest should be deemed rather than actual
-        pension = pension_calc_income_assets.calculate_age_pension(deemed_out['deemed_income']/24, assets, homeowner=True)*2
+        pension = assessed.pension*2
         assets += pension
 
-        # Fees
-        # Fixed MTF
-        # mtf = 0
-        # fees = monthly_basic_special
-        # if lifetime_means_paid < means_tested_lifetime_limit:
-        #     mtf = min(monthly_means_tested,
-        #               means_tested_lifetime_limit - lifetime_means_paid)
-        #     fees += mtf
-        #     lifetime_means_paid += mtf
-
         # calculated MTF
         mtf = 0
-        fees = monthly_basic_special
-        if lifetime_means_paid < means_tested_lifetime_limit and year_total_mtf[current_year]< mtf_calc.ANNUAL_CAP:
+        fees = inputs.monthly_basic_special
+
+        if debug:
+            logger.debug(
+                "lifetime_means_paid: %s, means_tested_lifetime_limit: %s, year_total_mtf[current_year]: %s, annual_cap: %s",
+                lifetime_means_paid, means_tested_lifetime_limit, state.year_total_mtf[state.current_year], rules.annual_cap,
+            )
 
-            monthly_means_tested = mtf_calc.calculate_mtf_daily(pension*24, #income_ex_deemed: float, 
-                                                        assets, #assets_ex_home: float, 
-                                                        True,#homeowner: bool, 
-                                                        1000000 #home_val:float
-                                                        ) *30
+        if charge_mtf:
+            monthly_means_tested = assessed.mtf_daily *30
 
             mtf = min(monthly_means_tested,
                       means_tested_lifetime_limit - lifetime_means_paid)
 
+            if debug:
+                logger.debug("mtf: %s", mtf)
             fees += mtf
             lifetime_means_paid += mtf
 
-            year_total_mtf[current_year] += mtf
-
-
+            state.year_total_mtf[state.current_year] += mtf
 
-        # DAP fee
-        dap_fee = rad * (dap_percentage / 100) / 12
+        # DAP fee, on the part of the RAD not yet paid
+        dap_fee = inputs.dap_fee
         fees += dap_fee
 
         assets -= fees
-        assets-=incidental_expenditure_mthly
-
-        rows.append({
-            "month": month_idx + 1,
-            "year": current_year,
-            "assets": round(assets, 2),
-            "interest_income": round(interest_income, 2),
-            "pension_income": round(pension, 2),
-            "fees_total": round(fees, 2),
-            "dap_fee": round(dap_fee, 2),
-            "mtf": round(mtf,2),
-            "annual_mtf_paid": round(year_total_mtf[current_year] ,2),
-            "lifetime_means_paid": round(lifetime_means_paid, 2),
-            "house_contribution": round(extra_cash,2),
-            "rad_paid": round(0,2),
-        })
-
-    def apply_month_post_house_sale(month_idx, extra_cash=0):
-        nonlocal assets, lifetime_means_paid
-
-        print(f"apply_month_post_house_sale( {month_idx},{extra_cash})")
-
-        # Lump sum (e.g., house sale)
-        assets += extra_cash
-
-        # Interest income
-        interest_income = assets * (asset_interest_percentage/ 100)  *(income_interest_rate / 100 / 12)
-        assets += interest_income # assets * (income_interest_rate / 100 / 12)
-
-        #assets += pension_final
-        # for pension we must use a deemed version of income from assets.
-        # deemed interest for use in pension calculation - annual number returned
-        # requires assets excluding home as the home is ecluded
-        deemed_out = mtf_calc.deemed_income(assets, status='single')#,upper_rate=0.0075)
-        print(f"deemed_out: {deemed_out}")
-
-        # pension calc is for fortnioght, hence double for month
-        # income is per fortnight. This interest should be deemed rather than actual
-        pension = pension_calc_income_assets.calculate_age_pension(deemed_out['deemed_income']/24, assets, homeowner=False)*2
-        print(f"pension: {pension}")
-
-        assets += pension
-        print(f"assets:{assets}")
+        assets -= inputs.spending
+
+        state.assets = assets
+        state.lifetime_means_paid = lifetime_means_paid
+
+        timer = self.timer
+        if timer is not None:
+            row_start = time.perf_counter()
+        # rounded only when presented
+        row = MonthRow(
+            month_idx + 1,
+            state.current_year,
+            assets,
+            interest_income,
+            pension,
+            fees,
+            dap_fee,
+            mtf,
+            state.year_total_mtf[state.current_year],
+            lifetime_means_paid,
+            extra_cash,
+            rad_paid,
+        )
+        if timer is not None:
+            timer.lap("rows", row_start)
+        if debug:
+            logger.debug(
+                "row computed: month: %s, year: %s, assets: %.2f, interest_income: %.2f, pension_income: %.2f",
+                month_idx + 1, state.current_year, assets, interest_income, pension,
+            )
+        return row
 
-        # Fees
-        # mtf = 0
-        # fees = monthly_basic_special
-        # if lifetime_means_paid < means_tested_lifetime_limit:
-        #     mtf = min(monthly_means_tested,
-        #               means_tested_lifetime_limit - lifetime_means_paid)
-        #     fees += mtf
-        #     lifetime_means_paid += mtf
 
-        # calculated MTF
-        mtf = 0
-        fees = monthly_basic_special
+def with_horizon(scenario: dict, months: int) -> dict:
+    """
+    Copy of a simulate_finances scenario cut (or extended) to exactly
+    months months, moving the house sale in if it falls later.
+    """
+    sale = min(scenario["months_till_house_sale"], months)
+    return dict(scenario, months_till_house_sale=sale, total_months_after_sale=months - sale)
 
-        print(f"lifetime_means_paid:{lifetime_means_paid}, means_tested_lifetime_limit: {means_tested_lifetime_limit}, year_total_mtf[current_year]: {year_total_mtf[current_year]}, mtf_calc.ANNUAL_CAP: {mtf_calc.ANNUAL_CAP}")
 
-        if lifetime_means_paid < means_tested_lifetime_limit and year_total_mtf[current_year]< mtf_calc.ANNUAL_CAP:
-            print(f"in if lifetime_means_paid: lifetime_means_paid:{lifetime_means_paid}, year_total_mtf[current_year]: {year_total_mtf[current_year]}")
+# arguments read by the months before the house sale (rad only through the DAP)
+PRE_SALE_PARAMS = [
+    "months_till_house_sale",
+    "initial_assets",
+    "income_interest_rate",
+    "start_date",
+    "basic_daily_fee",
+    "special_services_fee",
+    "means_tested_lifetime_limit",
+    "incidental_expenditure_mthly",
+    "asset_interest_percentage",
+]
 
-            monthly_means_tested = mtf_calc.calculate_mtf_daily(pension*24, #income_ex_deemed: float, 
-                                                        assets+rad, #assets_ex_home: float, 
-                                                        False,#homeowner: bool, 
-                                                        0 #home_val:float
-                                                        ) *30
 
-            mtf = min(monthly_means_tested,
-                      means_tested_lifetime_limit - lifetime_means_paid)
+def prefix_key(scenario: dict) -> tuple:
+    """
+    Scenarios with equal keys (and the same schedules) have identical
+    months up to the house sale, so one run's checkpoint at the sale month
+    serves them all. They may differ in anything used only after the sale:
+    house_value, total_months_after_sale, and rad when no DAP is charged.
+    """
+    rad, dap = scenario["rad"], scenario["dap_percentage"]
+    if not rad or not dap:
+        rad = dap = 0.0
+    return tuple(scenario[name] for name in PRE_SALE_PARAMS) + (rad, dap)
 
-            print(f"mtf: {mtf}")
-            fees += mtf
-            lifetime_means_paid += mtf
 
-            year_total_mtf[current_year] += mtf
+def simulate_finances_iter(*args, checkpoint=None, **kwargs):
+    """
+    Simulate the household month by month (Simulation arguments), yielding
+    a results.MonthRow (raw, unrounded values) as each month is computed.
+    Nothing is kept between months, so memory stays flat however long the
+    horizon, and the consumer can stop early (e.g. once assets are exhausted).
+    Given a Checkpoint, the run resumes from it and yields only later months.
+    """
+    sim = Simulation(*args, **kwargs)
+    if checkpoint is not None:
+        sim.restore(checkpoint)
+    while not sim.finished:
+        yield sim.step()
 
+def simulate_finances(*args, **kwargs) -> SimulationResult:
+    """
+    Run simulate_finances_iter (same arguments) to the end and return
+    all months as a SimulationResult.
+    """
+    return SimulationResult.from_months(simulate_finances_iter(*args, **kwargs))
 
-        # DAP fee
-        dap_fee = 0 #rad * (dap_percentage / 100) / 12
-        #fees += dap_fee
+def _headers_and_values(results):
+    """
+    Column names and an iterator of per-month value lists, for a
+    SimulationResult (read straight from its columns), a list of row dicts,
+    or any iterable of MonthRows such as simulate_finances_iter (consumed
+    one month at a time).
+    """
+    if isinstance(results, SimulationResult):
+        return results.fieldnames(), results.iter_values()
+    if isinstance(results, list) and results and not isinstance(results[0], MonthRow):
+        headers = list(results[0].keys())
+        return headers, ([r[h] for h in headers] for r in results)
+    return list(MonthRow._fields), (present_values(row) for row in results)
 
-        assets -= fees
 
-        rows.append({
-            "month": month_idx + 1,
-            "year": current_year,
-            "assets": round(assets, 2),
-            "interest_income": round(interest_income, 2),
-            "pension_income": round(pension, 2),
-            "fees_total": round(fees, 2),
-            "dap_fee": round(dap_fee, 2),
-            "mtf": round(mtf,2),
-            "annual_mtf_paid": round(year_total_mtf[current_year] ,2),
-            "lifetime_means_paid": round(lifetime_means_paid, 2),
-            "house_contribution": round(extra_cash,2),
-            "rad_paid": round(rad if extra_cash >0 else 0 ,2),
-        })
-        print(f"row appended: month: {month_idx + 1}, year: {current_year}, assets: {round(assets, 2)},interest_income: {round(interest_income, 2)},pension_income: {round(pension, 2)}")
-
-
-    # ***
-    # Start of simulate_finances()
-    #
-
-    # as we iterate through the months we need to identify what year we are in. This allows the annual 
-    #mtf cap to be applied
-    current_year = parse_year(start_date,0)
-
-    # Before house sale
-    for m in range(months_till_house_sale):
-        current_year = parse_year(start_date,m)
-        print(f"date;{start_date}+{m}")
-        print(f"current_year: {current_year}")
-        print(f"current_year_date: {incr_year(start_date,m)}")
-
-        apply_month(m)
-
-    assets -= rad  # pay RAD after house sale
-
-    # After house sale
-    for m in range(total_months_after_sale):
-        current_year = parse_year(start_date,months_till_house_sale + m)
-        print(f"date;{start_date}+{months_till_house_sale + m}")
-        print(f"current_year: {current_year}")
-        print(f"current_year_date: {incr_year(start_date,months_till_house_sale + m)}")
-        apply_month_post_house_sale(
-            months_till_house_sale + m,
-            extra_cash=house_value if m == 0 else 0
-        )
+def write_csv(f, results):
+    """
+    Write results as CSV to an open text file.
+    """
+    headers, values = _headers_and_values(results)
+    writer = csv.writer(f)
+    writer.writerow(headers)
+    writer.writerows(values)
 
-    return rows
 
 def save_csv(filename, results):
     with open(filename, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=results[0].keys())
-        writer.writeheader()
-        writer.writerows(results)
-    print(f"✅ Saved results to {filename}")
+        write_csv(f, results)
+    logger.info("✅ Saved results to %s", filename)
 
 
-def save_excel(filename, results):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "AgedCare Simulation"
+def write_excel(f, results):
+    """
+    Write results as an Excel workbook to a filename or binary file.
+    """
+    # imported here: openpyxl takes longer to import than a whole simulation
+    from openpyxl import Workbook
+
+    # write-only mode streams rows to the file instead of building every cell in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("AgedCare Simulation")
 
-    headers = list(results[0].keys())
+    headers, values = _headers_and_values(results)
     ws.append(headers)
 
-    for r in results:
-        ws.append([r[h] for h in headers])
+    for row in values:
+        ws.append(row)
 
-    wb.save(filename)
-    print(f"✅ Saved results to {filename}")
+    wb.save(f)
+
+
+def save_excel(filename, results):
+    write_excel(filename, results)
+    logger.info("✅ Saved results to %s", filename)
+
+
+# export type -> (MIME type, file extension)
+EXPORT_TYPES = {
+    "csv": ("text/csv", "csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def export_bytes(results, file_type) -> bytes:
+    """
+    results exported in memory as one of EXPORT_TYPES.
+    """
+    buffer = io.BytesIO()
+    if file_type == "csv":
+        with io.TextIOWrapper(buffer, encoding="utf-8", newline="", write_through=True) as text:
+            write_csv(text, results)
+            text.flush()
+            return buffer.getvalue()
+    if file_type == "excel":
+        write_excel(buffer, results)
+        return buffer.getvalue()
+    raise ValueError(f"unknown export type: {file_type}")
 
 
 import datetime
@@ -289,56 +498,182 @@ def valid_date(s):
 
 
 
-def main():
+# (flag, type, help) for every simulate_finances argument, shared by the sub-commands
+SIMULATION_ARGUMENTS = [
+    ("--initial-assets", float, "Initial financial assets ($)"),
+    ("--rad", float, "Refundable Accommodation Deposit ($)"),
+    ("--start-date", valid_date, "Date in YYYY-MM-DD format"),
+    ("--house-value", float, "Value of house to be sold later ($)"),
+    ("--dap-percentage", float, "Annual DAP percentage on RAD (e.g. 5 for 5%%)"),
+    ("--income-interest-rate", float, "Annual income interest rate on assets (%%)"),
+    ("--months-till-house-sale", int, "Months until house is sold"),
+    ("--total-months-after-sale", int, "Months to simulate after house sale"),
+    ("--basic-daily-fee", float, "Basic daily care fee per day ($)"),
+    ("--means-tested-fee", float, "Means tested fee per day ($)"),
+    ("--means-tested-lifetime-limit", float, "Lifetime cap for means tested fees ($)"),
+    ("--special-services-fee", float, "Special services fee per day ($)"),
+    ("--pension-initial", float, "Pension per month pre house sale($)"),
+    ("--pension-final", float, "Pension per month after house sale($)"),
+    ("--incidental-expenditure-mthly", float, "Monthly outgoing living expenses"),
+    ("--asset-interest-percentage", float, "The percentage of the asset pool earning interest"),
+]
 
-    parser = argparse.ArgumentParser(description="Aged Care Financial Simulator (Named Args)")
+SIMULATION_PARAMS = [flag[2:].replace("-", "_") for flag, _, _ in SIMULATION_ARGUMENTS]
 
-    parser.add_argument("--initial-assets", type=float, required=True, help="Initial financial assets ($)")
-    parser.add_argument("--rad", type=float, required=True, help="Refundable Accommodation Deposit ($)")
-    parser.add_argument("--start-date",type=valid_date,required=True,help="Date in YYYY-MM-DD format")
-    parser.add_argument("--house-value", type=float, required=True, help="Value of house to be sold later ($)")
-    parser.add_argument("--dap-percentage", type=float, required=True, help="Annual DAP percentage on RAD (e.g. 5 for 5%)")
-    parser.add_argument("--income-interest-rate", type=float, required=True, help="Annual income interest rate on assets (%)")
-    parser.add_argument("--months-till-house-sale", type=int, required=True, help="Months until house is sold")
-    parser.add_argument("--total-months-after-sale", type=int, required=True, help="Months to simulate after house sale")
-    parser.add_argument("--basic-daily-fee", type=float, required=True, help="Basic daily care fee per day ($)")
-    parser.add_argument("--means-tested-fee", type=float, required=True, help="Means tested fee per day ($)")
-    parser.add_argument("--means-tested-lifetime-limit", type=float, required=True, help="Lifetime cap for means tested fees ($)")
-    parser.add_argument("--special-services-fee", type=float, required=True, help="Special services fee per day ($)")
-    parser.add_argument("--pension-initial", type=float, required=True, help="Pension per month pre house sale($)")
-    parser.add_argument("--pension-final", type=float, required=True, help="Pension per month after house sale($)")
-    parser.add_argument("--incidental-expenditure-mthly", type=float, required=True, help="Monthly outgoing living expenses")
-    parser.add_argument("--asset-interest-percentage", type=float, required=True, help="The percentage of the asset pool earning interest")
-    parser.add_argument("--csv", help="Output results to CSV file")
-    parser.add_argument("--excel", help="Output results to Excel file")
 
-    args = parser.parse_args()
-
-    results = simulate_finances(
-        initial_assets=args.initial_assets,
-        rad=args.rad,
-        house_value=args.house_value,
-        dap_percentage=args.dap_percentage,
-        income_interest_rate=args.income_interest_rate,
-        months_till_house_sale=args.months_till_house_sale,
-        start_date=args.start_date,
-        total_months_after_sale=args.total_months_after_sale,
-        basic_daily_fee=args.basic_daily_fee,
-        means_tested_fee=args.means_tested_fee,
-        means_tested_lifetime_limit=args.means_tested_lifetime_limit,
-        special_services_fee=args.special_services_fee,
-        pension_initial=args.pension_initial,
-        pension_final=args.pension_final,
-        incidental_expenditure_mthly=args.incidental_expenditure_mthly,
-        asset_interest_percentage=args.asset_interest_percentage,
+def add_simulation_arguments(parser, wrap_type=None, exclude=()):
+    """
+    Add the simulate_finances flags to parser. wrap_type(type) may replace
+    each argument's type, e.g. to accept a list of values instead of one.
+    Flags named in exclude (e.g. "--rad") are left for the caller to add.
+    """
+    for flag, arg_type, help_text in SIMULATION_ARGUMENTS:
+        if flag in exclude:
+            continue
+        parser.add_argument(flag, type=wrap_type(arg_type) if wrap_type else arg_type, required=True, help=help_text)
+    parser.add_argument("--schedules", help="JSON file of effective-dated rate schedules (default: current rules)")
+    parser.add_argument("--indexation", type=float, help="Project rate schedules forward at this annual %% (e.g. 3)")
+
 
-    )
+def parse_simulation_args(parser, argv=None):
+    """
+    parser.parse_args(argv) for a parser given add_simulation_arguments,
+    then the range checks every entry point applies (scenarios.check_scenario,
+    on each value of a list and on the longest horizon any combination
+    reaches), reported through parser.error.
+    """
+    args = parser.parse_args(argv)
+    # imported here as scenarios imports this module
+    from .scenarios import check_scenario
+
+    values = {}
+    for name in SIMULATION_PARAMS:
+        value = getattr(args, name, None)
+        if value is not None:
+            values[name] = value if isinstance(value, list) else [value]
+    errors = {}
+    for name, options in values.items():
+        for value in options:
+            errors.update(check_scenario({name: value}))
+    longest = {name: max(values[name]) for name in ("months_till_house_sale", "total_months_after_sale") if name in values}
+    for name, message in check_scenario(longest).items():
+        errors.setdefault(name, message)
+    if errors:
+        parser.error("; ".join(f"--{name.replace('_', '-')}: {message}" for name, message in errors.items()))
+    return args
+
+
+def add_logging_arguments(parser):
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Log level (DEBUG shows every month's intermediate values)")
+    parser.add_argument("--trace", action="store_true", help="Print time spent per simulation stage to stderr")
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache-dir", help="Keep cached results in this directory across runs "
+                                            "(default: $AGEDCARE_CACHE_DIR, or memory only)")
+    parser.add_argument("--no-cache", action="store_true", help="Always recompute, bypassing the result cache")
+
+
+def configure_cache(args) -> bool:
+    """
+    Apply --cache-dir to the shared result cache; False if --no-cache.
+    """
+    if args.cache_dir:
+        result_cache.configure(directory=args.cache_dir)
+    return not args.no_cache
+
+
+def configure_logging(level):
+    logging.basicConfig(level=getattr(logging, level), format="%(message)s")
 
+
+def load_schedules(args, end_date):
+    """
+    Rate schedule store selected by --schedules/--indexation, projected to end_date.
+    """
+    schedules = rate_schedules.ScheduleStore.load(args.schedules) if args.schedules else rate_schedules.DEFAULT_SCHEDULES
+    if args.indexation is not None:
+        schedules = schedules.projected(end_date, args.indexation / 100)
+    return schedules
+
+
+# sub-command name -> module path of a main(argv) function
+SUBCOMMANDS = {
+    "sweep": "aged_care_calcs.sweep",
+    "stress": "aged_care_calcs.threaded",
+    "solve": "aged_care_calcs.solver",
+    "montecarlo": "aged_care_calcs.montecarlo",
+    "longevity": "aged_care_calcs.longevity",
+    "bench": "aged_care_calcs.benchmark",
+    "batch": "aged_care_calcs.batch",
+    "store": "aged_care_calcs.store",
+}
+
+
+def print_table(initial_assets, results):
+    """
+    The month by month table, opening with the initial assets.
+    """
     print("Month | Year |Assets | Interest | Pension | Fees(total) | DAP fees| MTF fees|Annual MTF Paid|Lifetime Means Paid | House Contribution | RAD Paid")
-    print(f"{0:>5} | 0 | {args.initial_assets:>10,.2f} | {0:>8,.2f} | {0:>8,.2f} | {0:>8,.2f} | {0:>8,.2f} | {0:>10,.2f} | {0:>10,.2f}| {0:>10,.2f} | {0:>10,.2f}")
+    print(f"{0:>5} | 0 | {initial_assets:>10,.2f} | {0:>8,.2f} | {0:>8,.2f} | {0:>8,.2f} | {0:>8,.2f} | {0:>10,.2f} | {0:>10,.2f}| {0:>10,.2f} | {0:>10,.2f}")
+
+    for (month, year, assets, interest_income, pension_income, fees_total, dap_fee, mtf,
+         annual_mtf_paid, lifetime_means_paid, house_contribution, rad_paid) in results.iter_values():
+        print(f"{month:>5} | {year:>5}| {assets:>10,.2f} | {interest_income:>8,.2f} | {pension_income:>8,.2f} | {fees_total:>8,.2f} | {dap_fee:>8,.2f} | {annual_mtf_paid:>8,.2f} |{lifetime_means_paid:>10,.2f} |{lifetime_means_paid:>10,.2f} | {house_contribution:>10,.2f} | {rad_paid:>10,.2f}")
+
 
-    for r in results:
-        print(f"{r['month']:>5} | {r['year']:>5}| {r['assets']:>10,.2f} | {r['interest_income']:>8,.2f} | {r['pension_income']:>8,.2f} | {r['fees_total']:>8,.2f} | {r['dap_fee']:>8,.2f} | {r['annual_mtf_paid']:>8,.2f} |{r['lifetime_means_paid']:>10,.2f} |{r['lifetime_means_paid']:>10,.2f} | {r['house_contribution']:>10,.2f} | {r['rad_paid']:>10,.2f}")
+def main(argv=None):
+
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return importlib.import_module(SUBCOMMANDS[argv[0]]).main(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Aged Care Financial Simulator (Named Args)",
+        epilog=f"Sub-commands: {', '.join(SUBCOMMANDS)} (run '<sub-command> --help')",
+    )
+    add_simulation_arguments(parser)
+    parser.add_argument("--csv", help="Output results to CSV file")
+    parser.add_argument("--excel", help="Output results to Excel file")
+    parser.add_argument("--table", action="store_true", help="Print every month's figures (default: a one-line summary)")
+    parser.add_argument("--quiet", action="store_true", help="Print nothing but warnings and errors")
+    parser.add_argument("--events", help="JSON file of extra dated events (lump sums, RAD draw-downs, rate and fee changes)")
+    add_logging_arguments(parser)
+    add_cache_arguments(parser)
+
+    args = parse_simulation_args(parser, argv)
+    configure_logging("WARNING" if args.quiet else args.log_level)
+    # traced runs are always computed, so there is something to time
+    use_cache = configure_cache(args) and not args.trace
+
+    scenario = {name: getattr(args, name) for name in SIMULATION_PARAMS}
+    schedules = load_schedules(args, incr_year(args.start_date, args.months_till_house_sale + args.total_months_after_sale))
+    events = None
+    if args.events:
+        try:
+            events = load_events(args.events)
+            for event in events:
+                month_index(args.start_date, event.when)
+        except (OSError, TypeError, ValueError) as e:
+            parser.error(f"--events: {e}")
+    with instrument.collect() if args.trace else contextlib.nullcontext() as timer:
+        if use_cache:
+            results = result_cache.cached_simulate(scenario, schedules=schedules, events=events)
+        else:
+            results = simulate_finances(**scenario, schedules=schedules, events=events)
+    if timer is not None:
+        print(timer.report(), file=sys.stderr)
+    logger.debug("result cache: %s", result_cache.default_cache().stats())
+
+    if args.table:
+        print_table(args.initial_assets, results)
+    elif not args.quiet:
+        month = results.depletion_month()
+        outcome = f"assets run out in month {month}" if month else f"assets last all {len(results)} months"
+        final = results.final() if len(results) else args.initial_assets
+        print(f"{outcome}; final assets {final:,.2f}, total fees {results.total('fees_total'):,.2f}")
 
     # Optional outputs
     if args.csv:
@@ -350,4 +685,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
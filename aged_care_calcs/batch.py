@@ -0,0 +1,343 @@
+"""
+Run a file of scenarios, one row per resident.
+
+Scenarios come from a CSV file (a header row of simulate_finances argument
+names, dashed or underscored) or a JSON Lines file (one object per line).
+An optional "id" column names each scenario's output file; otherwise the
+row number is used. Ids must be unique (after making them safe as file
+names): a row repeating an earlier row's id fails. Other extra columns
+are ignored.
+
+The file is read and written as a stream: rows are cut into chunks, at
+most a few chunks per worker are in flight at once, and each summary row
+is written as soon as its chunk is back, in input order. A 100k-row file
+therefore never has to be held in memory. Rows that fail validation or
+simulation are reported in the summary (status "failed", with the error)
+and the batch carries on. So does a scenario still running after
+--row-timeout seconds: a chunk gets a limit that grows with its rows, and
+one that fails or runs out of time has its partial outputs removed and is
+split in half and retried, down to single rows, so only the bad or slow
+rows fail and the retries cost a few limits rather than one per row.
+
+With --store, every scenario's monthly results also go into a binary
+result store (see store.py), one store row per successful scenario in
+input order; the summary then gains a store_row column.
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim batch scenarios.csv --summary summary.csv \\
+        --output-dir results/ --workers 8 [--store results.store]
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import logging
+import os
+import re
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import agedcare_sim
+from . import batch_sim
+from . import schedules as rate_schedules
+from .store import StoreWriter, flatten
+from .scenarios import ScenarioError, coerce_scenario
+from .sweep import SUMMARY_COLUMNS, available_cpus, summarise_batch
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ["row", "id", "status", "error"] + SUMMARY_COLUMNS + ["output"]
+CHUNK_ROWS = 256
+ROW_TIMEOUT = 60.0
+PROGRESS_SECONDS = 5.0
+
+
+def read_rows(filename):
+    """
+    (row number, raw scenario dict or error message) for each row of a CSV
+    or JSON Lines file; row numbers count data rows from 1.
+    """
+    with open(filename, newline="") as f:
+        if filename.lower().endswith((".jsonl", ".ndjson")):
+            for number, line in enumerate((l for l in f if l.strip()), start=1):
+                try:
+                    raw = json.loads(line)
+                except ValueError as e:
+                    yield number, f"invalid JSON: {e}"
+                    continue
+                yield number, raw if isinstance(raw, dict) else "expected a JSON object"
+        else:
+            yield from enumerate(csv.DictReader(f), start=1)
+
+
+def _output_name(scenario_id):
+    return re.sub(r"[^\w.-]", "_", scenario_id) + ".csv"
+
+
+class RowTimeout(Exception):
+    """
+    Raised in a worker when a chunk or row runs past its time limit.
+    """
+
+
+@contextlib.contextmanager
+def _time_limit(seconds):
+    """
+    Raise RowTimeout here after seconds. No limit if seconds is falsy, off
+    the main thread or where there is no SIGALRM (Windows).
+    """
+    if not seconds or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise RowTimeout(f"timed out after {seconds:g} s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# per worker process: (schedules, output directory, whether to return results, row timeout)
+_worker = None
+
+
+def _init_worker(schedules, output_dir, keep_results=False, row_timeout=ROW_TIMEOUT):
+    global _worker
+    _worker = (schedules, output_dir, keep_results, row_timeout)
+
+
+def _simulate(rows):
+    """
+    (summary dicts, flattened results or None) for [(row, id, scenario)],
+    writing each result to the output directory if there is one.
+    """
+    schedules, output_dir, keep_results, _ = _worker
+    result = batch_sim.simulate_finances_shared([scenario for _, _, scenario in rows], schedules=schedules)
+    summaries = summarise_batch(result)
+    for i, ((row, scenario_id, _), summary) in enumerate(zip(rows, summaries)):
+        summary.update(row=row, id=scenario_id, status="ok")
+        if output_dir:
+            name = _output_name(scenario_id)
+            with open(os.path.join(output_dir, name), "w", newline="") as f:
+                agedcare_sim.write_csv(f, result.result(i))
+            summary["output"] = name
+    return summaries, flatten(result) if keep_results else None
+
+
+def _chunk_limit(n_rows):
+    """
+    Seconds a run of n_rows scenarios may take. The engine runs them side
+    by side, so a full chunk takes little longer than one row: up to twice
+    the row limit for CHUNK_ROWS rows.
+    """
+    timeout = _worker[3]
+    return timeout and timeout * (1 + n_rows / CHUNK_ROWS)
+
+
+def _discard_outputs(rows):
+    output_dir = _worker[1]
+    if not output_dir:
+        return
+    for _, scenario_id, _ in rows:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(os.path.join(output_dir, _output_name(scenario_id)))
+
+
+def _run_chunk(rows):
+    """
+    (summaries, flattened results or None) for [(row, id, scenario)].
+    """
+    try:
+        with _time_limit(_chunk_limit(len(rows))):
+            return _simulate(rows)
+    except Exception as e:
+        error = e
+    # a run that failed or was stopped may have written some of its files
+    _discard_outputs(rows)
+    if len(rows) == 1:
+        return [{"row": rows[0][0], "id": rows[0][1], "status": "failed", "error": str(error)}], None
+    # one bad (or slow) scenario fails the whole run; halve the chunk to find it
+    middle = len(rows) // 2
+    summaries, results = [], []
+    for half in (rows[:middle], rows[middle:]):
+        half_summaries, result = _run_chunk(half)
+        summaries += half_summaries
+        if result is not None:
+            results.append(result)
+    if not results:
+        return summaries, None
+    n_months = np.concatenate([n for n, _ in results])
+    return summaries, (n_months, {name: np.concatenate([c[name] for _, c in results]) for name in results[0][1]})
+
+
+def _chunks(rows, size):
+    """
+    Lists of up to size valid (row, id, scenario), and the failed rows
+    found while filling each one.
+    """
+    chunk, failed = [], []
+    # output file name -> (row, id) using it
+    seen = {}
+    for number, raw in rows:
+        scenario_id = str(number)
+        try:
+            if isinstance(raw, str):
+                raise ValueError(raw)
+            raw = dict(raw)
+            scenario_id = str(raw.pop("id", "") or number)
+            scenario = coerce_scenario(raw, allow_extra=True)
+            name = _output_name(scenario_id)
+            if name in seen:
+                first, first_id = seen[name]
+                if first_id == scenario_id:
+                    raise ValueError(f"id {scenario_id!r} is already used by row {first}")
+                raise ValueError(f"id {scenario_id!r} gives the same file name as row {first}'s id {first_id!r}")
+            seen[name] = number, scenario_id
+            chunk.append((number, scenario_id, scenario))
+        except (ScenarioError, ValueError) as e:
+            failed.append({"row": number, "id": scenario_id, "status": "failed", "error": str(e)})
+        if len(chunk) >= size:
+            yield chunk, failed
+            chunk, failed = [], []
+    if chunk or failed:
+        yield chunk, failed
+
+
+class _Summary:
+    """
+    Streaming summary writer (CSV, or JSON Lines by extension) with counts.
+    """
+
+    def __init__(self, f, jsonl, fields=SUMMARY_FIELDS):
+        self.f = f
+        self.jsonl = jsonl
+        self.writer = None if jsonl else csv.DictWriter(f, fieldnames=fields)
+        if self.writer:
+            self.writer.writeheader()
+        self.done = 0
+        self.failed = 0
+
+    def write(self, rows):
+        for row in sorted(rows, key=lambda r: r["row"]):
+            self.done += 1
+            if row["status"] != "ok":
+                self.failed += 1
+                logger.warning("row %s (%s) failed: %s", row["row"], row["id"], row["error"])
+            if self.jsonl:
+                self.f.write(json.dumps(row) + "\n")
+            else:
+                self.writer.writerow(row)
+
+
+def run_batch(filename, summary_file, output_dir=None, workers=None, chunksize=CHUNK_ROWS, schedules=None,
+              progress_seconds=PROGRESS_SECONDS, store=None, row_timeout=ROW_TIMEOUT) -> tuple:
+    """
+    Simulate every row of filename, writing the summary to summary_file,
+    (if output_dir) one CSV per scenario and (if store) every result to a
+    new result store at that path. A scenario taking longer than
+    row_timeout seconds (None: no limit) fails. Returns (rows processed,
+    rows failed).
+    """
+    workers = workers or available_cpus()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    chunks = _chunks(read_rows(filename), chunksize)
+    started = last_report = time.monotonic()
+    writer = None
+    if store:
+        version = (schedules or rate_schedules.DEFAULT_SCHEDULES).version
+        writer = StoreWriter(store, version, meta={"source": "batch", "input": os.path.abspath(filename)}, ids=True)
+
+    with open(summary_file, "w", newline="") as f:
+        summary = _Summary(f, summary_file.lower().endswith((".jsonl", ".ndjson")),
+                           SUMMARY_FIELDS + ["store_row"] if writer is not None else SUMMARY_FIELDS)
+
+        def report(force=False):
+            nonlocal last_report
+            now = time.monotonic()
+            if force or now - last_report >= progress_seconds:
+                last_report = now
+                rate = summary.done / (now - started) if now > started else 0.0
+                logger.info("%s rows done, %s failed (%.0f rows/s)", f"{summary.done:,}", summary.failed, rate)
+
+        def finish(chunk, failed, outcome):
+            summaries, result = outcome or ([], None)
+            if writer is not None and result is not None:
+                # ok rows come back in chunk order
+                scenarios = {row: (scenario_id, scenario) for row, scenario_id, scenario in chunk}
+                ok = [s for s in summaries if s["status"] == "ok"]
+                for i, s in enumerate(ok):
+                    s["store_row"] = len(writer) + i
+                writer.append_flat([scenarios[s["row"]][1] for s in ok], result[0], result[1],
+                                   ids=[scenarios[s["row"]][0] for s in ok])
+            summary.write(failed + summaries)
+            report()
+
+        try:
+            if workers == 1:
+                _init_worker(schedules, output_dir, writer is not None, row_timeout)
+                for chunk, failed in chunks:
+                    finish(chunk, failed, _run_chunk(chunk) if chunk else None)
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(schedules, output_dir, writer is not None, row_timeout)) as pool:
+                    # a couple of chunks queued per worker; results are written in input order
+                    in_flight = deque()
+                    for chunk, failed in chunks:
+                        in_flight.append((chunk, pool.submit(_run_chunk, chunk) if chunk else None, failed))
+                        while len(in_flight) > workers * 2 or (in_flight and in_flight[0][1] is None):
+                            chunk, future, failed = in_flight.popleft()
+                            finish(chunk, failed, future.result() if future else None)
+                    for chunk, future, failed in in_flight:
+                        finish(chunk, failed, future.result() if future else None)
+        finally:
+            if writer is not None:
+                writer.close()
+        report(force=True)
+    return summary.done, summary.failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim batch",
+        description="Simulate every scenario in a CSV or JSON Lines file (one row per resident; "
+                    "columns named like the simulation flags, plus an optional id).",
+    )
+    parser.add_argument("scenarios", help="Scenario file (.csv, or .jsonl/.ndjson)")
+    parser.add_argument("--summary", required=True, help="Summary output, one row per scenario (.csv or .jsonl)")
+    parser.add_argument("--output-dir", help="Write each scenario's monthly results to <id>.csv here")
+    parser.add_argument("--store", help="Also write every scenario's monthly results to a new binary result store here "
+                                        "(read with the store sub-command)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS,
+                        help=f"Scenarios per batch engine run (default {CHUNK_ROWS})")
+    parser.add_argument("--row-timeout", type=float, default=ROW_TIMEOUT,
+                        help=f"Fail a scenario still running after this many seconds (default {ROW_TIMEOUT:g}; 0: no limit)")
+    parser.add_argument("--schedules", help="JSON file of effective-dated rate schedules (default: current rules)")
+    parser.add_argument("--indexation", type=float, help="Project rate schedules forward at this annual %% (e.g. 3)")
+    parser.add_argument("--projection-end", type=agedcare_sim.valid_date, default=datetime.date(2100, 1, 1),
+                        help="Project --indexation schedules up to this date (default 2100-01-01)")
+    args = parser.parse_args(argv)
+    agedcare_sim.configure_logging("INFO")
+
+    # rows are not read ahead, so project far enough for any of them
+    schedules = agedcare_sim.load_schedules(args, args.projection_end)
+    done, failed = run_batch(args.scenarios, args.summary, output_dir=args.output_dir, workers=args.workers,
+                             chunksize=args.chunksize, schedules=schedules, store=args.store,
+                             row_timeout=args.row_timeout)
+    if failed:
+        print(f"❌ {failed} of {done} scenarios failed; see {args.summary}")
+        return 1
+    print(f"✅ {done} scenarios simulated; summary in {args.summary}")
+    return 0
@@ -0,0 +1,511 @@
+"""
+Vectorised batch version of agedcare_sim.simulate_finances.
+
+Every household is a lane in a set of NumPy arrays and all lanes are
+stepped through the months together. The month body mirrors
+Simulation.apply_month in agedcare_sim, including the annual and lifetime
+MTF caps and the rounding done inside deemed_income, so each lane
+reproduces the scalar rows to the cent.
+
+Each lane's month inputs (rates, fees, DAP, spending, means test settings)
+are arrays updated only in the months where a lane's timeline changes
+them: the house sale for every lane, plus any extra events.
+"""
+import datetime
+from collections import defaultdict
+from collections.abc import Mapping
+
+import numpy as np
+
+from . import schedules as rate_schedules
+from .agedcare_sim import prefix_key
+from .results import ROW_COLUMNS, SimulationResult
+from .timeline import PRE_SALE_HOME_VALUE, MonthInputs, compile_timeline
+
+
+FLOAT_PARAMS = [
+    "initial_assets",
+    "rad",
+    "house_value",
+    "dap_percentage",
+    "income_interest_rate",
+    "basic_daily_fee",
+    "means_tested_fee",
+    "means_tested_lifetime_limit",
+    "special_services_fee",
+    "pension_initial",
+    "pension_final",
+    "incidental_expenditure_mthly",
+    "asset_interest_percentage",
+]
+INT_PARAMS = ["months_till_house_sale", "total_months_after_sale"]
+
+# fixed cost of stepping one month, in lane-months (measured, roughly)
+MONTH_OVERHEAD_LANES = 800
+
+
+def _stack_params(params, n=None):
+    """
+    Turn either a sequence of simulate_finances kwargs or a mapping of
+    name -> scalar/array into a dict of equal length 1-d arrays (of length
+    n if given, e.g. one scenario broadcast over many rate paths).
+    """
+    if not isinstance(params, Mapping):
+        params = list(params)
+        if not params:
+            raise ValueError("no scenarios given")
+        params = {k: [p[k] for p in params] for k in FLOAT_PARAMS + INT_PARAMS + ["start_date"]}
+
+    if n is None:
+        n = max(np.size(params[k]) if not isinstance(params[k], datetime.date) else 1 for k in params)
+    out = {}
+    for k in FLOAT_PARAMS:
+        out[k] = np.broadcast_to(np.asarray(params[k], dtype=float), (n,)).copy()
+    for k in INT_PARAMS:
+        out[k] = np.broadcast_to(np.asarray(params[k], dtype=np.int64), (n,)).copy()
+
+    start = params["start_date"]
+    if isinstance(start, datetime.date):
+        start = [start] * n
+    out["start_year"] = np.array([d.year for d in start], dtype=np.int64)
+    out["start_month"] = np.array([d.month for d in start], dtype=np.int64)
+    out["start_day"] = np.array([d.day for d in start], dtype=np.int64)
+    return out
+
+
+def _deemed(rules, assets, deeming_shift=None):
+    """
+    Vectorised deemed_income (single). deeming_shift, if given, moves both
+    deeming rates of each lane by that much (as a decimal, floored at 0).
+    """
+    if deeming_shift is None:
+        return np.round(rules.deeming_tables["single"](assets), 2)
+    lower = np.maximum(rules.deeming_lower_rate + deeming_shift, 0.0)
+    upper = np.maximum(rules.deeming_upper_rate + deeming_shift, 0.0)
+    threshold = rules.deeming_threshold_single
+    return np.round(lower * np.minimum(assets, threshold) + upper * np.maximum(assets - threshold, 0.0), 2)
+
+
+def _monthly_pension(rules, assets, homeowner, deeming_shift=None):
+    """
+    Vectorised deemed_income + calculate_age_pension, doubled to a month.
+    homeowner is a boolean array.
+    """
+    deemed = _deemed(rules, assets, deeming_shift)
+    assets_pension = np.where(
+        homeowner,
+        rules.pension_assets_tables[True](assets),
+        rules.pension_assets_tables[False](assets),
+    )
+    return np.minimum(rules.pension_income_table(deemed / 24), assets_pension) * 2
+
+
+def _monthly_mtf(rules, pension, assets, means_extra, home_val, deeming_shift=None):
+    """
+    Vectorised mtf_calc.calculate_mtf_daily (already_paid=0) times 30, on
+    assets (after the month's pension) plus means_extra and the capped home,
+    as assessment.assess_month does it.
+    """
+    assessed = (assets + means_extra) + np.minimum(home_val, rules.home_value_cap)
+    deemed = _deemed(rules, assessed, deeming_shift)
+    annual = rules.income_test_tables[True](pension * 24 + deemed) + rules.asset_test_table(np.round(assessed, 2))
+    annual = np.minimum(annual, max(0, rules.lifetime_cap))
+    daily = annual / 365 - rules.max_accom_supp
+    return np.where(daily > 0, daily, 0.0) * 30
+
+
+def _per_schedule(idx, schedules, fn, *arrays):
+    """
+    fn(rules, *arrays) where each lane uses the schedule given by idx.
+    None entries in arrays are passed through as None.
+    """
+    first = idx[0]
+    if (idx == first).all():
+        return fn(schedules[first], *arrays)
+    out = np.empty(len(idx))
+    for s in np.unique(idx):
+        sel = idx == s
+        out[sel] = fn(schedules[s], *(None if a is None else a[sel] for a in arrays))
+    return out
+
+
+def _lane_scenario(p, i) -> dict:
+    scenario = {k: p[k][i] for k in FLOAT_PARAMS + INT_PARAMS}
+    scenario["start_date"] = datetime.date(int(p["start_year"][i]), int(p["start_month"][i]), int(p["start_day"][i]))
+    return scenario
+
+
+def _compile_plans(p, events, n_months):
+    """
+    Per-lane MonthInputs arrays for the first month, and the months where
+    lanes change: {month: [(lanes, MonthInputs of arrays)]} and
+    {month: (lanes, pay, receive, house, rad_paid)}.
+    """
+    n = len(n_months)
+    rad = p["rad"]
+    dap_percentage = p["dap_percentage"]
+    inputs = MonthInputs(
+        interest_share=p["asset_interest_percentage"] / 100,
+        monthly_rate=p["income_interest_rate"] / 100 / 12,
+        monthly_basic_special=(p["basic_daily_fee"] + p["special_services_fee"]) * 30.44,
+        dap_fee=rad * (dap_percentage / 100) / 12,
+        spending=p["incidental_expenditure_mthly"].copy(),
+        homeowner=np.ones(n, dtype=bool),
+        home_val=np.full(n, float(PRE_SALE_HOME_VALUE)),
+        means_extra=np.zeros(n),
+    )
+    # after the sale, as timeline.scenario_events has it: RAD paid from the
+    # proceeds, no home, no spending
+    post = MonthInputs(
+        interest_share=inputs.interest_share,
+        monthly_rate=inputs.monthly_rate,
+        monthly_basic_special=inputs.monthly_basic_special,
+        # the whole agreed RAD is paid from the proceeds, so no DAP
+        dap_fee=np.zeros_like(rad),
+        spending=np.zeros(n),
+        homeowner=np.zeros(n, dtype=bool),
+        home_val=np.zeros(n),
+        means_extra=rad.copy(),
+    )
+    rad_paid = np.where(p["house_value"] > 0, rad, 0.0)
+
+    changes = defaultdict(list)
+    cash = defaultdict(list)
+    sale = p["months_till_house_sale"]
+    with_events = np.zeros(n, dtype=bool)
+    if events is not None:
+        with_events[[i for i, lane_events in enumerate(events) if lane_events]] = True
+    plain = ~with_events
+    for month in np.unique(sale[plain & (sale < n_months)]).tolist():
+        lanes = np.flatnonzero(plain & (sale == month))
+        changes[month].append((lanes, MonthInputs(*(getattr(post, k)[lanes] for k in MonthInputs.__slots__))))
+        cash[month].append((lanes, rad[lanes], p["house_value"][lanes], p["house_value"][lanes], rad_paid[lanes]))
+
+    # lanes with their own events: compile each lane's timeline
+    for i in np.flatnonzero(with_events).tolist():
+        timeline = compile_timeline(_lane_scenario(p, i), events[i], n_months=int(n_months[i]))
+        for k in MonthInputs.__slots__:
+            getattr(inputs, k)[i] = getattr(timeline.inputs[0], k)
+        lane = np.array([i])
+        for month, month_inputs in zip(timeline.starts[1:], timeline.inputs[1:]):
+            changes[month].append((lane, MonthInputs(*(np.array([getattr(month_inputs, k)]) for k in MonthInputs.__slots__))))
+        for month, c in timeline.cash.items():
+            cash[month].append((lane, *(np.array([float(v)]) for v in (c.pay, c.receive, c.house, c.rad_paid))))
+    return inputs, changes, cash
+
+
+def _apply_changes(inputs, month_changes):
+    for lanes, values in month_changes:
+        for k in MonthInputs.__slots__:
+            getattr(inputs, k)[lanes] = getattr(values, k)
+
+
+class BatchResult:
+    """
+    Output of simulate_finances_batch.
+
+    columns maps each row key to an (N, months) array; n_months holds the
+    number of valid months per household (later months are NaN). Runs
+    that recorded only some columns cannot be turned back into rows.
+    state is every lane's state after the last month stepped, in the form
+    simulate_finances_batch takes as start (None for stitched results).
+    """
+
+    def __init__(self, columns, n_months, initial_assets, state=None):
+        self.columns = columns
+        self.n_months = n_months
+        self.initial_assets = initial_assets
+        self.state = state
+
+    def __len__(self):
+        return len(self.n_months)
+
+    def __getitem__(self, key):
+        return self.columns[key]
+
+    def result(self, i) -> SimulationResult:
+        """
+        Household i as a SimulationResult.
+        """
+        n = int(self.n_months[i])
+        return SimulationResult({k: self.columns[k][i, :n].tolist() for k in ROW_COLUMNS})
+
+    def rows(self, i):
+        """
+        Rows for household i in the same shape simulate_finances returns.
+        """
+        n = int(self.n_months[i])
+        cols = {k: self.columns[k][i, :n] for k in ROW_COLUMNS}
+        return [
+            {
+                k: int(cols[k][m]) if k in ("month", "year") else round(float(cols[k][m]), 2)
+                for k in ROW_COLUMNS
+            }
+            for m in range(n)
+        ]
+
+    def final_assets(self):
+        """
+        Assets at the end of each household's horizon (initial assets if no months ran).
+        """
+        if not self.columns["assets"].shape[1]:
+            return self.initial_assets.copy()
+        idx = np.maximum(self.n_months - 1, 0)
+        last = self.columns["assets"][np.arange(len(self)), idx]
+        return np.where(self.n_months > 0, last, self.initial_assets)
+
+    def depletion_months(self):
+        """
+        First month number whose closing assets are negative, per household
+        (0 if the money lasts the whole horizon).
+        """
+        assets = self.columns["assets"]
+        valid = np.arange(assets.shape[1]) < self.n_months[:, None]
+        depleted = (assets < 0) & valid
+        return np.where(depleted.any(axis=1), np.argmax(depleted, axis=1) + 1, 0)
+
+
+def simulate_finances_batch(params, schedules=None, rate_paths=None, record=None, start=None,
+                            events=None) -> BatchResult:
+    """
+    Run simulate_finances for N households at once.
+
+    params is either a sequence of dicts holding simulate_finances keyword
+    arguments, or a mapping of argument name -> scalar or length-N array.
+    schedules is an optional schedules.ScheduleStore, as for simulate_finances.
+    rate_paths optionally varies rates month by month: a mapping with
+    "income_interest_rate" (annual %, replacing the fixed rate) and/or
+    "deeming_shift" (added to both deeming rates, as a decimal), each an
+    (N, months) array covering the longest horizon. The scalar params are
+    broadcast to the number of paths.
+    record limits the columns kept (default all); "assets" is always kept.
+    start resumes every lane from a checkpoint, the vector form of
+    agedcare_sim.Checkpoint: {"month": m} plus per-lane "assets",
+    "lifetime_means_paid", "current_year" and "year_total_mtf" (MTF paid in
+    the current year). Months before m are left blank.
+    events optionally gives each household a list of timeline events on
+    top of its house sale (None or empty for none); a rate path replaces
+    the income interest rate any RateChange sets.
+    """
+    rate_paths = rate_paths or {}
+    n_paths = None
+    for path in rate_paths.values():
+        n_paths = len(path)
+    p = _stack_params(params, n_paths)
+    n = len(p["initial_assets"])
+
+    sale = p["months_till_house_sale"]
+    n_months = sale + p["total_months_after_sale"]
+    horizon = int(n_months.max()) if n else 0
+
+    if schedules is None:
+        schedules = rate_schedules.DEFAULT_SCHEDULES
+    schedule_plan = schedules.month_index(p["start_year"], p["start_month"], p["start_day"], horizon)
+
+    # month-major copies of the rate paths, so each month reads a contiguous row
+    rate_path = rate_paths.get("income_interest_rate")
+    if rate_path is not None:
+        rate_path = np.ascontiguousarray(np.asarray(rate_path, dtype=float)[:, :horizon].T) / 100 / 12
+    deeming_path = rate_paths.get("deeming_shift")
+    if deeming_path is not None:
+        deeming_path = np.ascontiguousarray(np.asarray(deeming_path, dtype=float)[:, :horizon].T)
+    deeming_shift = None
+
+    inputs, changes, cash = _compile_plans(p, events, n_months)
+    limit = p["means_tested_lifetime_limit"]
+
+    if start is None:
+        first = 0
+        assets = p["initial_assets"].copy()
+        lifetime_means_paid = np.zeros(n)
+        year_total_mtf = np.zeros(n)
+        current_year = p["start_year"].copy()
+    else:
+        first = start["month"]
+        assets = np.array(start["assets"], dtype=float)
+        lifetime_means_paid = np.array(start["lifetime_means_paid"], dtype=float)
+        year_total_mtf = np.array(start["year_total_mtf"], dtype=float)
+        current_year = np.array(start["current_year"], dtype=np.int64)
+
+    # filled month by month, so keep each month contiguous and transpose at the end
+    shape = (horizon, n)
+    recorded = ROW_COLUMNS if record is None else [k for k in ROW_COLUMNS if k in record or k == "assets"]
+    cols = {k: np.full(shape, np.nan) for k in recorded}
+    if "month" in cols:
+        cols["month"] = np.broadcast_to(np.arange(1, horizon + 1)[:, None], shape).copy()
+    if "year" in cols:
+        cols["year"] = np.zeros(shape, dtype=np.int64)
+
+    # catch up on changes before a resumed start
+    for t in sorted(changes):
+        if t < first:
+            _apply_changes(inputs, changes[t])
+
+    zeros = np.zeros(n)
+    for t in range(first, horizon):
+        # annual MTF totals are keyed by calendar year
+        year = p["start_year"] + (p["start_month"] - 1 + t) // 12
+        year_total_mtf[year != current_year] = 0.0
+        current_year = year
+
+        if t in changes:
+            _apply_changes(inputs, changes[t])
+        # RAD payments leave first, then lump sums (e.g. house proceeds) arrive
+        extra_cash = house = rad_paid = zeros
+        if t in cash:
+            assets = assets.copy()
+            extra_cash, house, rad_paid = zeros.copy(), zeros.copy(), zeros.copy()
+            for lanes, pay, receive, house_proceeds, paid in cash[t]:
+                assets[lanes] = assets[lanes] - pay
+                extra_cash[lanes] = receive
+                house[lanes] = house_proceeds
+                rad_paid[lanes] = paid
+        assets = assets + extra_cash
+
+        monthly_rate = inputs.monthly_rate if rate_path is None else rate_path[t]
+        if deeming_path is not None:
+            deeming_shift = deeming_path[t]
+        interest_income = assets * inputs.interest_share * monthly_rate
+        assets = assets + interest_income
+
+        plan = schedule_plan[:, t]
+        pension = _per_schedule(plan, schedules, _monthly_pension, assets, inputs.homeowner, deeming_shift)
+        assets = assets + pension
+
+        fees = inputs.monthly_basic_special
+        gate = (lifetime_means_paid < limit) & (year_total_mtf < schedules.annual_caps[plan])
+        monthly_means_tested = _per_schedule(
+            plan, schedules, _monthly_mtf, pension, assets, inputs.means_extra, inputs.home_val, deeming_shift,
+        )
+        mtf = np.where(gate, np.minimum(monthly_means_tested, limit - lifetime_means_paid), 0.0)
+        fees = fees + mtf
+        lifetime_means_paid = lifetime_means_paid + mtf
+        year_total_mtf = year_total_mtf + mtf
+
+        dap_fee = inputs.dap_fee
+        fees = fees + dap_fee
+
+        assets = assets - fees
+        assets = assets - inputs.spending
+
+        row = {
+            "year": year,
+            "assets": assets,
+            "interest_income": interest_income,
+            "pension_income": pension,
+            "fees_total": fees,
+            "dap_fee": dap_fee,
+            "mtf": mtf,
+            "annual_mtf_paid": year_total_mtf,
+            "lifetime_means_paid": lifetime_means_paid,
+            "house_contribution": house,
+            "rad_paid": rad_paid,
+        }
+        for k, col in cols.items():
+            if k != "month":
+                col[t] = row[k]
+
+    state = {
+        "month": max(horizon, first),
+        "assets": assets,
+        "lifetime_means_paid": lifetime_means_paid,
+        "current_year": current_year,
+        "year_total_mtf": year_total_mtf,
+    }
+
+    # blank out months beyond each household's horizon
+    cols = {k: v.T for k, v in cols.items()}
+    beyond = np.arange(horizon) >= n_months[:, None]
+    for k in cols:
+        if k in ("month", "year"):
+            cols[k][beyond] = 0
+        else:
+            cols[k][beyond] = np.nan
+
+    return BatchResult(cols, n_months, p["initial_assets"], state)
+
+
+def simulate_finances_shared(scenarios, schedules=None, record=None, events=None) -> BatchResult:
+    """
+    simulate_finances_batch for a list of scenario dicts, computing the
+    months before the house sale once per group of scenarios that share
+    them (agedcare_sim.prefix_key) and resuming each member from the
+    group's checkpoint at the sale. Lanes are independent, so the result
+    is identical to simulate_finances_batch(scenarios).
+
+    Scenarios with different sale months need separate runs, each paying
+    the per-month overhead, so when sharing would not save work overall
+    this is simply simulate_finances_batch. So is a run with extra events,
+    which may change the months before the sale.
+    """
+    scenarios = list(scenarios)
+    if events is not None and any(events):
+        return simulate_finances_batch(scenarios, schedules=schedules, record=record, events=events)
+    groups = defaultdict(list)
+    for i, scenario in enumerate(scenarios):
+        groups[prefix_key(scenario)].append(i)
+    if len(groups) == len(scenarios) or not _sharing_pays(scenarios, groups):
+        return simulate_finances_batch(scenarios, schedules=schedules, record=record)
+
+    # one resumed run per sale month, as a run resumes every lane at the same month
+    group_of = np.empty(len(scenarios), dtype=np.int64)
+    heads = []
+    for g, members in enumerate(groups.values()):
+        group_of[members] = g
+        heads.append(members[0])
+    sales = np.array([s["months_till_house_sale"] for s in scenarios], dtype=np.int64)
+    parts = []
+    for sale in np.unique(sales).tolist():
+        members = np.flatnonzero(sales == sale)
+        part = [scenarios[i] for i in members]
+        if not sale:
+            parts.append((members, simulate_finances_batch(part, schedules, record=record)))
+            continue
+        # the group's first scenario runs the shared months, then every member resumes from its state
+        part_groups, lane = np.unique(group_of[members], return_inverse=True)
+        prefix_runs = [dict(scenarios[heads[g]], total_months_after_sale=0) for g in part_groups]
+        prefix = simulate_finances_batch(prefix_runs, schedules, record=record)
+        start = {k: v if k == "month" else v[lane] for k, v in prefix.state.items()}
+        result = simulate_finances_batch(part, schedules, record=record, start=start)
+        for k, col in result.columns.items():
+            col[:, :sale] = prefix.columns[k][lane]
+        parts.append((members, result))
+    if len(parts) == 1:
+        return parts[0][1]
+    return _stitch(parts, len(scenarios))
+
+
+def _sharing_pays(scenarios, groups) -> bool:
+    """
+    Estimated cost (lane-months, plus a fixed cost per month stepped) of
+    the shared runs against one plain batch run.
+    """
+    sale = np.array([s["months_till_house_sale"] for s in scenarios], dtype=np.int64)
+    n_months = sale + np.array([s["total_months_after_sale"] for s in scenarios], dtype=np.int64)
+    heads = np.array([members[0] for members in groups.values()])
+    plain = n_months.max() * (MONTH_OVERHEAD_LANES + len(scenarios))
+    shared = 0
+    for s in np.unique(sale):
+        lanes = sale == s
+        shared += s * (MONTH_OVERHEAD_LANES + np.count_nonzero(sale[heads] == s))
+        shared += (n_months[lanes].max() - s) * (MONTH_OVERHEAD_LANES + np.count_nonzero(lanes))
+    # the estimate leaves out copying the shared months to every member
+    return shared < 0.75 * plain
+
+
+def _stitch(parts, n) -> BatchResult:
+    """
+    One BatchResult from (lane indices, BatchResult) parts covering 0..n-1.
+    """
+    horizon = max(result.columns["assets"].shape[1] for _, result in parts)
+    columns = {}
+    for k, col in parts[0][1].columns.items():
+        columns[k] = np.zeros((n, horizon), dtype=col.dtype) if col.dtype.kind == "i" else np.full((n, horizon), np.nan)
+    n_months = np.zeros(n, dtype=np.int64)
+    initial_assets = np.zeros(n)
+    for members, result in parts:
+        for k, col in result.columns.items():
+            columns[k][members, :col.shape[1]] = col
+        n_months[members] = result.n_months
+        initial_assets[members] = result.initial_assets
+    return BatchResult(columns, n_months, initial_assets)
@@ -0,0 +1,413 @@
+"""
+Benchmarks for the simulation, rule calculations, exports and web app.
+
+Each benchmark is timed like timeit: the call is repeated until a run
+takes at least min_time, runs are repeated and the best per-call time is
+kept. Peak memory is measured on one separate call under tracemalloc.
+Benchmarks that simulate report throughput in household-months per second.
+
+The startup benchmarks time a fresh interpreter importing the simulator,
+and running the CLI on the default scenario, as a shell script calling it
+in a loop would. Their "_eager" twins import the libraries the CLI used to
+load at startup (openpyxl and dateutil) first, so the pair shows what the
+lazy imports save.
+
+Two groups form scaling curves: simulate_finances against the horizon and
+the batch engine against the number of households.
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim bench run --output benchmarks/baseline.json
+    python -m aged_care_calcs.agedcare_sim bench compare benchmarks/baseline.json --threshold 15
+
+compare runs the suite (or reads a second results file) and exits 1 when a
+benchmark is slower than the baseline by more than the threshold percent.
+Timings only mean something against the same machine, so results record
+their host (host_info) and compare refuses a baseline from another one
+(exit 2) unless --any-host is given. Baselines are therefore not kept in
+the repository: record one on the machine that will run the comparison.
+"""
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import importlib
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import agedcare_sim
+from . import batch_sim
+from . import history as run_history
+from . import schedules as rate_schedules
+from .mtf_calc import calculate_mtf_daily, deemed_income
+from .pension_calc_income_assets import calculate_age_pension
+
+logger = logging.getLogger(__name__)
+
+BENCH_FORMAT = 1
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+HORIZONS = (12, 60, 120, 360, 600)
+BATCH_SIZES = (1, 10, 100, 1000)
+BATCH_HORIZON = 120
+EXPORT_HORIZON = 600
+
+
+class Benchmark:
+    """
+    A named callable; household_months is the simulated work per call
+    (None for benchmarks that do not simulate). setup() runs once before
+    timing and its return value is passed to fn, and to teardown()
+    afterwards.
+    """
+
+    def __init__(self, name, fn, setup=None, household_months=None, group=None, x=None, teardown=None):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.teardown = teardown
+        self.household_months = household_months
+        # scaling curve this point belongs to, and its position on the curve
+        self.group = group
+        self.x = x
+
+
+def _scenario(months):
+    return agedcare_sim.with_horizon(agedcare_sim.DEFAULT_SCENARIO, months)
+
+
+def _batch_scenarios(n, months):
+    base = _scenario(months)
+    rads = np.linspace(0.0, 900000.0, n)
+    return [dict(base, rad=float(rad)) for rad in rads]
+
+
+def _export_setup():
+    return agedcare_sim.simulate_finances(**_scenario(EXPORT_HORIZON)), tempfile.mkdtemp(prefix="agedcare_bench_")
+
+
+@contextlib.contextmanager
+def _environ(name, value):
+    """
+    os.environ[name] set to value inside the block, then put back.
+    """
+    saved = os.environ.get(name)
+    os.environ[name] = value
+    try:
+        yield
+    finally:
+        if saved is None:
+            del os.environ[name]
+        else:
+            os.environ[name] = saved
+
+
+def _flask_setup():
+    directory = tempfile.mkdtemp(prefix="agedcare_bench_")
+    # a first import opens the app's own history; keep even that away from the server's
+    with _environ("AGEDCARE_HISTORY_DB", os.path.join(directory, "import.db")):
+        try:
+            web = importlib.import_module("app")
+        except ImportError as e:
+            raise RuntimeError(f"web app not importable ({e}); run from the repository root") from e
+    # the runs timed go into a throwaway history, put back by _flask_teardown
+    saved = web.history
+    web.history = run_history.RunHistory(os.path.join(directory, "history.db"))
+    client = web.app.test_client()
+    form = {name.replace("_", "-"): str(value) for name, value in _scenario(120).items()}
+    # a different scenario every call, so the result cache never answers
+    counter = itertools.count()
+    return web, client, form, counter, saved
+
+
+def _flask_teardown(state):
+    web, saved = state[0], state[-1]
+    web.history = saved
+
+
+def _flask_round_trip(state):
+    web, client, form, counter, _ = state
+    form = dict(form, **{"initial-assets": str(100000 + next(counter))})
+    response = client.post("/simulate", data=form, headers={"Accept": "application/json"})
+    job = web.job_queue.get(response.get_json()["id"])
+    job.wait()
+    client.get(f"/download/{job.id}?type=csv").close()
+
+
+def _run_python(*args):
+    # from the directory holding the package, so -m finds it
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, *args], cwd=root, check=True, stdout=subprocess.DEVNULL)
+
+
+# what the simulator imported at startup before openpyxl was made lazy and
+# dateutil was dropped
+EAGER_IMPORTS = "import openpyxl, dateutil.relativedelta"
+
+
+def _cli_args():
+    args = []
+    for name, value in agedcare_sim.DEFAULT_SCENARIO.items():
+        args += ["--" + name.replace("_", "-"), str(value)]
+    return args + ["--no-cache"]
+
+
+def benchmarks() -> list:
+    suite = []
+    for months in HORIZONS:
+        scenario = _scenario(months)
+        suite.append(Benchmark(
+            f"simulate_finances/h{months}",
+            lambda _, s=scenario: agedcare_sim.simulate_finances(**s),
+            household_months=months, group="horizon", x=months,
+        ))
+    for n in BATCH_SIZES:
+        scenarios = _batch_scenarios(n, BATCH_HORIZON)
+        suite.append(Benchmark(
+            f"simulate_finances_batch/n{n}",
+            lambda _, s=scenarios: batch_sim.simulate_finances_batch(s),
+            household_months=n * BATCH_HORIZON, group="batch", x=n,
+        ))
+
+    # the per-month calls, with the rules the simulation passes them
+    rules = rate_schedules.DEFAULT_SCHEDULES.at(agedcare_sim.DEFAULT_SCENARIO["start_date"])
+    suite += [
+        Benchmark("deemed_income", lambda _: deemed_income(412345.67, rules=rules)),
+        Benchmark("calculate_age_pension", lambda _: calculate_age_pension(150.0, 412345.67, True, rules=rules)),
+        Benchmark("calculate_mtf_daily", lambda _: calculate_mtf_daily(57200.0, 412345.67, True, 1000000.0, rules=rules)),
+        Benchmark(
+            f"save_csv/h{EXPORT_HORIZON}",
+            lambda state: agedcare_sim.save_csv(os.path.join(state[1], "bench.csv"), state[0]),
+            setup=_export_setup,
+        ),
+        Benchmark(
+            f"save_excel/h{EXPORT_HORIZON}",
+            lambda state: agedcare_sim.save_excel(os.path.join(state[1], "bench.xlsx"), state[0]),
+            setup=_export_setup,
+        ),
+        Benchmark("flask_simulate/h126", _flask_round_trip, setup=_flask_setup, teardown=_flask_teardown,
+                  household_months=126),
+        Benchmark("startup/import", lambda _: _run_python("-c", "import aged_care_calcs.agedcare_sim")),
+        Benchmark("startup/cli_h126", lambda _: _run_python("-m", "aged_care_calcs.agedcare_sim", *_cli_args())),
+        Benchmark("startup/import_eager", lambda _: _run_python(
+            "-c", f"{EAGER_IMPORTS}; import aged_care_calcs.agedcare_sim")),
+        Benchmark("startup/cli_h126_eager", lambda _: _run_python(
+            "-c", f"{EAGER_IMPORTS}; import sys, runpy; sys.argv[1:] = {_cli_args()!r}; "
+                  "runpy.run_module('aged_care_calcs.agedcare_sim', run_name='__main__')")),
+    ]
+    return suite
+
+
+def measure(bench, min_time=0.2, repeat=3) -> dict:
+    """
+    Best seconds per call, throughput and tracemalloc peak for one benchmark.
+    """
+    state = bench.setup() if bench.setup is not None else None
+    try:
+        return _measure(bench, state, min_time, repeat)
+    finally:
+        if bench.teardown is not None:
+            bench.teardown(state)
+
+
+def _measure(bench, state, min_time, repeat) -> dict:
+    bench.fn(state)  # warm caches and lazy imports
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            bench.fn(state)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    runs = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            bench.fn(state)
+        runs.append((time.perf_counter() - start) / number)
+    seconds = min(runs)
+
+    tracemalloc.start()
+    try:
+        bench.fn(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "calls": number * repeat,
+        "household_months": bench.household_months,
+        "throughput": bench.household_months / seconds if bench.household_months else None,
+        "peak_kib": round(peak / 1024, 1),
+        "group": bench.group,
+        "x": bench.x,
+    }
+
+
+def host_info() -> dict:
+    """
+    What identifies the machine and runtime timings were taken on.
+    """
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": f"{platform.python_implementation()} {sys.version.split()[0]}",
+        "numpy": np.__version__,
+    }
+
+
+def run_suite(pattern="*", min_time=0.2, repeat=3) -> dict:
+    results = {}
+    for bench in benchmarks():
+        if not fnmatch.fnmatch(bench.name, pattern):
+            continue
+        try:
+            results[bench.name] = measure(bench, min_time, repeat)
+        except Exception as e:
+            logger.warning("Skipping %s: %s", bench.name, e)
+            continue
+        logger.info("%-32s %s", bench.name, _format_seconds(results[bench.name]["seconds"]))
+    return {
+        "format": BENCH_FORMAT,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "host": host_info(),
+        "results": results,
+    }
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def report(suite) -> str:
+    results = suite["results"]
+    lines = [f"{'benchmark':<32} {'per call':>12} {'hh-months/s':>14} {'peak KiB':>10}"]
+    for name, r in results.items():
+        throughput = f"{r['throughput']:,.0f}" if r["throughput"] else "-"
+        lines.append(f"{name:<32} {_format_seconds(r['seconds']):>12} {throughput:>14} {r['peak_kib']:>10,.1f}")
+    for group, label in (("horizon", "months"), ("batch", "households")):
+        curve = [r for r in results.values() if r["group"] == group]
+        if not curve:
+            continue
+        lines.append("")
+        lines.append(f"scaling with {label}:")
+        top = max(r["throughput"] for r in curve)
+        for r in curve:
+            bar = "#" * max(1, round(40 * r["throughput"] / top))
+            lines.append(f"  {r['x']:>6} {r['throughput']:>14,.0f} {bar}")
+    return "\n".join(lines)
+
+
+def compare(baseline, current, threshold=10.0) -> list:
+    """
+    (name, baseline seconds, current seconds, change %) for every benchmark
+    in both runs, and whether it is a regression beyond threshold percent.
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        change = (now["seconds"] / base["seconds"] - 1) * 100
+        rows.append((name, base["seconds"], now["seconds"], change, change > threshold))
+    return rows
+
+
+def load(filename) -> dict:
+    with open(filename) as f:
+        suite = json.load(f)
+    if suite.get("format") != BENCH_FORMAT:
+        raise ValueError(f"{filename}: unsupported benchmark format {suite.get('format')!r}")
+    return suite
+
+
+def save(filename, suite):
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(suite, f, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim bench",
+        description="Time the simulation, rule calculations, exports and web app",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and print a report")
+    run.add_argument("--output", help="Save the results as JSON (e.g. to update the baseline)")
+
+    cmp_parser = commands.add_parser("compare", help="Flag benchmarks slower than a baseline")
+    cmp_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE,
+                            help=f"Baseline results (default {DEFAULT_BASELINE})")
+    cmp_parser.add_argument("current", nargs="?", help="Results to check (default: run the suite now)")
+    cmp_parser.add_argument("--threshold", type=float, default=10.0,
+                            help="Slowdown in %% that counts as a regression (default 10)")
+    cmp_parser.add_argument("--any-host", action="store_true",
+                            help="Compare even if the baseline was recorded on a different machine")
+
+    for p in (run, cmp_parser):
+        p.add_argument("--only", default="*", help="Run only benchmarks matching this glob, e.g. 'simulate_*'")
+        p.add_argument("--quick", action="store_true", help="Shorter timing runs, for a rough check")
+    args = parser.parse_args(argv)
+    agedcare_sim.configure_logging("INFO")
+    # not a "Saved results" line for every timed export
+    logging.getLogger(agedcare_sim.__name__).setLevel(logging.WARNING)
+
+    min_time, repeat = (0.05, 2) if args.quick else (0.2, 3)
+
+    if args.command == "run":
+        suite = run_suite(args.only, min_time, repeat)
+        print(report(suite))
+        if args.output:
+            save(args.output, suite)
+        return 0
+
+    try:
+        baseline = load(args.baseline)
+    except FileNotFoundError:
+        parser.error(f"no baseline at {args.baseline}; record one on this machine with 'bench run --output {args.baseline}'")
+    if args.current:
+        current = load(args.current)
+    elif baseline.get("host") != host_info() and not args.any_host:
+        current = None
+    else:
+        current = run_suite(args.only, min_time, repeat)
+    if current is None or (baseline.get("host") != current.get("host") and not args.any_host):
+        print(f"❌ {args.baseline} was recorded on a different host ({baseline.get('host') or 'unknown'}); "
+              f"record a baseline here, or pass --any-host")
+        return 2
+    rows = compare(baseline, current, args.threshold)
+    regressions = [row for row in rows if row[4]]
+    print(f"{'benchmark':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, before, after, change, regressed in rows:
+        print(f"{name:<32} {_format_seconds(before):>12} {_format_seconds(after):>12} {change:>+7.1f}%"
+              f"{'  REGRESSION' if regressed else ''}")
+    if regressions:
+        print(f"❌ {len(regressions)} of {len(rows)} benchmarks slower than the baseline by more than {args.threshold:g}%")
+        return 1
+    print(f"✅ {len(rows)} benchmarks within {args.threshold:g}% of the baseline")
+    return 0
@@ -0,0 +1,303 @@
+"""
+Result cache keyed on the simulation parameters.
+
+The key is a hash of the normalised simulate_finances arguments (floats as
+floats, dates as ISO strings, in a fixed order) plus the rate schedule
+store's version (and any timeline events), so 140000 and "140000.0" share
+an entry and any change to the rules starts a fresh one. Entries live in a size-bounded in-memory LRU
+and, when a directory is configured, in a file per key that survives
+restarts. The directory is capped at max_disk_bytes; past that the least
+recently used files go first.
+
+Files hold SimulationResults as typed columns (SimulationResult.to_bytes)
+and other values as JSON, never pickles, so a shared directory cannot be
+used to run code in the processes reading it. Values that are neither
+stay in memory only.
+
+default_cache() is the process-wide cache shared by the CLI, the web app
+and sweeps; AGEDCARE_CACHE_SIZE, AGEDCARE_CACHE_DIR and
+AGEDCARE_CACHE_DISK_MB configure it. Cached values are shared between
+callers and must not be modified.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from . import schedules as rate_schedules
+from .results import SimulationResult
+from .timeline import event_to_dict
+
+logger = logging.getLogger(__name__)
+
+# bump when a code change alters simulation output, to orphan old disk entries
+CACHE_FORMAT = 1
+
+CACHE_SUFFIX = ".entry"
+DEFAULT_DISK_MB = 512
+
+# name -> normaliser, in simulate_finances argument order
+_NORMALISE = {
+    "initial_assets": float,
+    "rad": float,
+    "house_value": float,
+    "dap_percentage": float,
+    "income_interest_rate": float,
+    "start_date": lambda d: (d if isinstance(d, datetime.date) else datetime.date.fromisoformat(d)).isoformat(),
+    "months_till_house_sale": int,
+    "total_months_after_sale": int,
+    "basic_daily_fee": float,
+    "means_tested_fee": float,
+    "means_tested_lifetime_limit": float,
+    "special_services_fee": float,
+    "pension_initial": float,
+    "pension_final": float,
+    "incidental_expenditure_mthly": float,
+    "asset_interest_percentage": float,
+}
+
+
+def scenario_key(scenario, schedules=None, kind="result", events=None) -> str:
+    """
+    Canonical hash of a scenario's simulate_finances arguments, its extra
+    timeline events and the rule version; kind separates different
+    products of the same scenario.
+    """
+    if schedules is None:
+        schedules = rate_schedules.DEFAULT_SCHEDULES
+    normalised = [[name, fn(scenario[name])] for name, fn in _NORMALISE.items()]
+    parts = [CACHE_FORMAT, kind, schedules.version, normalised]
+    if events:
+        # left out when there are none, so plain scenarios keep their keys
+        parts.append([event_to_dict(event) for event in events])
+    blob = json.dumps(parts)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _encode(value):
+    """
+    File contents for a cached value, or None if it cannot be stored.
+    """
+    if isinstance(value, SimulationResult):
+        return b"R" + value.to_bytes()
+    try:
+        return b"J" + json.dumps(value).encode()
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode(data):
+    kind, body = data[:1], data[1:]
+    if kind == b"R":
+        return SimulationResult.from_bytes(body)
+    if kind == b"J":
+        return json.loads(body)
+    raise ValueError("unknown cache entry type")
+
+
+class ResultCache:
+    """
+    LRU of up to max_entries values, backed by directory if given (at
+    most max_disk_bytes of files).
+    """
+
+    def __init__(self, max_entries=256, directory=None, max_disk_bytes=DEFAULT_DISK_MB * 2 ** 20):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_files())
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{CACHE_SUFFIX}")
+
+    def _disk_files(self):
+        """
+        (last used, path, size) of every entry file in the directory.
+        """
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(CACHE_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = _decode(f.read())
+                # last used time, for eviction
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                logger.warning("Ignoring unreadable cache file %s", path, exc_info=True)
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        if self.directory:
+            data = _encode(value)
+            if data is None or len(data) > self.max_disk_bytes:
+                return
+            path = self._path(key)
+            # write then rename, so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                try:
+                    # the file replaced (if any) no longer counts
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+            with self._lock:
+                self._disk_bytes += len(data) - replaced
+                over = self._disk_bytes > self.max_disk_bytes
+            if over:
+                self._evict()
+
+    def _evict(self):
+        """
+        Delete the least recently used files until the directory fits in
+        max_disk_bytes (counting every process's files, not just ours).
+        """
+        files = sorted(self._disk_files())
+        total = sum(size for _, _, size in files)
+        # down to 90%, so the next few puts do not each scan the directory
+        target = self.max_disk_bytes * 0.9
+        evicted = 0
+        for _, path, size in files:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evictions += evicted
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached value for key, or compute() stored under it.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "directory": self.directory,
+            "disk_bytes": self._disk_bytes if self.directory else None,
+            "max_disk_bytes": self.max_disk_bytes if self.directory else None,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+        }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResultCache:
+    """
+    The process-wide cache, created on first use from AGEDCARE_CACHE_SIZE
+    (entries, default 256), AGEDCARE_CACHE_DIR (no disk tier if unset) and
+    AGEDCARE_CACHE_DISK_MB (directory size cap, default 512).
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResultCache(
+                max_entries=int(os.environ.get("AGEDCARE_CACHE_SIZE", "256")),
+                directory=os.environ.get("AGEDCARE_CACHE_DIR") or None,
+                max_disk_bytes=int(float(os.environ.get("AGEDCARE_CACHE_DISK_MB", DEFAULT_DISK_MB)) * 2 ** 20),
+            )
+        return _default
+
+
+def configure(max_entries=None, directory=None, max_disk_bytes=None) -> ResultCache:
+    """
+    Replace the process-wide cache (e.g. from command line options).
+    """
+    global _default
+    current = default_cache()
+    with _default_lock:
+        _default = ResultCache(
+            max_entries=current.max_entries if max_entries is None else max_entries,
+            directory=current.directory if directory is None else directory,
+            max_disk_bytes=current.max_disk_bytes if max_disk_bytes is None else max_disk_bytes,
+        )
+        return _default
+
+
+def cached_simulate(scenario, schedules=None, cache=None, events=None):
+    """
+    simulate_finances(**scenario, events=events) through the cache.
+    """
+    # imported here as agedcare_sim imports this module
+    from .agedcare_sim import simulate_finances
+
+    if cache is None:
+        cache = default_cache()
+    key = scenario_key(scenario, schedules, events=events)
+    return cache.get_or_compute(key, lambda: simulate_finances(**scenario, schedules=schedules, events=events))
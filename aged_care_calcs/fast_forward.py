@@ -0,0 +1,178 @@
+"""
+Closed-form fast-forward through steady fee regimes.
+
+Once the MTF is no longer charged (the lifetime limit has been paid, or the
+annual cap is reached for the rest of the calendar year) and the pension is
+pinned at zero or the maximum, a month changes assets by the same affine map
+
+    a' = k * a + c,   k = 1 + monthly interest, c = pension - fees (- spending)
+
+so n months later a_n = k**n * a + c * (k**n - 1) / (k - 1). fast_forward
+uses this to move a Simulation straight to the next regime boundary: the
+pension leaving its tier, a year change that re-opens the annual cap, a
+timeline event (the house sale, lump sums, rate or fee changes), a change
+of rate schedule, depletion or the end of the run.
+Months next to a boundary are stepped normally.
+
+Only the state is advanced; skipped months produce no rows, so this is for
+queries about the outcome (depletion month, final assets), not for tables.
+"""
+import logging
+
+from .agedcare_sim import Simulation
+from .assessment import assess_month
+
+logger = logging.getLogger(__name__)
+
+
+def _affine(k, c, a, n):
+    """
+    Assets after n months of a' = k * a + c.
+    """
+    if k == 1.0:
+        return a + n * c
+    kn = k ** n
+    return kn * a + c * (kn - 1) / (k - 1)
+
+
+def _first_false(predicate, lo, hi):
+    """
+    Smallest j in [lo, hi) with predicate(j) false, or hi; predicate must
+    be true on a prefix of the range.
+    """
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _year_of(sim, m):
+    # calendar year of month index m (start_date + m months)
+    start = sim.start_date
+    return start.year + (start.month - 1 + m) // 12
+
+
+def steady_months(sim, stop_below=None):
+    """
+    How many months from sim.month on lie in a steady regime, with the
+    affine map (k, c) and the fortnightly pension they share.
+
+    Returns (n, k, c, pension); n is 0 when the next month has to be
+    stepped. With stop_below, the span ends at (and includes) the first
+    month whose closing assets fall below it.
+    """
+    m = sim.month
+    timeline = sim.timeline
+    if m >= sim.n_months or m in timeline.cash:
+        # cash moving (e.g. the sale adding the house and paying the RAD)
+        return 0, 1.0, 0.0, 0.0
+    state = sim.state
+    plan = sim.schedule_plan
+    rules = sim.schedules[plan[m]]
+    inputs = timeline.inputs_at(m)
+
+    end = timeline.next_boundary(m)
+    for k in range(m + 1, end):
+        if plan[k] != plan[m]:
+            end = k
+            break
+
+    # MTF gate: closed for good once the lifetime limit is paid, otherwise
+    # while this calendar year's total is at the annual cap. An open gate
+    # is steady too while the assessed fee is nil.
+    charge_mtf = False
+    if state.lifetime_means_paid < sim.means_tested_lifetime_limit:
+        charge_mtf = state.year_total_mtf.get(_year_of(sim, m), 0) < rules.annual_cap
+        if not charge_mtf:
+            start = sim.start_date
+            end = min(end, m + 12 - (start.month - 1 + m) % 12)
+
+    homeowner, home_val, means_extra = inputs.homeowner, inputs.home_val, inputs.means_extra
+    k = 1 + inputs.interest_share * inputs.monthly_rate
+
+    def pension_at(assets):
+        assessed = assess_month(
+            k * assets, homeowner=homeowner, assess_fee=charge_mtf,
+            home_val=home_val, means_extra=means_extra, rules=rules,
+        )
+        if assessed.mtf_daily > 0:
+            return None
+        return assessed.pension
+
+    a0 = state.assets
+    pension = pension_at(a0)
+    if pension != 0 and pension != rules.max_pension_single:
+        return 0, k, 0.0, pension
+    c = pension * 2 - inputs.monthly_basic_special
+    c -= inputs.dap_fee + inputs.spending
+
+    # assets move monotonically, and the pension and fee are monotonic in
+    # assets, so both stay put for a prefix of the span
+    n = _first_false(lambda j: pension_at(_affine(k, c, a0, j)) == pension, 1, end - m)
+    if stop_below is not None and _affine(k, c, a0, 1) < a0:
+        depleted = _first_false(lambda j: _affine(k, c, a0, j + 1) >= stop_below, 0, n)
+        n = min(n, depleted + 1)
+    return n, k, c, pension
+
+
+def fast_forward(sim, stop_below=None) -> int:
+    """
+    Advance sim through the steady regime it is in, if any, and return the
+    number of months skipped (0 if the next month needs a normal step).
+    With stop_below, stop after the first month whose closing assets fall
+    below it.
+    """
+    n, k, c, pension = steady_months(sim, stop_below=stop_below)
+    if n < 2:
+        # not worth it for a single month
+        return 0
+    state = sim.state
+    state.assets = _affine(k, c, state.assets, n)
+    sim.month += n
+    state.current_year = _year_of(sim, sim.month - 1)
+    if sim.debug:
+        logger.debug("fast-forward %s months to month %s, assets %.2f, pension %s", n, sim.month, state.assets, pension)
+    return n
+
+
+def run(sim, stop_below=None):
+    """
+    Step and fast-forward sim to the end (or, with stop_below, to the first
+    month whose closing assets fall below it). Returns the number of months
+    actually stepped.
+    """
+    steps = 0
+    while not sim.finished:
+        if fast_forward(sim, stop_below=stop_below):
+            if stop_below is not None and sim.state.assets < stop_below:
+                break
+            continue
+        row = sim.step()
+        steps += 1
+        if stop_below is not None and row.assets < stop_below:
+            break
+    return steps
+
+
+def depletion_month(*args, **kwargs):
+    """
+    First month number whose closing assets are negative (the same as
+    simulate_finances(...).depletion_month()), or None if the money lasts.
+    Takes simulate_finances arguments.
+    """
+    sim = Simulation(*args, **kwargs)
+    steps = run(sim, stop_below=0.0)
+    logger.debug("depletion query: %s of %s months stepped", steps, sim.month)
+    return sim.month if sim.state.assets < 0 else None
+
+
+def final_assets(*args, **kwargs) -> float:
+    """
+    Closing assets of the last month (simulate_finances arguments).
+    """
+    sim = Simulation(*args, **kwargs)
+    run(sim)
+    return sim.state.assets
@@ -0,0 +1,302 @@
+"""
+Run history persisted in SQLite.
+
+Each web simulation is a row in runs: its id (the job id), submission time,
+the submitted form fields, the parameter hash (cache.scenario_key, which
+also covers the rule version), the download filename, status, error and
+stage timings. The finished SimulationResult is stored as its typed
+columns (SimulationResult.to_bytes), compressed, in a separate results
+table, so listing runs never reads it. Reading one back decodes arrays
+and runs no code, whoever else can write to the file.
+
+The database is in WAL mode, so any number of server processes can share
+one file: readers do not block the writer and a writer waits (busy
+timeout) rather than failing. Connections are per thread.
+
+runs are listed newest first a page at a time, continuing from a cursor
+(the last row's time and sequence number) rather than an offset, and the
+filters (status, parameter hash, time range) each have an index led by
+that column, so a page costs the same however many runs are stored.
+
+Finished runs are kept for at most max_age seconds and max_rows rows
+(oldest deleted first, with their results); pruning happens on open and
+every PRUNE_EVERY runs added.
+
+Each run records its owner, the process that added it and runs it (host,
+pid and a token drawn when the process starts). When the database is
+opened, pending or running runs whose owner is gone are marked failed:
+on this host, the pid is not running, or is running as a different
+process (the token differs, e.g. a restarted server given the same pid).
+The owner of a run from another host cannot be checked, so such runs (and
+runs from before owners were recorded) are only marked failed once they
+are older than stale_after seconds.
+"""
+import datetime
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+from .results import SimulationResult
+
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL,
+    param_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    trace TEXT,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+CREATE INDEX IF NOT EXISTS runs_param_hash ON runs (param_hash, created);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, created);
+CREATE TABLE IF NOT EXISTS results (
+    seq INTEGER PRIMARY KEY REFERENCES runs (seq) ON DELETE CASCADE,
+    data BLOB NOT NULL
+);
+"""
+
+_COLUMNS = "seq, id, created, param_hash, params, filename, status, error, trace"
+
+
+def _new_owner() -> str:
+    return f"{socket.gethostname()} {os.getpid()} {uuid.uuid4().hex[:12]}"
+
+
+def _reset_owner():
+    global _owner
+    _owner = _new_owner()
+
+
+# "host pid token" of this process; a forked child is a new owner
+_owner = _new_owner()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_owner)
+
+
+def owner_gone(owner, created, stale_before) -> bool:
+    """
+    Whether the process that owns a run (owner as stored, None for runs
+    from before owners were recorded) has stopped, as far as this process
+    can tell; otherwise whether the run was created before stale_before.
+    """
+    parts = (owner or "").rsplit(" ", 2)
+    # os.kill(pid, 0) only checks a process on POSIX; elsewhere it would end it
+    if os.name != "posix" or len(parts) != 3 or parts[0] != socket.gethostname() or not parts[1].isdigit():
+        return created < stale_before
+    pid = int(parts[1])
+    if pid == os.getpid():
+        return owner != _owner
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        # e.g. PermissionError: running, as another user
+        pass
+    return False
+
+
+def _row(values) -> dict:
+    run = dict(zip(_COLUMNS.split(", "), values))
+    run["params"] = json.loads(run["params"])
+    run["timestamp"] = datetime.datetime.fromtimestamp(run["created"]).strftime("%Y-%m-%d %H:%M:%S")
+    return run
+
+
+class RunHistory:
+    """
+    Runs stored in the SQLite database at path (created if missing),
+    keeping at most max_rows finished runs for at most max_age seconds
+    (None: no limit).
+    """
+
+    def __init__(self, path, busy_timeout=10.0, max_rows=None, max_age=None, stale_after=3600.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._local = threading.local()
+        self._added = 0
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            self._migrate(db)
+            # left unfinished by a server that stopped
+            stale_before = time.time() - stale_after
+            abandoned = [
+                (seq,) for seq, owner, created in db.execute(
+                    "SELECT seq, owner, created FROM runs WHERE status IN ('pending', 'running')")
+                if owner_gone(owner, created, stale_before)
+            ]
+            db.executemany(
+                "UPDATE runs SET status = 'failed', error = 'abandoned: the server stopped before it finished' "
+                "WHERE seq = ? AND status IN ('pending', 'running')",
+                abandoned,
+            )
+        if abandoned:
+            logger.warning("Marked %s abandoned runs in %s as failed", len(abandoned), path)
+        self.prune()
+
+    @staticmethod
+    def _migrate(db):
+        # databases from before runs recorded their owner
+        if "owner" not in [row[1] for row in db.execute("PRAGMA table_info(runs)")]:
+            try:
+                db.execute("ALTER TABLE runs ADD COLUMN owner TEXT")
+            except sqlite3.OperationalError as e:
+                # another process opening the database got there first
+                if "duplicate column" not in str(e):
+                    raise
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            db.execute("PRAGMA journal_mode=WAL")
+            # in WAL mode a commit is durable at the next checkpoint, which is enough for a history
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            self._local.db = db
+        return db
+
+    def add(self, run_id, params, param_hash, filename, created=None):
+        """
+        Record a submitted run as pending, owned by this process.
+        """
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO runs (id, created, param_hash, params, filename, status, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, time.time() if created is None else created, param_hash, json.dumps(params), filename,
+                 "pending", _owner),
+            )
+        self._added += 1
+        if self._added % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete finished runs (and their results) past max_age or beyond the
+        newest max_rows; returns how many went.
+        """
+        deleted = 0
+        with self._connect() as db:
+            if self.max_age is not None:
+                deleted += db.execute(
+                    "DELETE FROM runs WHERE created < ? AND status NOT IN ('pending', 'running')",
+                    (time.time() - self.max_age,),
+                ).rowcount
+            if self.max_rows is not None:
+                deleted += db.execute(
+                    "DELETE FROM runs WHERE status NOT IN ('pending', 'running') AND seq IN "
+                    "(SELECT seq FROM runs ORDER BY created DESC, seq DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                ).rowcount
+        if deleted:
+            logger.info("Pruned %s runs from %s", deleted, self.path)
+        return deleted
+
+    def discard(self, run_id):
+        """
+        Forget a run that never got queued.
+        """
+        with self._connect() as db:
+            db.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    def update(self, run_id, status, error=None, only_from=None):
+        """
+        Set a run's status (and error); with only_from, only if its status
+        is currently that.
+        """
+        sql = "UPDATE runs SET status = ?, error = ? WHERE id = ?"
+        args = [status, error, run_id]
+        if only_from is not None:
+            sql += " AND status = ?"
+            args.append(only_from)
+        with self._connect() as db:
+            db.execute(sql, args)
+
+    def finish(self, run_id, result, trace=None):
+        """
+        Store a run's SimulationResult and mark it done.
+        """
+        # level 1: within a few percent of the default's size, at well under half the time
+        data = zlib.compress(result.to_bytes(), 1)
+        with self._connect() as db:
+            db.execute("UPDATE runs SET status = 'done', error = NULL, trace = ? WHERE id = ?", (trace, run_id))
+            db.execute("INSERT OR REPLACE INTO results (seq, data) SELECT seq, ? FROM runs WHERE id = ?",
+                       (data, run_id))
+
+    def get(self, run_id):
+        """
+        The run as a dict (without its result), or None.
+        """
+        values = self._connect().execute(f"SELECT {_COLUMNS} FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return None if values is None else _row(values)
+
+    def result(self, run_id):
+        """
+        The stored SimulationResult of a finished run, or None (also if it
+        cannot be read, e.g. one stored in an older format).
+        """
+        values = self._connect().execute(
+            "SELECT data FROM results JOIN runs USING (seq) WHERE runs.id = ?", (run_id,)
+        ).fetchone()
+        if values is None:
+            return None
+        try:
+            return SimulationResult.from_bytes(zlib.decompress(values[0]))
+        except (zlib.error, ValueError):
+            logger.warning("Ignoring unreadable stored result of run %s", run_id)
+            return None
+
+    def page(self, limit=25, after=None, status=None, param_hash=None, since=None, until=None):
+        """
+        Up to limit runs, newest first, and the cursor for the next page
+        (None on the last). after is a cursor from an earlier page; since
+        and until are Unix times.
+        """
+        where, args = [], []
+        for condition, value in (("status = ?", status), ("param_hash = ?", param_hash),
+                                 ("created >= ?", since), ("created < ?", until)):
+            if value is not None:
+                where.append(condition)
+                args.append(value)
+        if after is not None:
+            created, seq = parse_cursor(after)
+            where.append("(created, seq) < (?, ?)")
+            args += [created, seq]
+        sql = f"SELECT {_COLUMNS} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC, seq DESC LIMIT ?"
+        rows = [_row(values) for values in self._connect().execute(sql, args + [limit + 1])]
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, f"{rows[-1]['created']!r}:{rows[-1]['seq']}"
+        return rows, None
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT count(*) FROM runs").fetchone()[0]
+
+
+def parse_cursor(cursor):
+    """
+    (created, seq) from a page cursor; raises ValueError if malformed.
+    """
+    created, _, seq = str(cursor).partition(":")
+    return float(created), int(seq)
@@ -0,0 +1,195 @@
+"""
+Background jobs on a bounded thread pool.
+
+A JobQueue runs submitted functions on a fixed number of worker threads and
+refuses new work (QueueFull) once max_queued jobs are waiting, so a busy
+server pushes back instead of piling up requests. Each job gets an id that
+can be looked up later for its status, progress and result.
+
+The job function receives the Job as its first argument; long loops call
+job.update(progress) now and then, which also raises JobCancelled once the
+job has been cancelled. Jobs that have not started yet are cancelled
+straight away.
+"""
+import datetime
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """
+    Raised by JobQueue.submit when the queue is at its limit.
+    """
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a running job once it has been cancelled.
+    """
+
+
+class Job:
+    __slots__ = (
+        "id", "description", "status", "progress", "result", "error",
+        "submitted", "started", "finished", "_cancel", "_future",
+    )
+
+    def __init__(self, description="", job_id=None):
+        self.id = job_id or str(uuid.uuid4())
+        self.description = description
+        self.status = PENDING
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.submitted = datetime.datetime.now()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def update(self, progress):
+        """
+        Record progress (0 to 1); raises JobCancelled if the job was cancelled.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = progress
+
+    def cancel(self) -> bool:
+        """
+        Ask the job to stop. Returns False if it had already finished.
+        """
+        if self.done:
+            return False
+        self._cancel.set()
+        if self._future is not None and self._future.cancel():
+            self._finish(CANCELLED)
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Block until the job finishes and return its result (re-raising its error).
+        """
+        try:
+            self._future.result(timeout)
+        except CancelledError:
+            raise JobCancelled() from None
+        if self.status == FAILED:
+            raise self.error
+        if self.status == CANCELLED:
+            raise JobCancelled()
+        return self.result
+
+    def _finish(self, status):
+        self.status = status
+        self.finished = datetime.datetime.now()
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "error": None if self.error is None else str(self.error),
+            "submitted": self.submitted.isoformat(timespec="seconds"),
+            "started": self.started and self.started.isoformat(timespec="seconds"),
+            "finished": self.finished and self.finished.isoformat(timespec="seconds"),
+        }
+
+
+class JobQueue:
+    """
+    max_workers jobs run at once; at most max_queued more may wait.
+    The most recent keep_finished finished jobs stay available by id.
+    """
+
+    def __init__(self, max_workers=4, max_queued=16, keep_finished=1000, thread_name_prefix="job"):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, description="", job_id=None, **kwargs) -> Job:
+        """
+        Queue fn(job, *args, **kwargs); raises QueueFull when saturated.
+        job_id sets the job's id, e.g. one already recorded elsewhere.
+        """
+        job = self._add(description, job_id)
+        job._future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def coordinate(self, fn, *args, description="", job_id=None, **kwargs) -> Job:
+        """
+        Like submit, but fn runs on a thread of its own instead of the pool:
+        for jobs that only submit other jobs and wait for them, which on the
+        pool could take every worker while the work they wait for queues
+        behind them.
+        """
+        job = self._add(description, job_id)
+        future = job._future = Future()
+
+        def run():
+            if future.set_running_or_notify_cancel():
+                self._run(job, fn, args, kwargs)
+                future.set_result(None)
+
+        threading.Thread(target=run, name=f"{description or 'job'}-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def _add(self, description, job_id) -> Job:
+        job = Job(description, job_id)
+        with self._lock:
+            if self.active() >= self.max_workers + self.max_queued:
+                raise QueueFull(f"{self.max_workers + self.max_queued} jobs already queued or running")
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job._cancel.is_set():
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        job.started = datetime.datetime.now()
+        try:
+            job.result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job.error = e
+            job._finish(FAILED)
+        else:
+            job.progress = 1.0
+            job._finish(DONE)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def active(self) -> int:
+        """
+        Number of jobs pending or running.
+        """
+        return sum(not job.done for job in list(self._jobs.values()))
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,137 @@
+"""
+Survival-weighted expected costs from a life table.
+
+Instead of guessing total_months_after_sale, the simulation runs once over
+the longest horizon the life table allows and each month is weighted by the
+probability that the resident is alive to see it:
+
+    expected fees        = sum over months of P(alive at start) * fees
+    expected RAD refund  = sum over months of P(dies in month) * RAD held
+    P(outliving funds)   = P(alive at the start of the month the assets
+                           first go negative)
+
+Annual q_x are spread evenly over the year of age as monthly survival
+(1 - q_x) ** (1 / 12). Everyone is taken to die by the end of the oldest
+age in the table.
+
+The life table is a CSV with age, sex and qx columns (one row per age and sex).
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim longevity --life-table qx.csv \\
+        --age 84 --sex F --initial-assets ...
+"""
+import argparse
+import csv
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from . import agedcare_sim
+
+
+class LifeTable:
+    """
+    Annual death probabilities q_x by sex and integer age.
+    """
+
+    def __init__(self, qx):
+        # sex -> {age: qx}
+        self.qx = {sex: dict(ages) for sex, ages in qx.items()}
+
+    @classmethod
+    def from_csv(cls, filename) -> "LifeTable":
+        qx = defaultdict(dict)
+        with open(filename, newline="") as f:
+            for row in csv.DictReader(f):
+                qx[row["sex"].strip().upper()][int(row["age"])] = float(row["qx"])
+        return cls(qx)
+
+    def survival(self, sex, age) -> np.ndarray:
+        """
+        S[t] = probability a resident of the given (possibly fractional) age
+        is still alive t months later, from S[0] = 1 until it reaches 0.
+        Raises ValueError if the table does not cover every age from age on
+        without gaps.
+        """
+        table = self.qx[sex.upper()]
+        first, last = min(table), max(table)
+        if not first <= age < last + 1:
+            raise ValueError(f"age {age:g} is outside the life table's {sex} ages ({first} to {last})")
+        missing = [a for a in range(int(math.floor(age)), last + 1) if a not in table]
+        if missing:
+            raise ValueError(f"the life table has no {sex} rows for ages {', '.join(map(str, missing))}")
+        n_months = int(math.ceil((last + 1 - age) * 12))
+        ages = np.floor(age + np.arange(n_months) / 12).astype(int)
+        qx = np.array([table[a] for a in ages])
+        monthly = (1 - np.clip(qx, 0.0, 1.0)) ** (1 / 12)
+        # everyone dies by the end of the table
+        monthly[-1] = 0.0
+        return np.concatenate(([1.0], np.cumprod(monthly)))
+
+
+def expected_costs(scenario, life_table, age, sex, schedules=None) -> dict:
+    """
+    Survival-weighted outcomes of one scenario (simulate_finances
+    arguments; its total_months_after_sale is replaced by the life table
+    horizon). One pass over the months, whatever the horizon.
+    """
+    survival = life_table.survival(sex, age)
+    months = len(survival) - 1
+    scenario = agedcare_sim.with_horizon(scenario, months)
+    sale = scenario["months_till_house_sale"]
+    weights = survival.tolist()
+
+    expected_fees = expected_mtf = expected_dap = expected_refund = 0.0
+    outlive = None
+    for row in agedcare_sim.simulate_finances_iter(**scenario, schedules=schedules):
+        t = row.month
+        alive = weights[t - 1]
+        dies = alive - weights[t]
+        expected_fees += alive * row.fees_total
+        expected_mtf += alive * row.mtf
+        expected_dap += alive * row.dap_fee
+        # the RAD is held (and refunded on death) from the month it is paid
+        if t > sale:
+            expected_refund += dies * scenario["rad"]
+        if outlive is None and row.assets < 0:
+            outlive = alive
+
+    return {
+        "horizon_months": months,
+        "life_expectancy_months": round(float(survival[1:].sum()), 2),
+        "expected_fees": round(expected_fees, 2),
+        "expected_mtf": round(expected_mtf, 2),
+        "expected_dap": round(expected_dap, 2),
+        "expected_rad_refund": round(expected_refund, 2),
+        "probability_outlive_funds": round(outlive or 0.0, 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim longevity",
+        description="Survival-weighted expected fees, RAD refund and probability of outliving "
+                    "the money, using a life table instead of --total-months-after-sale.",
+    )
+    agedcare_sim.add_simulation_arguments(parser, exclude=("--total-months-after-sale",))
+    parser.add_argument("--life-table", required=True, help="CSV with age, sex and qx columns")
+    parser.add_argument("--age", type=float, required=True, help="Resident's age at the start date")
+    parser.add_argument("--sex", required=True, help="Sex as written in the life table (e.g. M or F)")
+    args = agedcare_sim.parse_simulation_args(parser, argv)
+    agedcare_sim.configure_logging("INFO")
+
+    life_table = LifeTable.from_csv(args.life_table)
+    if args.sex.upper() not in life_table.qx:
+        parser.error(f"no '{args.sex}' rows in {args.life_table}")
+
+    scenario = {name: getattr(args, name, None) for name in agedcare_sim.SIMULATION_PARAMS}
+    scenario["total_months_after_sale"] = 0
+    try:
+        months = len(life_table.survival(args.sex, args.age)) - 1
+    except ValueError as e:
+        parser.error(str(e))
+    schedules = agedcare_sim.load_schedules(args, agedcare_sim.incr_year(args.start_date, months))
+
+    for name, value in expected_costs(scenario, life_table, args.age, args.sex, schedules=schedules).items():
+        print(f"{name:<28} {value:>14,}")
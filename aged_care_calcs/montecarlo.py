@@ -0,0 +1,208 @@
+"""
+Monte Carlo rate scenarios.
+
+simulate_finances holds income_interest_rate and the deeming rates fixed for
+the whole horizon. Here a rate model draws thousands of monthly paths for
+the interest rate instead; the deeming rates follow it, moving by
+deeming_beta times the change in the interest rate. Every path is a lane of
+the batch engine, so all paths go through the month loop together.
+
+Paths are generated in fixed-size chunks, each from its own random stream
+spawned from one numpy.random.SeedSequence, so a seed gives the same paths
+whatever the number of worker processes.
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim montecarlo --paths 10000 --seed 1 \\
+        --model mean-reverting --long-run 3.5 --volatility 1 ... --csv bands.csv
+"""
+import argparse
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import agedcare_sim
+from . import batch_sim
+from .sweep import available_cpus, save_summary_csv
+
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_PATHS = 1000
+
+
+class MeanReverting:
+    """
+    Monthly Ornstein-Uhlenbeck (Vasicek) interest rate, in annual %:
+
+        r' = r + speed * (long_run - r) / 12 + volatility * sqrt(1/12) * z
+
+    floored at zero. speed is per year; volatility is in % per sqrt(year).
+    """
+
+    def __init__(self, long_run, speed=0.5, volatility=1.0, deeming_beta=1.0):
+        self.long_run = long_run
+        self.speed = speed
+        self.volatility = volatility
+        self.deeming_beta = deeming_beta
+
+    def rates(self, rng, start, n_paths, n_months) -> np.ndarray:
+        shocks = rng.standard_normal((n_months, n_paths)) * (self.volatility * np.sqrt(1 / 12))
+        pull = self.speed / 12
+        rates = np.empty((n_months, n_paths))
+        r = np.full(n_paths, float(start))
+        for t in range(n_months):
+            r = np.maximum(r + pull * (self.long_run - r) + shocks[t], 0.0)
+            rates[t] = r
+        return rates.T
+
+
+class Bootstrap:
+    """
+    Block bootstrap of historical monthly rate changes: each path strings
+    together randomly chosen runs of `block` consecutive changes from
+    history (annual % rates, one per month), starting from the scenario's
+    rate and floored at zero.
+    """
+
+    def __init__(self, history, block=12, deeming_beta=1.0):
+        history = np.asarray(history, dtype=float)
+        if len(history) < block + 1:
+            raise ValueError(f"need more than {block} months of rate history")
+        self.changes = np.diff(history)
+        self.block = block
+        self.deeming_beta = deeming_beta
+
+    def rates(self, rng, start, n_paths, n_months) -> np.ndarray:
+        n_blocks = -(-n_months // self.block)
+        starts = rng.integers(0, len(self.changes) - self.block + 1, size=(n_paths, n_blocks))
+        idx = (starts[:, :, None] + np.arange(self.block)).reshape(n_paths, -1)[:, :n_months]
+        return np.maximum(start + np.cumsum(self.changes[idx], axis=1), 0.0)
+
+
+def load_history(filename, column="rate"):
+    """
+    Monthly rates (annual %) from a CSV with a `column` column, in file order.
+    """
+    with open(filename, newline="") as f:
+        return [float(row[column]) for row in csv.DictReader(f)]
+
+
+def rate_paths(model, rng, start, n_paths, n_months) -> dict:
+    """
+    The batch engine's rate_paths for n_paths draws of model.
+    """
+    rates = model.rates(rng, start, n_paths, n_months)
+    return {
+        "income_interest_rate": rates,
+        "deeming_shift": model.deeming_beta * (rates - start) / 100,
+    }
+
+
+class MonteCarloResult:
+    """
+    Assets of every path (paths x months) with the summaries advisers need.
+    """
+
+    def __init__(self, assets):
+        self.assets = assets
+
+    def __len__(self):
+        return len(self.assets)
+
+    def percentile_bands(self, percentiles=PERCENTILES) -> dict:
+        """
+        percentile -> assets at that percentile for each month.
+        """
+        bands = np.percentile(self.assets, percentiles, axis=0)
+        return dict(zip(percentiles, bands))
+
+    def depletion_probability(self) -> np.ndarray:
+        """
+        Share of paths whose assets have gone negative by each month.
+        """
+        return np.logical_or.accumulate(self.assets < 0, axis=1).mean(axis=0)
+
+    def summary_rows(self, percentiles=PERCENTILES) -> list:
+        bands = self.percentile_bands(percentiles)
+        depleted = self.depletion_probability()
+        return [
+            dict(
+                {"month": t + 1},
+                **{f"p{q}": round(float(bands[q][t]), 2) for q in percentiles},
+                depletion_probability=round(float(depleted[t]), 4),
+            )
+            for t in range(self.assets.shape[1])
+        ]
+
+
+def _run_chunk(args):
+    scenario, model, seed, n_paths, schedules = args
+    n_months = scenario["months_till_house_sale"] + scenario["total_months_after_sale"]
+    rng = np.random.default_rng(seed)
+    paths = rate_paths(model, rng, scenario["income_interest_rate"], n_paths, n_months)
+    result = batch_sim.simulate_finances_batch(scenario, schedules=schedules, rate_paths=paths, record=["assets"])
+    return result["assets"]
+
+
+def simulate_paths(scenario, model, n_paths, seed=0, workers=None, chunk_paths=CHUNK_PATHS, schedules=None) -> MonteCarloResult:
+    """
+    Run one scenario (simulate_finances arguments) under n_paths draws of
+    the rate model, spread over worker processes (default: all CPUs).
+    """
+    chunk_sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    jobs = [(scenario, model, s, size, schedules) for s, size in zip(seeds, chunk_sizes)]
+
+    workers = min(workers or available_cpus(), len(jobs))
+    if workers <= 1:
+        chunks = list(map(_run_chunk, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_chunk, jobs))
+    return MonteCarloResult(np.concatenate(chunks) if chunks else np.empty((0, 0)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim montecarlo",
+        description="Simulate under random interest and deeming rate paths; "
+                    "prints asset percentile bands and the probability of running out by month.",
+    )
+    agedcare_sim.add_simulation_arguments(parser)
+    parser.add_argument("--paths", type=int, default=10000, help="Number of rate paths (default 10000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default 0)")
+    parser.add_argument("--model", choices=["mean-reverting", "bootstrap"], default="mean-reverting")
+    parser.add_argument("--long-run", type=float, help="Mean-reverting: long run rate %% (default: --income-interest-rate)")
+    parser.add_argument("--speed", type=float, default=0.5, help="Mean-reverting: reversion speed per year")
+    parser.add_argument("--volatility", type=float, default=1.0, help="Mean-reverting: volatility, %% per sqrt(year)")
+    parser.add_argument("--history", help="Bootstrap: CSV of monthly rates with a 'rate' column")
+    parser.add_argument("--block", type=int, default=12, help="Bootstrap: months per resampled block")
+    parser.add_argument("--deeming-beta", type=float, default=1.0,
+                        help="Change in the deeming rates per change in the interest rate")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--csv", help="Output the monthly bands to CSV file")
+    args = agedcare_sim.parse_simulation_args(parser, argv)
+    agedcare_sim.configure_logging("INFO")
+
+    if args.model == "bootstrap":
+        if not args.history:
+            parser.error("--model bootstrap needs --history")
+        model = Bootstrap(load_history(args.history), block=args.block, deeming_beta=args.deeming_beta)
+    else:
+        long_run = args.income_interest_rate if args.long_run is None else args.long_run
+        model = MeanReverting(long_run, args.speed, args.volatility, deeming_beta=args.deeming_beta)
+
+    scenario = {name: getattr(args, name) for name in agedcare_sim.SIMULATION_PARAMS}
+    months = args.months_till_house_sale + args.total_months_after_sale
+    schedules = agedcare_sim.load_schedules(args, agedcare_sim.incr_year(args.start_date, months))
+
+    result = simulate_paths(scenario, model, args.paths, seed=args.seed, workers=args.workers, schedules=schedules)
+    rows = result.summary_rows()
+
+    headers = list(rows[0]) if rows else []
+    print(" | ".join(headers))
+    for r in rows:
+        if r["month"] % 12 == 0 or r["month"] == len(rows):
+            print(" | ".join(f"{r[h]:,}" for h in headers))
+
+    if args.csv and rows:
+        save_summary_csv(args.csv, rows)
@@ -1,4 +1,10 @@
+import logging
 from datetime import date
+from functools import lru_cache
+
+from .rule_tables import RuleTable, deeming_table
+
+logger = logging.getLogger(__name__)
 
 # Constants (Jan 2025, approximate — check Services Australia updates)
 BASIC_DAILY_FEE = 61.96  # per day
@@ -22,92 +28,95 @@ ANNUAL_CAP = 32718.57
 LIFETIME_CAP = 78524.69
 
 MAX_ACCOM_SUPP = 70.94 #maximum accommodation supplement 
+HOME_VALUE_CAP = 210555 # home value counted in the means assessment is capped
 
-def asset_test(assets: float, homeowner: bool) -> float:
-    """
-    Calculate annual asset-tested contribution for Means Tested Care Fee.
-    Thresholds/rates are as at 1 July 2025.
-    """
+# Means tested care fee tiers, as at 1 July 2025
+ASSET_TEST_TABLE = RuleTable(
+    [61_500, 206_663.20, 496_989.60],
+    [0.175, 0.01, 0.02],
+)
+
+INCOME_TIER_CAP = 27_611.65
+INCOME_FREE_AREA_MTF_SINGLE = 34_005.40
+INCOME_FREE_AREA_MTF_COUPLE = 25_984.40  # per person in a couple
 
-    print(f"asset_test: { assets } , is home owner:{ homeowner}")
-    contribution = 0.0
 
-    # Tier 1
-    if assets > 61_500:
-        tier_amount = min(assets, 206_663.20) - 61_500
-        contribution += 0.175 * tier_amount
+def _income_test_table(free_area):
+    # 50% of the first tier above the free area, 25% of the second, nothing after
+    return RuleTable(
+        [free_area, free_area + INCOME_TIER_CAP, free_area + 2 * INCOME_TIER_CAP],
+        [0.50, 0.25, 0.0],
+    )
 
-    # Tier 2
-    if assets > 206_663.20:
-        tier_amount = min(assets, 496_989.60) - 206_663.20
-        contribution += 0.01 * tier_amount
 
-    # Tier 3
-    if assets > 496_989.60:
-        tier_amount = assets - 496_989.60
-        contribution += 0.02 * tier_amount
+INCOME_TEST_TABLES = {
+    True: _income_test_table(INCOME_FREE_AREA_MTF_SINGLE),
+    False: _income_test_table(INCOME_FREE_AREA_MTF_COUPLE),
+}
 
-    return contribution
+# Deeming (Services Australia, effective 20 Sep 2025)
+DEEMING_THRESHOLD_SINGLE = 64200.0
+DEEMING_THRESHOLD_COUPLE = 106200.0  # combined
+DEEMING_LOWER_RATE = 0.0075
+DEEMING_UPPER_RATE = 0.0275
 
 
-def income_test(income: float, is_single: bool = True) -> float:
+@lru_cache(maxsize=64)
+def get_deeming_table(lower_threshold, lower_rate, upper_rate) -> RuleTable:
     """
-    Calculate annual income-tested contribution for Means Tested Care Fee.
-    Thresholds/rates are as at 1 July 2025.
+    Compiled deeming table, cached so custom thresholds/rates are only built once.
     """
+    return deeming_table(lower_threshold, lower_rate, upper_rate)
 
-    print(f"income_test: {income}, is_single:{is_single}")
 
-    if is_single:
-        free_area = 34_005.40
-    else:
-        free_area = 25_984.40  # per person in a couple
-
-    contribution = 0.0
-    excess = max(0, income - free_area)
-
-    # Tier 1
-    tier_cap = 27_611.65
-    tier_amount = min(excess, tier_cap)
-    contribution += 0.50 * tier_amount
-    excess -= tier_amount
-
-    # Tier 2
-    if excess > 0:
-        tier_amount = min(excess, tier_cap)
-        contribution += 0.25 * tier_amount
-        excess -= tier_amount
-
-    # Tier 3 (ignored, no further contribution)
+def asset_test(assets: float, homeowner: bool, rules=None) -> float:
+    """
+    Calculate annual asset-tested contribution for Means Tested Care Fee.
+    Thresholds/rates are as at 1 July 2025 unless a RateSchedule is given as rules.
+    """
 
-    return contribution
+    logger.debug("asset_test: %s, is home owner: %s", assets, homeowner)
+    table = ASSET_TEST_TABLE if rules is None else rules.asset_test_table
+    return table(assets)
 
 
+def income_test(income: float, is_single: bool = True, rules=None) -> float:
+    """
+    Calculate annual income-tested contribution for Means Tested Care Fee.
+    Thresholds/rates are as at 1 July 2025 unless a RateSchedule is given as rules.
+    """
 
+    logger.debug("income_test: %s, is_single: %s", income, is_single)
+    tables = INCOME_TEST_TABLES if rules is None else rules.income_test_tables
+    return tables[bool(is_single)](income)
 
 
-def calculate_means_tested_fee(income_yearly, assets, homeowner=True, already_paid=0):
+def calculate_means_tested_fee(income_yearly, assets, homeowner=True, already_paid=0, rules=None):
     """
     Calculate Means Tested Care Fee (MTCF).
     income_yearly: assessable annual income
     assets: assessable assets
     homeowner: bool
     already_paid: amount already paid toward lifetime cap
+    rules: RateSchedule to use instead of the module constants
     """
-    income_contrib = income_test(income_yearly)
-    print(f"income_contrib: {income_contrib}, daily:{income_contrib/364} ")
-    asset_contrib = asset_test(assets, homeowner)
-    print(f"asset_contrib: { asset_contrib }, daily:{ asset_contrib/364 } ")
+    lifetime_cap = LIFETIME_CAP if rules is None else rules.lifetime_cap
+    max_accom_supp = MAX_ACCOM_SUPP if rules is None else rules.max_accom_supp
+
+    income_contrib = income_test(income_yearly, rules=rules)
+    logger.debug("income_contrib: %s, daily: %s", income_contrib, income_contrib / 364)
+    asset_contrib = asset_test(assets, homeowner, rules=rules)
+    logger.debug("asset_contrib: %s, daily: %s", asset_contrib, asset_contrib / 364)
 
     # Combine contributions
     mtcf_annual = income_contrib + asset_contrib
 
     # Apply annual and lifetime caps
     #mtcf_annual = min(mtcf_annual, ANNUAL_CAP)
-    mtcf_total_cap = max(0, LIFETIME_CAP - already_paid)
+    mtcf_total_cap = max(0, lifetime_cap - already_paid)
     mtcf_annual = min(mtcf_annual, mtcf_total_cap)
 
-    mtcf_daily = (mtcf_annual / 365) - MAX_ACCOM_SUPP
+    mtcf_daily = (mtcf_annual / 365) - max_accom_supp
     mtcf_daily = mtcf_daily if mtcf_daily > 0 else 0
 
 
@@ -120,7 +129,7 @@ def calculate_means_tested_fee(income_yearly, assets, homeowner=True, already_pa
 
 
 # deeming calculations
-def deemed_income(assets, status='single', lower_threshold=None, lower_rate=None, upper_rate=None):
+def deemed_income(assets, status='single', lower_threshold=None, lower_rate=None, upper_rate=None, rules=None):
     """
     Calculate deemed income from financial assets using two-tier deeming.
 
@@ -130,6 +139,7 @@ def deemed_income(assets, status='single', lower_threshold=None, lower_rate=None
       lower_threshold (float): lower deeming threshold (AUD). If None, defaults to Centrelink thresholds.
       lower_rate (float): lower deeming rate (decimal). If None, defaults to Centrelink rates.
       upper_rate (float): upper deeming rate (decimal). If None, defaults to Centrelink rates.
+      rules (RateSchedule): take the default thresholds/rates from this schedule instead.
 
     Returns:
       dict with:
@@ -147,20 +157,27 @@ def deemed_income(assets, status='single', lower_threshold=None, lower_rate=None
     # Default (Services Australia, effective 20 Sep 2025):
     # Single: lower threshold 64,200 ; Couple combined: 106,200
     # Rates: lower 0.75% (0.0075), upper 2.75% (0.0275)
-    if lower_threshold is None or lower_rate is None or upper_rate is None:
-        if status.lower() == 'single':
-            lower_threshold = 64200.0 if lower_threshold is None else lower_threshold
-        else:
-            lower_threshold = 106200.0 if lower_threshold is None else lower_threshold
-        lower_rate = 0.0075 if lower_rate is None else lower_rate
-        upper_rate = 0.0275 if upper_rate is None else upper_rate
+    single = status.lower() == 'single'
+    if rules is not None and lower_threshold is None and lower_rate is None and upper_rate is None:
+        table = rules.deeming_tables['single' if single else 'couple']
+        lower_threshold = rules.deeming_threshold_single if single else rules.deeming_threshold_couple
+        lower_rate = rules.deeming_lower_rate
+        upper_rate = rules.deeming_upper_rate
+    else:
+        if lower_threshold is None:
+            lower_threshold = DEEMING_THRESHOLD_SINGLE if single else DEEMING_THRESHOLD_COUPLE
+        if lower_rate is None:
+            lower_rate = DEEMING_LOWER_RATE
+        if upper_rate is None:
+            upper_rate = DEEMING_UPPER_RATE
+        table = get_deeming_table(float(lower_threshold), float(lower_rate), float(upper_rate))
 
     assets = float(assets)
     lower_portion = min(assets, lower_threshold)
     upper_portion = max(0.0, assets - lower_threshold)
+    total_deemed = table(assets)
     deemed_lower_income = lower_portion * lower_rate
-    deemed_upper_income = upper_portion * upper_rate
-    total_deemed = deemed_lower_income + deemed_upper_income
+    deemed_upper_income = total_deemed - deemed_lower_income
 
     return {
         'assets': round(assets, 2),
@@ -176,18 +193,19 @@ def deemed_income(assets, status='single', lower_threshold=None, lower_rate=None
     }
 
 
-def calculate_mtf_daily(income_ex_deemed: float, assets_ex_home: float, homeowner: bool, home_val:float) ->float:
+def calculate_mtf_daily(income_ex_deemed: float, assets_ex_home: float, homeowner: bool, home_val:float, rules=None) ->float:
     
-    print(f"calculate_mtf_daily( income_ex_deemed:{income_ex_deemed}, assets_ex_home:{assets_ex_home}, homeowner:{homeowner}, home_val:{home_val}")
-    deemed_out = deemed_income(assets_ex_home + min(home_val,210555), status='single')#,upper_rate=0.0075)
-    print(deemed_out)
-
-    result = calculate_means_tested_fee(income_ex_deemed+deemed_out['deemed_income'], deemed_out['assets'], homeowner, already_paid=0)
-    print(f"Basic daily fee: ${result['basic_daily_fee']:.2f}")
-    print(f"Means tested fee (daily): ${result['means_tested_fee_daily']:.2f}")
-    print(f"Total daily fee: ${result['total_daily_fee']:.2f}")
-    print(f"Annual MTCF payable: ${result['annual_means_tested_fee']:.2f}")
-    print(f"(As of {date.today()})")
+    logger.debug("calculate_mtf_daily(income_ex_deemed: %s, assets_ex_home: %s, homeowner: %s, home_val: %s)",
+                 income_ex_deemed, assets_ex_home, homeowner, home_val)
+    home_value_cap = HOME_VALUE_CAP if rules is None else rules.home_value_cap
+    deemed_out = deemed_income(assets_ex_home + min(home_val,home_value_cap), status='single', rules=rules)#,upper_rate=0.0075)
+    logger.debug("%s", deemed_out)
+
+    result = calculate_means_tested_fee(income_ex_deemed+deemed_out['deemed_income'], deemed_out['assets'], homeowner, already_paid=0, rules=rules)
+    logger.debug(
+        "Basic daily fee: $%.2f, Means tested fee (daily): $%.2f, Total daily fee: $%.2f, Annual MTCF payable: $%.2f",
+        result['basic_daily_fee'], result['means_tested_fee_daily'], result['total_daily_fee'], result['annual_means_tested_fee'],
+    )
 
     return result['means_tested_fee_daily']
 
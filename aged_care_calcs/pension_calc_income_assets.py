@@ -1,5 +1,7 @@
 from datetime import date
 
+from .rule_tables import taper_table
+
 # Constants (as of Jan 2025) – adjust if rules change
 MAX_PENSION_SINGLE = 1116.30  # per fortnight (base rate + supplements)
 INCOME_FREE_AREA_SINGLE = 204.00  # per fortnight
@@ -9,36 +11,39 @@ ASSETS_THRESHOLD_HOME_SINGLE = 314000  # homeowner, single
 ASSETS_THRESHOLD_NONHOME_SINGLE = 566000  # non-homeowner, single
 ASSETS_TAPER = 3.00  # reduction per $1000 over threshold (per fortnight)
 
-def calculate_income_test(income):
+INCOME_TEST_TABLE = taper_table(MAX_PENSION_SINGLE, INCOME_FREE_AREA_SINGLE, INCOME_TAPER)
+ASSETS_TEST_TABLES = {
+    True: taper_table(MAX_PENSION_SINGLE, ASSETS_THRESHOLD_HOME_SINGLE, ASSETS_TAPER / 1000),
+    False: taper_table(MAX_PENSION_SINGLE, ASSETS_THRESHOLD_NONHOME_SINGLE, ASSETS_TAPER / 1000),
+}
+
+def calculate_income_test(income, rules=None):
     """
     Calculate pension based on income test.
     """
-    if income <= INCOME_FREE_AREA_SINGLE:
-        return MAX_PENSION_SINGLE
-    excess = income - INCOME_FREE_AREA_SINGLE
-    reduction = excess * INCOME_TAPER
-    return max(0, MAX_PENSION_SINGLE - reduction)
+    table = INCOME_TEST_TABLE if rules is None else rules.pension_income_table
+    return table(income)
 
-def calculate_assets_test(assets, homeowner=True):
+def calculate_assets_test(assets, homeowner=True, rules=None):
     """
     Calculate pension based on assets test.
     """
-    threshold = ASSETS_THRESHOLD_HOME_SINGLE if homeowner else ASSETS_THRESHOLD_NONHOME_SINGLE
-    if assets <= threshold:
-        return MAX_PENSION_SINGLE
-    excess = assets - threshold
-    reduction = (excess / 1000) * ASSETS_TAPER
-    return max(0, MAX_PENSION_SINGLE - reduction)
-
-def calculate_age_pension(income, assets, homeowner=True)->float:
+    tables = ASSETS_TEST_TABLES if rules is None else rules.pension_assets_tables
+    return tables[bool(homeowner)](assets)
+
+def calculate_age_pension(income, assets, homeowner=True, rules=None)->float:
     """
     Returns the pension payable per fortnight.
-    Takes other income as income
+    Takes other income as income. income and assets may also be arrays.
+    rules is an optional RateSchedule to use instead of the module constants.
     """
-    pension_income_test = calculate_income_test(income)
-    pension_assets_test = calculate_assets_test(assets, homeowner)
-    pension = min(pension_income_test, pension_assets_test)
-    return pension
+    pension_income_test = calculate_income_test(income, rules)
+    pension_assets_test = calculate_assets_test(assets, homeowner, rules)
+    if isinstance(pension_income_test, float) and isinstance(pension_assets_test, float):
+        return min(pension_income_test, pension_assets_test)
+    import numpy as np
+
+    return np.minimum(pension_income_test, pension_assets_test)
 
 # Example usage:
 if __name__ == "__main__":
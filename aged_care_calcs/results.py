@@ -0,0 +1,279 @@
+"""
+Columnar simulation results.
+
+SimulationResult keeps each output column in a typed array (array.array,
+viewable as NumPy without copying) instead of a list of per-month dicts.
+Values are stored unrounded; rounding to cents happens only when rows are
+presented (row views, CSV/Excel, the CLI table). Indexing or iterating
+gives lightweight read-only row mappings, so code written against the old
+list-of-dicts return value keeps working. NumPy is imported only by
+column() and the reductions built on it, so a scalar run that just prints
+a summary never loads it.
+"""
+import json
+import math
+import sys
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping
+
+# Order of the columns (and of the keys in each row)
+ROW_COLUMNS = [
+    "month",
+    "year",
+    "assets",
+    "interest_income",
+    "pension_income",
+    "fees_total",
+    "dap_fee",
+    "mtf",
+    "annual_mtf_paid",
+    "lifetime_means_paid",
+    "house_contribution",
+    "rad_paid",
+]
+INT_COLUMNS = ("month", "year")
+
+# One month as produced by simulate_finances_iter (raw values)
+MonthRow = namedtuple("MonthRow", ROW_COLUMNS)
+
+_FLOAT_POSITIONS = tuple(name not in INT_COLUMNS for name in ROW_COLUMNS)
+
+
+def present_values(row, rounding=2) -> list:
+    """
+    A MonthRow's values as a list, floats rounded for presentation.
+    """
+    if rounding is None:
+        return [float(v) if is_float else v for v, is_float in zip(row, _FLOAT_POSITIONS)]
+    return [round(float(v), rounding) if is_float else v for v, is_float in zip(row, _FLOAT_POSITIONS)]
+
+
+def _typecode(name):
+    return "q" if name in INT_COLUMNS else "d"
+
+
+class RowView(Mapping):
+    """
+    Read-only mapping over one month of a SimulationResult.
+    """
+
+    __slots__ = ("_result", "_index")
+
+    def __init__(self, result, index):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._result._present(key, self._result.columns[key][self._index])
+
+    def __iter__(self):
+        return iter(self._result.columns)
+
+    def __len__(self):
+        return len(self._result.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SimulationResult:
+    """
+    One simulation's months as typed columns.
+
+    rounding: decimal places applied when values are presented
+              (None presents the raw floats)
+    """
+
+    def __init__(self, columns=None, rounding=2):
+        if columns is None:
+            columns = {name: array(_typecode(name)) for name in ROW_COLUMNS}
+        else:
+            columns = {
+                name: values if isinstance(values, array) else array(_typecode(name), values)
+                for name, values in columns.items()
+            }
+        self.columns = columns
+        self.rounding = rounding
+        self._appenders = tuple(col.append for col in columns.values())
+
+    @classmethod
+    def from_rows(cls, rows, rounding=2) -> "SimulationResult":
+        """
+        Build from row mappings (e.g. the old list-of-dicts form).
+        """
+        result = cls(rounding=rounding)
+        for row in rows:
+            result.append(*(row[name] for name in ROW_COLUMNS))
+        return result
+
+    @classmethod
+    def from_months(cls, months, rounding=2) -> "SimulationResult":
+        """
+        Collect an iterable of MonthRows (e.g. simulate_finances_iter).
+        """
+        result = cls(rounding=rounding)
+        for row in months:
+            result.append(*row)
+        return result
+
+    def append(self, *values):
+        """
+        Add one month; values in ROW_COLUMNS order.
+        """
+        for add, value in zip(self._appenders, values):
+            add(value)
+
+    def _present(self, name, value):
+        if name in INT_COLUMNS or self.rounding is None:
+            return value
+        return round(value, self.rounding)
+
+    # --- row access (backward compatible with the list of dicts) ---
+
+    def fieldnames(self) -> list:
+        return list(self.columns)
+
+    def __len__(self):
+        return len(self.columns["month"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("simulation month out of range")
+        return RowView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield RowView(self, i)
+
+    def __eq__(self, other):
+        if isinstance(other, SimulationResult):
+            return self.columns == other.columns
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SimulationResult({len(self)} months)"
+
+    def iter_values(self, rounding=...):
+        """
+        Yield each month as a list of values in column order, rounded for
+        presentation (pass rounding=None for raw values).
+        """
+        if rounding is ...:
+            rounding = self.rounding
+        names = list(self.columns)
+        float_cols = [rounding is not None and name not in INT_COLUMNS for name in names]
+        for values in zip(*self.columns.values()):
+            yield [round(v, rounding) if is_float else v for v, is_float in zip(values, float_cols)]
+
+    def as_columns(self, rounding=...) -> dict:
+        """
+        Column name -> list of values, rounded for presentation (pass
+        rounding=None for raw values), e.g. for columnar JSON.
+        """
+        if rounding is ...:
+            rounding = self.rounding
+        return {
+            name: col.tolist() if rounding is None or name in INT_COLUMNS else [round(v, rounding) for v in col]
+            for name, col in self.columns.items()
+        }
+
+    def to_dicts(self) -> list:
+        names = list(self.columns)
+        return [dict(zip(names, values)) for values in self.iter_values()]
+
+    # --- binary form ---
+
+    def to_bytes(self) -> bytes:
+        """
+        A JSON header line (column names and typecodes, months, rounding)
+        then each column's raw little-endian values; see from_bytes.
+        Unlike a pickle, reading it back runs no code.
+        """
+        header = {
+            "months": len(self),
+            "rounding": self.rounding,
+            "columns": [[name, col.typecode] for name, col in self.columns.items()],
+        }
+        parts = [json.dumps(header).encode(), b"\n"]
+        for col in self.columns.values():
+            if sys.byteorder == "big":
+                col = array(col.typecode, col)
+                col.byteswap()
+            parts.append(col.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data) -> "SimulationResult":
+        """
+        Rebuild a result from to_bytes; raises ValueError if data is malformed.
+        """
+        data = memoryview(data)
+        end = bytes(data[:4096]).find(b"\n")
+        if end < 0:
+            raise ValueError("no result header")
+        try:
+            header = json.loads(bytes(data[:end]))
+            months = int(header["months"])
+            names = [(str(name), typecode) for name, typecode in header["columns"]]
+        except (TypeError, KeyError, ValueError) as e:
+            raise ValueError(f"malformed result header: {e}") from None
+        if any(typecode not in ("q", "d") for _, typecode in names):
+            raise ValueError("result columns must be int64 or float64")
+        if len(data) != end + 1 + 8 * months * len(names):
+            raise ValueError("result data does not match its header")
+        columns = {}
+        offset = end + 1
+        for name, typecode in names:
+            col = array(typecode)
+            col.frombytes(data[offset:offset + 8 * months])
+            if sys.byteorder == "big":
+                col.byteswap()
+            columns[name] = col
+            offset += 8 * months
+        return cls(columns, rounding=header.get("rounding", 2))
+
+    # --- column access and reductions ---
+
+    def column(self, name) -> "numpy.ndarray":
+        """
+        Zero-copy NumPy view of one column (raw values).
+        """
+        import numpy as np
+
+        col = self.columns[name]
+        return np.frombuffer(col, dtype=np.int64 if col.typecode == "q" else np.float64)
+
+    def total(self, name) -> float:
+        # correctly rounded, so it does not depend on the summation order
+        return math.fsum(self.columns[name]) if len(self) else 0.0
+
+    def min(self, name="assets"):
+        """
+        Lowest value of a column, or None for an empty result (like final()).
+        """
+        return float(min(self.columns[name])) if len(self) else None
+
+    def final(self, name="assets"):
+        return self.columns[name][-1] if len(self) else None
+
+    def first_month_below(self, threshold=0.0, name="assets"):
+        """
+        Month number of the first month whose value is below threshold, or None.
+        """
+        for i, value in enumerate(self.columns[name]):
+            if value < threshold:
+                return int(self.columns["month"][i])
+        return None
+
+    def depletion_month(self):
+        """
+        First month in which assets drop below zero, or None.
+        """
+        return self.first_month_below(0.0, "assets")
@@ -0,0 +1,118 @@
+"""
+Piecewise-linear rule tables for the means, deeming and pension tests.
+
+A table is a list of tier start points (breakpoints) and the rate that
+applies from each breakpoint up to the next one. It is compiled once into
+the accumulated value at every breakpoint, so evaluating it is a sorted
+lookup plus one multiply-add whether the input is a single float (bisect
+on plain tuples) or a NumPy array (searchsorted). NumPy is only imported,
+and the arrays only built, the first time a table is given an array, so
+the scalar simulation starts without it.
+"""
+from bisect import bisect_right
+
+
+class RuleTable:
+    """
+    f(x) = base + sum over tiers of rate * (portion of x inside the tier),
+    optionally clipped to [floor, cap].
+
+    breakpoints: ascending tier start points
+    rates: rate applying from breakpoints[i] up to breakpoints[i + 1]
+           (the last rate is open ended)
+    base: value at (and below) breakpoints[0]
+    extend_below: apply rates[0] below breakpoints[0] too, instead of
+                  holding the value at base
+    """
+
+    __slots__ = (
+        "breakpoints", "rates", "base", "floor", "cap", "extend_below",
+        "_at_breakpoint", "_arrays",
+    )
+
+    def __init__(self, breakpoints, rates, base=0.0, floor=None, cap=None, extend_below=False):
+        if len(breakpoints) != len(rates) or not len(rates):
+            raise ValueError("need one rate per breakpoint")
+        self.breakpoints = tuple(float(b) for b in breakpoints)
+        self.rates = tuple(float(r) for r in rates)
+        if any(b >= after for b, after in zip(self.breakpoints, self.breakpoints[1:])):
+            raise ValueError("breakpoints must be strictly increasing")
+        self.base = float(base)
+        self.floor = floor
+        self.cap = cap
+        self.extend_below = extend_below
+
+        # value at each breakpoint: the base plus every full tier below it, summed in order
+        at_breakpoint = [self.base]
+        accumulated = 0.0
+        for b, after, rate in zip(self.breakpoints, self.breakpoints[1:], self.rates):
+            accumulated += (after - b) * rate
+            at_breakpoint.append(self.base + accumulated)
+        self._at_breakpoint = tuple(at_breakpoint)
+        self._arrays = None
+
+    def arrays(self) -> tuple:
+        """
+        (breakpoints, rates, value at each breakpoint) as NumPy arrays, built on first use.
+        """
+        if self._arrays is None:
+            import numpy as np
+
+            self._arrays = tuple(np.array(v, dtype=float) for v in (self.breakpoints, self.rates, self._at_breakpoint))
+        return self._arrays
+
+    def __call__(self, x):
+        if type(x) is float or type(x) is int:
+            return self.scalar(x)
+        import numpy as np
+
+        breakpoints, rates, at_breakpoint = self.arrays()
+        values = np.asarray(x, dtype=float)
+        tier = np.searchsorted(breakpoints, values, side="right") - 1
+        below = tier < 0
+        tier = np.maximum(tier, 0)
+        out = at_breakpoint[tier] + rates[tier] * (values - breakpoints[tier])
+        if not self.extend_below:
+            out = np.where(below, self.base, out)
+        if self.floor is not None or self.cap is not None:
+            out = np.clip(out, self.floor, self.cap)
+        if out.ndim == 0:
+            return float(out)
+        return out
+
+    def scalar(self, x: float) -> float:
+        """
+        Evaluate a single value: the same lookup as __call__, via bisect on the compiled tuples.
+        """
+        breakpoints, rates, at_breakpoint = self.breakpoints, self.rates, self._at_breakpoint
+        tier = bisect_right(breakpoints, x) - 1
+        if tier < 0:
+            if not self.extend_below:
+                out = self.base
+            else:
+                out = at_breakpoint[0] + rates[0] * (x - breakpoints[0])
+        else:
+            out = at_breakpoint[tier] + rates[tier] * (x - breakpoints[tier])
+        if self.floor is not None and out < self.floor:
+            out = float(self.floor)
+        if self.cap is not None and out > self.cap:
+            out = float(self.cap)
+        return out
+
+    def __repr__(self):
+        tiers = ", ".join(f"{b:,.2f}@{r:g}" for b, r in zip(self.breakpoints, self.rates))
+        return f"RuleTable(base={self.base:g}, tiers=[{tiers}], floor={self.floor}, cap={self.cap})"
+
+
+def deeming_table(threshold, lower_rate, upper_rate) -> RuleTable:
+    """
+    Two-tier deeming: lower_rate up to threshold, upper_rate above it.
+    """
+    return RuleTable([0.0, threshold], [lower_rate, upper_rate], extend_below=True)
+
+
+def taper_table(maximum, free_area, taper) -> RuleTable:
+    """
+    Payment of maximum reduced by taper per $1 above free_area, never below zero.
+    """
+    return RuleTable([free_area], [-taper], base=maximum, floor=0.0)
@@ -0,0 +1,133 @@
+"""
+Scenario parsing and validation shared by the web app, the JSON API and the
+batch CLI.
+
+A raw scenario is a mapping of simulate_finances argument names (dashed, as
+in the form and CLI flags, or underscored) to values that may still be
+strings, e.g. a form post, a CSV row or a JSON object. coerce_scenario turns
+it into simulate_finances keyword arguments, reporting every bad field at
+once rather than stopping at the first. Values must also be in range
+(FIELD_LIMITS, MAX_HORIZON_MONTHS): finite, no negative amounts or month
+counts, and a horizon the engines can run in reasonable time.
+"""
+import datetime
+import math
+
+from . import agedcare_sim
+
+# argument name -> "float", "int" or "date", from the CLI flag definitions
+FIELD_TYPES = {
+    flag[2:].replace("-", "_"): arg_type.__name__ if arg_type in (float, int) else "date"
+    for flag, arg_type, _ in agedcare_sim.SIMULATION_ARGUMENTS
+}
+
+# (lowest, highest) allowed, None for no limit; fields not listed must be >= 0
+FIELD_LIMITS = {
+    "income_interest_rate": (None, None),
+    "dap_percentage": (0, 100),
+    "asset_interest_percentage": (0, 100),
+}
+# months_till_house_sale + total_months_after_sale
+MAX_HORIZON_MONTHS = 1200
+
+
+class ScenarioError(ValueError):
+    """
+    A scenario with missing, unknown or malformed fields; errors maps each
+    field name to what is wrong with it.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {message}" for name, message in errors.items()))
+
+
+def _coerce(kind, value):
+    if kind == "date":
+        if isinstance(value, datetime.date):
+            return value
+        return datetime.datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    if isinstance(value, str):
+        value = value.strip()
+    if kind == "int":
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(value)
+        return int(value)
+    return float(value)
+
+
+def check_scenario(args) -> dict:
+    """
+    {field: message} for every out of range value in (possibly partial)
+    simulate_finances arguments; empty if all are fine.
+    """
+    errors = {}
+    for name, value in args.items():
+        if FIELD_TYPES.get(name) not in ("float", "int"):
+            continue
+        if not math.isfinite(value):
+            errors[name] = f"must be a finite number, got {value!r}"
+            continue
+        low, high = FIELD_LIMITS.get(name, (0, None))
+        if low is not None and value < low:
+            errors[name] = f"must be at least {low}, got {value!r}"
+        elif high is not None and value > high:
+            errors[name] = f"must be at most {high}, got {value!r}"
+    months = [args.get("months_till_house_sale"), args.get("total_months_after_sale")]
+    if None not in months and not errors.keys() & {"months_till_house_sale", "total_months_after_sale"}:
+        if sum(months) > MAX_HORIZON_MONTHS:
+            errors["total_months_after_sale"] = (
+                f"months_till_house_sale + total_months_after_sale must be at most {MAX_HORIZON_MONTHS}, "
+                f"got {sum(months)}"
+            )
+    return errors
+
+
+def coerce_scenario(raw, optional=(), allow_extra=False) -> dict:
+    """
+    simulate_finances keyword arguments from a raw scenario. Fields named in
+    optional may be left out; unknown fields are errors unless allow_extra,
+    in which case they are dropped. Raises ScenarioError, also for values
+    out of range (check_scenario).
+    """
+    args = {}
+    errors = {}
+    for key, value in raw.items():
+        name = key.strip().replace("-", "_")
+        kind = FIELD_TYPES.get(name)
+        if kind is None:
+            if not allow_extra:
+                errors[name] = "unknown field"
+            continue
+        if value is None or value == "":
+            continue
+        try:
+            args[name] = _coerce(kind, value)
+        except (TypeError, ValueError):
+            expected = "YYYY-MM-DD date" if kind == "date" else f"{kind} value"
+            errors[name] = f"expected a {expected}, got {value!r}"
+    for name in FIELD_TYPES:
+        if name not in args and name not in errors and name not in optional:
+            errors[name] = "missing"
+    errors.update(check_scenario(args))
+    if errors:
+        raise ScenarioError(errors)
+    return args
+
+
+def validate_scenarios(raws, optional=(), allow_extra=False):
+    """
+    Coerce a list of raw scenarios. Returns (scenarios, errors) where errors
+    lists {"index": i, "errors": {field: message}} for every bad scenario.
+    """
+    scenarios = []
+    errors = []
+    for i, raw in enumerate(raws):
+        if not isinstance(raw, dict):
+            errors.append({"index": i, "errors": {"scenario": "expected an object"}})
+            continue
+        try:
+            scenarios.append(coerce_scenario(raw, optional=optional, allow_extra=allow_extra))
+        except ScenarioError as e:
+            errors.append({"index": i, "errors": e.errors})
+    return scenarios, errors
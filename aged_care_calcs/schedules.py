@@ -0,0 +1,297 @@
+"""
+Effective-dated rate schedules.
+
+Each RateSchedule is one snapshot of the thresholds, tapers and caps used by
+mtf_calc and pension_calc_income_assets, valid from its effective date
+until the next schedule in the store. A simulation asks the store for a
+month -> schedule index array once per run and then looks the rules up by
+index, so there is no date arithmetic inside the month loop.
+
+Thresholds move on three dates a year. When projecting beyond the last
+known schedule:
+  20 March / 20 September: pension rate and the aged care fee thresholds
+                           and caps (half of the annual indexation each)
+  1 July: pension means test thresholds and deeming thresholds
+"""
+import dataclasses
+import datetime
+import hashlib
+import json
+from bisect import bisect_right
+from functools import cached_property
+
+from . import mtf_calc
+from . import pension_calc_income_assets
+from .rule_tables import RuleTable, deeming_table, taper_table
+
+
+@dataclasses.dataclass(frozen=True)
+class RateSchedule:
+    effective_from: datetime.date
+
+    # means tested care fee
+    annual_cap: float
+    lifetime_cap: float
+    max_accom_supp: float
+    home_value_cap: float
+    mtf_asset_breakpoints: tuple
+    mtf_asset_rates: tuple
+    mtf_income_free_area_single: float
+    mtf_income_free_area_couple: float
+    mtf_income_tier_cap: float
+
+    # deeming
+    deeming_threshold_single: float
+    deeming_threshold_couple: float
+    deeming_lower_rate: float
+    deeming_upper_rate: float
+
+    # age pension (per fortnight)
+    max_pension_single: float
+    pension_income_free_area: float
+    pension_income_taper: float
+    pension_assets_threshold_home: float
+    pension_assets_threshold_nonhome: float
+    pension_assets_taper: float  # per $1000 over the threshold
+
+    @cached_property
+    def asset_test_table(self) -> RuleTable:
+        return RuleTable(self.mtf_asset_breakpoints, self.mtf_asset_rates)
+
+    @cached_property
+    def income_test_tables(self) -> dict:
+        def table(free_area):
+            cap = self.mtf_income_tier_cap
+            return RuleTable([free_area, free_area + cap, free_area + 2 * cap], [0.50, 0.25, 0.0])
+
+        return {
+            True: table(self.mtf_income_free_area_single),
+            False: table(self.mtf_income_free_area_couple),
+        }
+
+    @cached_property
+    def deeming_tables(self) -> dict:
+        return {
+            "single": deeming_table(self.deeming_threshold_single, self.deeming_lower_rate, self.deeming_upper_rate),
+            "couple": deeming_table(self.deeming_threshold_couple, self.deeming_lower_rate, self.deeming_upper_rate),
+        }
+
+    @cached_property
+    def pension_income_table(self) -> RuleTable:
+        return taper_table(self.max_pension_single, self.pension_income_free_area, self.pension_income_taper)
+
+    @cached_property
+    def pension_assets_tables(self) -> dict:
+        taper = self.pension_assets_taper / 1000
+        return {
+            True: taper_table(self.max_pension_single, self.pension_assets_threshold_home, taper),
+            False: taper_table(self.max_pension_single, self.pension_assets_threshold_nonhome, taper),
+        }
+
+    def to_dict(self) -> dict:
+        d = {f.name: getattr(self, f.name) for f in dataclasses.fields(self)}
+        d["effective_from"] = self.effective_from.isoformat()
+        d["mtf_asset_breakpoints"] = list(self.mtf_asset_breakpoints)
+        d["mtf_asset_rates"] = list(self.mtf_asset_rates)
+        return d
+
+    @classmethod
+    def from_dict(cls, d) -> "RateSchedule":
+        d = dict(d)
+        d["effective_from"] = datetime.date.fromisoformat(d["effective_from"])
+        d["mtf_asset_breakpoints"] = tuple(d["mtf_asset_breakpoints"])
+        d["mtf_asset_rates"] = tuple(d["mtf_asset_rates"])
+        return cls(**d)
+
+    def indexed(self, effective_from, factor, fields) -> "RateSchedule":
+        """
+        Copy of this schedule effective from effective_from with the dollar
+        amounts in fields multiplied by factor (rounded to cents).
+        """
+        changes = {"effective_from": effective_from}
+        for name in fields:
+            value = getattr(self, name)
+            if isinstance(value, tuple):
+                changes[name] = tuple(round(v * factor, 2) for v in value)
+            else:
+                changes[name] = round(value * factor, 2)
+        return dataclasses.replace(self, **changes)
+
+
+# Dollar amounts moved on each indexation date (month, day)
+HALF_YEARLY_FIELDS = (
+    "annual_cap",
+    "lifetime_cap",
+    "max_accom_supp",
+    "home_value_cap",
+    "mtf_asset_breakpoints",
+    "mtf_income_free_area_single",
+    "mtf_income_free_area_couple",
+    "mtf_income_tier_cap",
+    "max_pension_single",
+)
+YEARLY_FIELDS = (
+    "deeming_threshold_single",
+    "deeming_threshold_couple",
+    "pension_income_free_area",
+    "pension_assets_threshold_home",
+    "pension_assets_threshold_nonhome",
+)
+INDEXATION_DATES = [
+    ((3, 20), HALF_YEARLY_FIELDS, 0.5),
+    ((7, 1), YEARLY_FIELDS, 1.0),
+    ((9, 20), HALF_YEARLY_FIELDS, 0.5),
+]
+
+
+def _date_key(year, month, day):
+    # sortable integer key; days past the end of a month still order correctly
+    return year * 10000 + month * 100 + day
+
+
+class ScheduleStore:
+    """
+    Ordered collection of RateSchedules, indexed by effective date.
+    as_at is the date the latest schedule's figures are known to be current
+    for; projection starts from there (default: its effective date).
+    """
+
+    def __init__(self, schedules, as_at=None):
+        self.schedules = sorted(schedules, key=lambda s: s.effective_from)
+        if not self.schedules:
+            raise ValueError("a schedule store needs at least one schedule")
+        dates = [s.effective_from for s in self.schedules]
+        if len(set(dates)) != len(dates):
+            raise ValueError("two schedules share an effective date")
+        self.as_at = max(as_at or dates[-1], dates[-1])
+        self._keys = [_date_key(d.year, d.month, d.day) for d in dates]
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def __getitem__(self, idx) -> RateSchedule:
+        return self.schedules[idx]
+
+    @cached_property
+    def annual_caps(self):
+        """
+        Each schedule's annual cap as an array, for the batch engine's month loop.
+        """
+        import numpy as np
+
+        return np.array([s.annual_cap for s in self.schedules])
+
+    @cached_property
+    def version(self) -> str:
+        """
+        Short content hash, changes whenever any schedule changes.
+        """
+        blob = json.dumps([s.to_dict() for s in self.schedules], sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+    def at(self, when: datetime.date) -> RateSchedule:
+        i = bisect_right([s.effective_from for s in self.schedules], when) - 1
+        if i < 0:
+            raise ValueError(f"no rate schedule in force on {when}")
+        return self.schedules[i]
+
+    def month_index(self, start_years, start_months, start_days, n_months):
+        """
+        Schedule index for each simulation month, shape (len(start_years), n_months).
+        Month m is start date + m calendar months.
+        """
+        import numpy as np
+
+        start_years = np.asarray(start_years, dtype=np.int64)[:, None]
+        start_months = np.asarray(start_months, dtype=np.int64)[:, None]
+        start_days = np.asarray(start_days, dtype=np.int64)[:, None]
+        total = start_months - 1 + np.arange(n_months)[None, :]
+        keys = _date_key(start_years + total // 12, total % 12 + 1, start_days)
+        idx = np.searchsorted(np.array(self._keys, dtype=np.int64), keys, side="right") - 1
+        if idx.size and idx.min() < 0:
+            raise ValueError("simulation starts before the earliest rate schedule")
+        return idx
+
+    def index_for_months(self, start_date: datetime.date, n_months: int):
+        """
+        Schedule index for each month of a single simulation, as a list
+        (month_index without NumPy).
+        """
+        plan = []
+        for m in range(n_months):
+            total = start_date.month - 1 + m
+            key = _date_key(start_date.year + total // 12, total % 12 + 1, start_date.day)
+            plan.append(bisect_right(self._keys, key) - 1)
+        if plan and plan[0] < 0:
+            raise ValueError("simulation starts before the earliest rate schedule")
+        return plan
+
+    def projected(self, until: datetime.date, annual_rate: float) -> "ScheduleStore":
+        """
+        New store with the last schedule rolled forward on each indexation
+        date up to until, at annual_rate (e.g. 0.03 for 3% a year).
+        """
+        schedules = list(self.schedules)
+        last = schedules[-1]
+        year = self.as_at.year
+        while True:
+            for (month, day), fields, share in INDEXATION_DATES:
+                when = datetime.date(year, month, day)
+                if when <= self.as_at:
+                    continue
+                if when > until:
+                    return ScheduleStore(schedules)
+                factor = (1 + annual_rate) ** share
+                last = last.indexed(when, factor, fields)
+                schedules.append(last)
+            year += 1
+
+    def to_json(self) -> str:
+        return json.dumps([s.to_dict() for s in self.schedules], indent=2)
+
+    @classmethod
+    def from_json(cls, text) -> "ScheduleStore":
+        return cls(RateSchedule.from_dict(d) for d in json.loads(text))
+
+    @classmethod
+    def load(cls, filename) -> "ScheduleStore":
+        with open(filename) as f:
+            return cls.from_json(f.read())
+
+
+def _current_schedule() -> RateSchedule:
+    """
+    The snapshot hard-coded in mtf_calc and pension_calc_income_assets.
+    """
+    p = pension_calc_income_assets
+    return RateSchedule(
+        effective_from=datetime.date(1900, 1, 1),
+        annual_cap=mtf_calc.ANNUAL_CAP,
+        lifetime_cap=mtf_calc.LIFETIME_CAP,
+        max_accom_supp=mtf_calc.MAX_ACCOM_SUPP,
+        home_value_cap=mtf_calc.HOME_VALUE_CAP,
+        mtf_asset_breakpoints=tuple(float(b) for b in mtf_calc.ASSET_TEST_TABLE.breakpoints),
+        mtf_asset_rates=tuple(float(r) for r in mtf_calc.ASSET_TEST_TABLE.rates),
+        mtf_income_free_area_single=mtf_calc.INCOME_FREE_AREA_MTF_SINGLE,
+        mtf_income_free_area_couple=mtf_calc.INCOME_FREE_AREA_MTF_COUPLE,
+        mtf_income_tier_cap=mtf_calc.INCOME_TIER_CAP,
+        deeming_threshold_single=mtf_calc.DEEMING_THRESHOLD_SINGLE,
+        deeming_threshold_couple=mtf_calc.DEEMING_THRESHOLD_COUPLE,
+        deeming_lower_rate=mtf_calc.DEEMING_LOWER_RATE,
+        deeming_upper_rate=mtf_calc.DEEMING_UPPER_RATE,
+        max_pension_single=p.MAX_PENSION_SINGLE,
+        pension_income_free_area=p.INCOME_FREE_AREA_SINGLE,
+        pension_income_taper=p.INCOME_TAPER,
+        pension_assets_threshold_home=p.ASSETS_THRESHOLD_HOME_SINGLE,
+        pension_assets_threshold_nonhome=p.ASSETS_THRESHOLD_NONHOME_SINGLE,
+        pension_assets_taper=p.ASSETS_TAPER,
+    )
+
+
+CURRENT_SCHEDULE = _current_schedule()
+
+# latest change reflected in the hard-coded snapshot (deeming rates, 20 Sep 2025)
+CURRENT_SCHEDULE_AS_AT = datetime.date(2025, 9, 20)
+
+# Used when a simulation is not given a store: the current snapshot applies to every month
+DEFAULT_SCHEDULES = ScheduleStore([CURRENT_SCHEDULE], as_at=CURRENT_SCHEDULE_AS_AT)
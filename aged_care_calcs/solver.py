@@ -0,0 +1,203 @@
+"""
+Solvers for the two questions advisers ask of a scenario:
+
+  * max_affordable_rad: the largest RAD that still leaves the household's
+    assets non-negative for N years.
+  * depletion_month: the month in which the money runs out.
+
+max_affordable_rad brackets the answer and bisects on the RAD. Each probe
+only simulates the first N years and stops at the first negative month,
+fast-forwarding steady stretches (see fast_forward). Only when no DAP is
+charged do the pre-sale months not depend on the RAD; then they are
+simulated once and every probe resumes from that shared state at the sale.
+With a DAP (the usual case, e.g. the default 7%) the DAP paid before the
+sale feeds the means test nonlinearly, so each probe simulates those months
+itself.
+
+The *_batch versions answer the same questions for a whole client list with
+the vectorised batch engine, bisecting every client's RAD at once.
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim solve --years 10 --initial-assets ... \\
+        (without --years, prints the depletion month for --rad)
+"""
+import argparse
+import math
+
+import numpy as np
+
+from . import agedcare_sim
+from . import batch_sim
+from . import fast_forward
+from .scenarios import MAX_HORIZON_MONTHS
+
+# no RAD is searched above this
+MAX_RAD = 1e12
+
+
+def _initial_bracket(scenario):
+    # more than this can never be paid without going negative at the sale
+    return max(scenario["initial_assets"] + scenario["house_value"], 1.0)
+
+
+class _Prober:
+    """
+    Answers "does this RAD last?" for one scenario cut to the horizon.
+    pre_sale is the shared checkpoint at the sale when no DAP is charged,
+    False if the money runs out before the sale whatever the RAD, and None
+    when every probe has to run from the start.
+    """
+
+    def __init__(self, scenario, schedules=None):
+        self.scenario = scenario
+        self.schedules = schedules
+        self.sale = scenario["months_till_house_sale"]
+        self.pre_sale = None
+        if not scenario["dap_percentage"] and self.sale:
+            sim = agedcare_sim.Simulation(**dict(scenario, rad=0.0), schedules=schedules)
+            while sim.month < self.sale and sim.state.assets >= 0:
+                if not fast_forward.fast_forward(sim, stop_below=0.0):
+                    sim.step()
+            if sim.month == self.sale and sim.state.assets >= 0:
+                self.pre_sale = sim.checkpoint()
+            else:
+                # depleted before the sale whatever the RAD
+                self.pre_sale = False
+
+    def lasts(self, rad) -> bool:
+        if self.pre_sale is False:
+            return False
+        sim = agedcare_sim.Simulation(**dict(self.scenario, rad=rad), schedules=self.schedules)
+        if self.pre_sale is not None:
+            sim.restore(self.pre_sale)
+        fast_forward.run(sim, stop_below=0.0)
+        return sim.state.assets >= 0
+
+
+def max_affordable_rad(scenario, years, tolerance=1.0, schedules=None):
+    """
+    Largest RAD (within tolerance dollars) for which the scenario's assets
+    stay non-negative for the first `years` years. scenario holds the
+    simulate_finances arguments; its rad and horizon are ignored.
+
+    Returns None if the money runs out within the period even with no RAD, and math.inf if
+    the RAD makes no difference within it (a sale after the period, no DAP).
+    """
+    prober = _Prober(agedcare_sim.with_horizon(scenario, int(round(years * 12))), schedules)
+    if not prober.lasts(0.0):
+        return None
+    lo, hi = 0.0, _initial_bracket(scenario)
+    while prober.lasts(hi):
+        lo, hi = hi, hi * 2
+        if hi > MAX_RAD:
+            return math.inf
+    while hi - lo > tolerance:
+        mid = (lo + hi) / 2
+        if prober.lasts(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def depletion_month(scenario, schedules=None, min_months=0):
+    """
+    First month number whose closing assets are negative, or None.
+    The scenario's horizon is extended to at least min_months months.
+    """
+    months = scenario["months_till_house_sale"] + scenario["total_months_after_sale"]
+    if min_months > months:
+        scenario = agedcare_sim.with_horizon(scenario, min_months)
+    return fast_forward.depletion_month(**scenario, schedules=schedules)
+
+
+def _batch_params(scenarios, months=None):
+    if months is not None:
+        scenarios = [agedcare_sim.with_horizon(s, months) for s in scenarios]
+    names = batch_sim.FLOAT_PARAMS + batch_sim.INT_PARAMS + ["start_date"]
+    return {name: [s[name] for s in scenarios] for name in names}
+
+
+def max_affordable_rad_batch(scenarios, years, tolerance=1.0, schedules=None) -> np.ndarray:
+    """
+    max_affordable_rad for every scenario in one vectorised bisection.
+    NaN where no RAD lasts, inf where the RAD makes no difference.
+    """
+    scenarios = list(scenarios)
+    params = _batch_params(scenarios, int(round(years * 12)))
+
+    def lasts(rads):
+        result = batch_sim.simulate_finances_batch(dict(params, rad=rads), schedules=schedules)
+        return result.depletion_months() == 0
+
+    n = len(scenarios)
+    lo = np.zeros(n)
+    feasible = lasts(lo)
+    hi = np.array([_initial_bracket(s) for s in scenarios])
+    growing = feasible & lasts(hi)
+    while growing.any():
+        lo = np.where(growing, hi, lo)
+        hi = np.where(growing, hi * 2, hi)
+        growing &= hi <= MAX_RAD
+        growing &= lasts(hi)
+    unbounded = hi > MAX_RAD
+
+    active = feasible & ~unbounded & (hi - lo > tolerance)
+    while active.any():
+        mid = (lo + hi) / 2
+        ok = lasts(mid)
+        lo = np.where(active & ok, mid, lo)
+        hi = np.where(active & ~ok, mid, hi)
+        active &= hi - lo > tolerance
+
+    return np.where(feasible, np.where(unbounded, np.inf, lo), np.nan)
+
+
+def depletion_months_batch(scenarios, schedules=None) -> list:
+    """
+    depletion_month for every scenario, from one batch run.
+    """
+    result = batch_sim.simulate_finances_batch(_batch_params(list(scenarios)), schedules=schedules)
+    return [int(m) or None for m in result.depletion_months()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim solve",
+        description="With --years, find the largest RAD that lasts that many years; "
+                    "otherwise report the month the money runs out for --rad.",
+    )
+    agedcare_sim.add_simulation_arguments(parser, exclude=("--rad",))
+    parser.add_argument("--rad", type=float, help="Refundable Accommodation Deposit ($), when not solving for it")
+    parser.add_argument("--years", type=float, help="Solve for the largest RAD lasting this many years")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="RAD precision in dollars (default 1)")
+    args = agedcare_sim.parse_simulation_args(parser, argv)
+    if args.years is None and args.rad is None:
+        parser.error("give --rad, or --years to solve for it")
+    if args.years is not None and not 0 < args.years * 12 <= MAX_HORIZON_MONTHS:
+        parser.error(f"--years must be above 0 and at most {MAX_HORIZON_MONTHS // 12}")
+    agedcare_sim.configure_logging("INFO")
+
+    scenario = {name: getattr(args, name) for name in agedcare_sim.SIMULATION_PARAMS}
+    months = args.months_till_house_sale + args.total_months_after_sale
+    if args.years is not None:
+        months = max(months, int(round(args.years * 12)))
+    schedules = agedcare_sim.load_schedules(args, agedcare_sim.incr_year(args.start_date, months))
+
+    if args.years is not None:
+        rad = max_affordable_rad(scenario, args.years, tolerance=args.tolerance, schedules=schedules)
+        if rad is None:
+            print(f"The money runs out within {args.years:g} years even without a RAD")
+            return 1
+        if math.isinf(rad):
+            print(f"The RAD makes no difference within {args.years:g} years")
+            return 0
+        print(f"Largest RAD lasting {args.years:g} years: {rad:,.2f}")
+        scenario["rad"] = rad
+
+    month = depletion_month(scenario, schedules=schedules, min_months=months)
+    if month is None:
+        print(f"Assets last all {months} months simulated")
+    else:
+        print(f"Assets run out in month {month}")
+    return 0
@@ -0,0 +1,360 @@
+"""
+Binary result store for large batches, read back through memory maps.
+
+A store is a directory of raw little-endian arrays plus header.json:
+
+    header.json         format, rule version, caller's metadata, dtypes, counts
+    offsets.bin         int64, scenario i's months are [offsets[i], offsets[i+1])
+    <column>.bin        one per results.ROW_COLUMNS, every scenario's months back to back
+    params/<name>.bin   one value per scenario for each simulate_finances argument
+    ids.txt             optional, one scenario id per line
+
+Months are stored back to back rather than padded to the longest horizon,
+so a file holds exactly the simulated values. StoreWriter appends a batch
+of scenarios at a time and rewrites the header (atomically) after each, so
+a store being written can already be read up to its last complete batch.
+
+ResultStore maps the files read-only with np.memmap: one column of every
+scenario, or one scenario's months, is sliced without reading the rest.
+result() and subset() turn any selection back into a SimulationResult,
+which save_csv / save_excel (or export()) write as usual.
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim store info results.store
+    python -m aged_care_calcs.agedcare_sim store export results.store out.xlsx --rows 0:100 --columns assets,mtf
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+from . import agedcare_sim
+from .batch_sim import FLOAT_PARAMS, INT_PARAMS
+from .results import INT_COLUMNS, ROW_COLUMNS, SimulationResult
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = 1
+
+COLUMN_DTYPES = {name: "<i8" if name in INT_COLUMNS else "<f8" for name in ROW_COLUMNS}
+PARAM_DTYPES = dict(
+    {name: "<f8" for name in FLOAT_PARAMS},
+    **{name: "<i8" for name in INT_PARAMS},
+    start_date="<M8[D]",
+)
+
+
+def flatten(result) -> tuple:
+    """
+    (months per scenario, {column: values}) for a batch_sim.BatchResult,
+    each column holding every scenario's valid months back to back.
+    """
+    n_months = np.asarray(result.n_months, dtype=np.int64)
+    horizon = result.columns["assets"].shape[1]
+    valid = np.arange(horizon) < n_months[:, None]
+    return n_months, {name: np.asarray(result.columns[name][valid], dtype=COLUMN_DTYPES[name]) for name in ROW_COLUMNS}
+
+
+def _write_json(path, data):
+    # write then rename, so readers never see a partial header
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+class StoreWriter:
+    """
+    Appends scenarios and their results to a new store at path.
+    rule_version is the schedules.ScheduleStore version the results were
+    computed with; meta is any JSON-able description (inputs, sweep grid).
+    """
+
+    def __init__(self, path, rule_version, meta=None, ids=False):
+        if os.path.exists(os.path.join(path, "header.json")):
+            raise FileExistsError(f"{path} already holds a result store")
+        os.makedirs(os.path.join(path, "params"), exist_ok=True)
+        self.path = path
+        self.header = {
+            "format": STORE_FORMAT,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "rule_version": rule_version,
+            "meta": meta or {},
+            "columns": COLUMN_DTYPES,
+            "params": PARAM_DTYPES,
+            "ids": ids,
+            "scenarios": 0,
+            "months": 0,
+        }
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name in ROW_COLUMNS}
+        self._files["offsets"] = open(os.path.join(path, "offsets.bin"), "wb")
+        for name in PARAM_DTYPES:
+            self._files[f"params/{name}"] = open(os.path.join(path, "params", f"{name}.bin"), "wb")
+        if ids:
+            self._ids = open(os.path.join(path, "ids.txt"), "w")
+        self._files["offsets"].write(np.zeros(1, dtype="<i8").tobytes())
+        self._flush()
+
+    def __len__(self):
+        return self.header["scenarios"]
+
+    def append(self, scenarios, result, ids=None):
+        """
+        Add scenario dicts and their batch_sim.BatchResult (same order).
+        """
+        n_months, columns = flatten(result)
+        self.append_flat(scenarios, n_months, columns, ids)
+
+    def append_flat(self, scenarios, n_months, columns, ids=None):
+        """
+        append() for results already flattened (see flatten()), e.g. by a worker process.
+        """
+        scenarios = list(scenarios)
+        if len(scenarios) != len(n_months):
+            raise ValueError(f"{len(scenarios)} scenarios but {len(n_months)} results")
+        if self.header["ids"] and (ids is None or len(ids) != len(scenarios)):
+            raise ValueError("this store records an id for every scenario")
+        if not scenarios:
+            return
+        for name in ROW_COLUMNS:
+            self._files[name].write(np.asarray(columns[name], dtype=COLUMN_DTYPES[name]).tobytes())
+        offsets = self.header["months"] + np.cumsum(n_months, dtype=np.int64)
+        self._files["offsets"].write(offsets.astype("<i8").tobytes())
+        for name, dtype in PARAM_DTYPES.items():
+            values = np.array([s[name] for s in scenarios], dtype=dtype)
+            self._files[f"params/{name}"].write(values.tobytes())
+        if self.header["ids"]:
+            self._ids.writelines(f"{scenario_id}\n" for scenario_id in ids)
+        self.header["scenarios"] += len(scenarios)
+        self.header["months"] = int(offsets[-1])
+        self._flush()
+
+    def _flush(self):
+        for f in self._files.values():
+            f.flush()
+        if self.header["ids"]:
+            self._ids.flush()
+        # the header last: it only ever counts data already written
+        _write_json(os.path.join(self.path, "header.json"), self.header)
+
+    def close(self):
+        self._flush()
+        for f in self._files.values():
+            f.close()
+        if self.header["ids"]:
+            self._ids.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultStore:
+    """
+    A store opened read-only. Arrays are memory-mapped on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "header.json")) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != STORE_FORMAT:
+            raise ValueError(f"{path}: unsupported result store format {self.header.get('format')!r}")
+        self._maps = {}
+        self._ids = None
+
+    def _map(self, filename, dtype, count):
+        if filename not in self._maps:
+            if count:
+                self._maps[filename] = np.memmap(os.path.join(self.path, filename), dtype=dtype, mode="r",
+                                                 shape=(count,))
+            else:
+                self._maps[filename] = np.empty(0, dtype=dtype)
+        return self._maps[filename]
+
+    def __len__(self):
+        return self.header["scenarios"]
+
+    @property
+    def rule_version(self):
+        return self.header["rule_version"]
+
+    @property
+    def meta(self) -> dict:
+        return self.header["meta"]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._map("offsets.bin", "<i8", len(self) + 1)
+
+    @property
+    def n_months(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def column(self, name) -> np.ndarray:
+        """
+        Every scenario's months of one column, back to back (see offsets).
+        """
+        return self._map(f"{name}.bin", self.header["columns"][name], self.header["months"])
+
+    def param(self, name) -> np.ndarray:
+        return self._map(f"params/{name}.bin", self.header["params"][name], len(self))
+
+    def ids(self):
+        """
+        Scenario ids, or None if the store has none.
+        """
+        if not self.header["ids"]:
+            return None
+        if self._ids is None:
+            with open(os.path.join(self.path, "ids.txt")) as f:
+                self._ids = [line.rstrip("\n") for _, line in zip(range(len(self)), f)]
+        return self._ids
+
+    def scenario(self, i) -> dict:
+        """
+        Scenario i's simulate_finances arguments.
+        """
+        scenario = {name: self.param(name)[i].item() for name in PARAM_DTYPES}
+        scenario["start_date"] = self.param("start_date")[i].astype(datetime.date)
+        return scenario
+
+    def months(self, name, i) -> np.ndarray:
+        """
+        Scenario i's months of one column (a view into the map).
+        """
+        offsets = self.offsets
+        return self.column(name)[offsets[i]:offsets[i + 1]]
+
+    def matrix(self, name, rows=None) -> np.ndarray:
+        """
+        One column as a (scenarios, longest horizon) array, NaN-padded like
+        a BatchResult column, for the given rows (default all).
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        offsets = self.offsets
+        n_months = offsets[rows + 1] - offsets[rows]
+        horizon = int(n_months.max()) if len(rows) else 0
+        out = np.full((len(rows), horizon), np.nan)
+        valid = np.arange(horizon) < n_months[:, None]
+        # positions in the flat column of every valid month, row by row
+        positions = (offsets[rows][:, None] + np.arange(horizon))[valid]
+        out[valid] = self.column(name)[positions]
+        return out
+
+    def result(self, i, columns=None) -> SimulationResult:
+        """
+        Scenario i as a SimulationResult (columns default to all).
+        """
+        out = {}
+        for name in columns or ROW_COLUMNS:
+            values = array("q" if name in INT_COLUMNS else "d")
+            values.frombytes(np.ascontiguousarray(self.months(name, i)).tobytes())
+            out[name] = values
+        return SimulationResult(out)
+
+    def subset(self, rows=None, columns=None) -> SimulationResult:
+        """
+        The months of the given rows (default all) as one SimulationResult,
+        led by a "scenario" column holding each month's row number.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        offsets = self.offsets
+        starts, ends = offsets[rows], offsets[rows + 1]
+        lengths = ends - starts
+        positions = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(rows) else np.empty(0, np.int64)
+        out = {"scenario": array("q", np.repeat(rows, lengths).astype(np.int64).tobytes())}
+        for name in columns or ROW_COLUMNS:
+            values = array("q" if name in INT_COLUMNS else "d")
+            values.frombytes(np.ascontiguousarray(self.column(name)[positions]).tobytes())
+            out[name] = values
+        return SimulationResult(out)
+
+
+def export(store, filename, rows=None, columns=None):
+    """
+    Write rows of a store (default all) as CSV, or Excel for .xlsx. A
+    single row with every column gives the same file as saving that
+    scenario's simulate_finances result.
+    """
+    if rows is not None and len(rows) == 1 and columns is None:
+        results = store.result(int(rows[0]))
+    else:
+        results = store.subset(rows, columns)
+    if filename.lower().endswith(".xlsx"):
+        agedcare_sim.save_excel(filename, results)
+    else:
+        agedcare_sim.save_csv(filename, results)
+
+
+def parse_rows(spec, n) -> list:
+    """
+    Row numbers from "5", "0:100" (stop excluded), "1,4,9" or a mix.
+    """
+    rows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if ":" in part:
+            start, _, stop = part.partition(":")
+            rows.extend(range(*slice(int(start) if start else None, int(stop) if stop else None).indices(n)))
+        elif part:
+            row = int(part)
+            if not 0 <= row < n:
+                raise ValueError(f"row {row} is outside the store's {n} scenarios")
+            rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="agedcare_sim store", description="Inspect or export a binary result store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="Print the store's header")
+    info.add_argument("store")
+    out = commands.add_parser("export", help="Write some or all scenarios as CSV or Excel (.xlsx)")
+    out.add_argument("store")
+    out.add_argument("output", help="Output file (.csv or .xlsx)")
+    out.add_argument("--rows", help="Row numbers: 5, 0:100 or 1,4,9 (default all)")
+    out.add_argument("--ids", help="Comma separated scenario ids instead of row numbers")
+    out.add_argument("--columns", help=f"Comma separated columns (default all: {', '.join(ROW_COLUMNS)})")
+    args = parser.parse_args(argv)
+    agedcare_sim.configure_logging("INFO")
+
+    store = ResultStore(args.store)
+    if args.command == "info":
+        print(json.dumps(dict(store.header, columns=list(store.header["columns"]), params=list(store.header["params"])),
+                         indent=2))
+        return 0
+
+    rows = None
+    if args.ids:
+        index = defaultdict(list)
+        for i, scenario_id in enumerate(store.ids() or ()):
+            index[scenario_id].append(i)
+        rows = []
+        for scenario_id in args.ids.split(","):
+            matches = index.get(scenario_id, [])
+            if not matches:
+                parser.error(f"no scenario with id {scenario_id!r}")
+            if len(matches) > 1:
+                parser.error(f"id {scenario_id!r} names rows {', '.join(map(str, matches))}; choose with --rows")
+            rows.append(matches[0])
+    elif args.rows:
+        try:
+            rows = parse_rows(args.rows, len(store))
+        except ValueError as e:
+            parser.error(f"--rows: {e}")
+    columns = args.columns.split(",") if args.columns else None
+    unknown = [name for name in columns or () if name not in ROW_COLUMNS]
+    if unknown:
+        parser.error(f"unknown columns: {', '.join(unknown)}")
+    export(store, args.output, rows, columns)
+    print(f"✅ {len(store) if rows is None else len(rows)} scenarios written to {args.output}")
+    return 0
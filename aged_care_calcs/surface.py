@@ -0,0 +1,192 @@
+"""
+Precomputed response surfaces for what-if sliders.
+
+A surface holds the sweep summaries (sweep.SUMMARY_COLUMNS) of every point
+on a small grid over two or three inputs around a submitted scenario, e.g.
+rad, dap_percentage and months_till_house_sale. The grid is run once
+through the batch engine (sweep.run_scenarios, so the summaries also land
+in the result cache); lookup() then answers any point inside it by
+multilinear interpolation from the corners of its grid cell, in
+microseconds and without numpy.
+
+Answers at grid nodes are the simulated values. Answers between nodes are
+flagged as interpolated, and are only approximate: the fees are stepped in
+assets and the depletion month is a whole month. exact() simulates the
+point itself, for when the slider is released.
+"""
+import itertools
+import math
+from bisect import bisect_right
+
+from .sweep import SUMMARY_COLUMNS, run_scenarios
+
+# name -> (step, steps either side of the submitted value, lowest value)
+AXIS_STEPS = {
+    "rad": (50000.0, 4, 0.0),
+    "dap_percentage": (0.5, 4, 0.0),
+    "months_till_house_sale": (1, 6, 0),
+    "income_interest_rate": (0.5, 4, 0.0),
+    "initial_assets": (25000.0, 4, 0.0),
+    "house_value": (50000.0, 4, 0.0),
+    "incidental_expenditure_mthly": (100.0, 4, 0.0),
+}
+MAX_AXES = 3
+MAX_POINTS = 20000
+
+
+def grid_axes(scenario, names, steps=None) -> dict:
+    """
+    Grid values for each input in names, centred on the scenario's value
+    (shifted up where the window would go below the lowest value).
+    steps optionally overrides AXIS_STEPS entries.
+    """
+    if not names:
+        raise ValueError("vary at least one input")
+    if len(names) > MAX_AXES:
+        raise ValueError(f"vary at most {MAX_AXES} inputs")
+    axes = {}
+    for name in names:
+        spec = (steps or {}).get(name) or AXIS_STEPS.get(name)
+        if spec is None:
+            raise ValueError(f"{name} cannot be varied; choose from {', '.join(AXIS_STEPS)}")
+        step, count, lowest = spec
+        first = max(scenario[name] - count * step, lowest)
+        values = [first + i * step for i in range(2 * count + 1)]
+        if isinstance(step, int):
+            values = [int(v) for v in values]
+        if scenario[name] not in values:
+            # e.g. a centre below the lowest value, or off the step
+            values = sorted(set(values) | {scenario[name]})
+        axes[name] = values
+    size = math.prod(len(values) for values in axes.values())
+    if size > MAX_POINTS:
+        raise ValueError(f"grid of {size} points is larger than {MAX_POINTS}")
+    return axes
+
+
+class ResponseSurface:
+    """
+    Summaries over a grid: axes maps each varied input to its sorted
+    values, values maps each summary column to a flat list in C order
+    (the last axis varying fastest).
+    """
+
+    def __init__(self, scenario, axes, values):
+        self.scenario = scenario
+        self.axes = axes
+        self.values = values
+        self._names = list(axes)
+        self._points = [[float(v) for v in axes[name]] for name in self._names]
+        # flat index stride of each axis
+        self._strides = []
+        stride = 1
+        for points in reversed(self._points):
+            self._strides.insert(0, stride)
+            stride *= len(points)
+
+    def __len__(self):
+        return math.prod(len(points) for points in self._points)
+
+    def bounds(self) -> dict:
+        return {name: [values[0], values[-1]] for name, values in self.axes.items()}
+
+    def scenario_at(self, point) -> dict:
+        """
+        The full scenario for a point (a mapping of the varied inputs).
+        """
+        return dict(self.scenario, **{name: point[name] for name in self._names})
+
+    def check_point(self, point):
+        """
+        Raise ValueError unless point gives every varied input, inside the grid.
+        """
+        for name, points in zip(self._names, self._points):
+            if name not in point:
+                raise ValueError(f"{name} is missing")
+            x = float(point[name])
+            if not points[0] <= x <= points[-1]:
+                raise ValueError(f"{name} {x:g} is outside the grid ({points[0]:g} to {points[-1]:g})")
+
+    def lookup(self, point):
+        """
+        (summary dict, interpolated) at a point inside the grid; raises
+        ValueError for a point outside it or missing an input.
+        """
+        self.check_point(point)
+        cells = []
+        interpolated = False
+        for name, points in zip(self._names, self._points):
+            x = float(point[name])
+            i = min(bisect_right(points, x) - 1, len(points) - 2) if len(points) > 1 else 0
+            if len(points) == 1 or x == points[i]:
+                cells.append(((i, 1.0),))
+            elif x == points[i + 1]:
+                cells.append(((i + 1, 1.0),))
+            else:
+                w = (x - points[i]) / (points[i + 1] - points[i])
+                cells.append(((i, 1.0 - w), (i + 1, w)))
+                interpolated = True
+
+        corners = []
+        for combo in itertools.product(*cells):
+            index = 0
+            weight = 1.0
+            for (i, w), stride in zip(combo, self._strides):
+                index += i * stride
+                weight *= w
+            corners.append((index, weight))
+
+        summary = {}
+        for column, values in self.values.items():
+            summary[column] = sum(values[index] * weight for index, weight in corners)
+
+        # depletion is interpolated as months lasted, the horizon + 1 standing for "never"
+        n_months = sum(
+            point[name] if name in self.axes else self.scenario[name]
+            for name in ("months_till_house_sale", "total_months_after_sale")
+        )
+        if interpolated:
+            lasted = summary["depletion_month"]
+            summary["depletion_month"] = None if lasted > n_months else max(1, round(lasted))
+            for column in SUMMARY_COLUMNS:
+                if column != "depletion_month":
+                    summary[column] = round(summary[column], 2)
+        elif summary["depletion_month"] > n_months:
+            summary["depletion_month"] = None
+        else:
+            summary["depletion_month"] = int(summary["depletion_month"])
+        return summary, interpolated
+
+    def exact(self, point, schedules=None, cache=True) -> dict:
+        """
+        The summary at a point, simulated (through the result cache);
+        raises ValueError outside the grid, like lookup.
+        """
+        self.check_point(point)
+        return run_scenarios([self.scenario_at(point)], workers=1, schedules=schedules, cache=cache)[0]
+
+    def as_dict(self) -> dict:
+        """
+        JSON-able form, for clients interpolating on their side.
+        """
+        return {"axes": self.axes, "values": self.values}
+
+
+def build_surface(scenario, names, steps=None, schedules=None, cache=True) -> ResponseSurface:
+    """
+    Simulate the grid (grid_axes) around scenario over the inputs in names.
+    """
+    axes = grid_axes(scenario, names, steps)
+    grid = [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+    scenarios = [dict(scenario, **point) for point in grid]
+    summaries = run_scenarios(scenarios, workers=1, schedules=schedules, cache=cache)
+
+    values = {column: [] for column in SUMMARY_COLUMNS}
+    for point, summary in zip(scenarios, summaries):
+        n_months = point["months_till_house_sale"] + point["total_months_after_sale"]
+        for column in SUMMARY_COLUMNS:
+            value = summary[column]
+            if column == "depletion_month" and value is None:
+                value = n_months + 1
+            values[column].append(float(value))
+    return ResponseSurface(dict(scenario), axes, values)
@@ -0,0 +1,224 @@
+"""
+Parameter sweeps over simulate_finances arguments.
+
+A sweep takes one base scenario plus a grid of values for any of its
+arguments (typically rad, dap_percentage and months_till_house_sale),
+expands the Cartesian product and spreads it over a process pool. Each
+worker runs a chunk of scenarios through the batch engine and returns one
+summary per scenario; summaries come back in grid order. Scenarios that
+only differ after the house sale are chunked together, so the months
+before the sale can be computed once for all of them.
+
+CLI:
+    python -m aged_care_calcs.agedcare_sim sweep --rad 0:750000:250000 \\
+        --dap-percentage 7 --months-till-house-sale 0,6,12 ... --csv sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import logging
+import math
+import os
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import agedcare_sim
+from . import batch_sim
+from . import cache as result_cache
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLUMNS = ["depletion_month", "total_fees", "total_mtf", "final_assets"]
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def expand_grid(base: dict, grid: dict) -> list:
+    """
+    One scenario dict per combination of the grid values, in
+    itertools.product order (the last grid key varies fastest).
+    """
+    names = list(grid)
+    return [dict(base, **dict(zip(names, values))) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def summarise_batch(result: batch_sim.BatchResult) -> list:
+    """
+    Per-household summary of a batch run.
+
+    depletion_month is the first month number whose closing assets are
+    negative (None if the money lasts the whole horizon).
+    """
+    depletion = result.depletion_months()
+    total_fees = np.nansum(result["fees_total"], axis=1)
+    total_mtf = np.nansum(result["mtf"], axis=1)
+    final_assets = result.final_assets()
+
+    return [
+        {
+            "depletion_month": int(depletion[i]) or None,
+            "total_fees": round(float(total_fees[i]), 2),
+            "total_mtf": round(float(total_mtf[i]), 2),
+            "final_assets": round(float(final_assets[i]), 2),
+        }
+        for i in range(len(result))
+    ]
+
+
+def _run_chunk(args):
+    scenarios, schedules = args
+    return summarise_batch(batch_sim.simulate_finances_shared(scenarios, schedules=schedules))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_scenarios(scenarios, workers=None, chunksize=None, schedules=None, cache=True) -> list:
+    """
+    Summaries for a list of scenario dicts, in the same order.
+
+    Summaries already in the result cache (cache=True for the shared
+    cache, or a cache.ResultCache; False to bypass) are reused and only the
+    rest are simulated. Those are cut into chunks which are handed to a
+    pool of workers (default: every available CPU). With one worker, or a
+    single chunk, everything runs in this process.
+    """
+    scenarios = list(scenarios)
+    if not scenarios:
+        return []
+    if cache is True:
+        cache = result_cache.default_cache()
+    if cache is False or cache is None:
+        return _run_uncached(scenarios, workers, chunksize, schedules)
+
+    keys = [result_cache.scenario_key(s, schedules, kind="summary") for s in scenarios]
+    summaries = [cache.get(key) for key in keys]
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    logger.debug("sweep: %s of %s summaries cached", len(scenarios) - len(missing), len(scenarios))
+    computed = _run_uncached([scenarios[i] for i in missing], workers, chunksize, schedules)
+    for i, summary in zip(missing, computed):
+        cache.put(keys[i], summary)
+        summaries[i] = summary
+    # copies, so callers adding columns do not change the cached summaries
+    return [dict(summary) for summary in summaries]
+
+
+def _run_uncached(scenarios, workers, chunksize, schedules) -> list:
+    if not scenarios:
+        return []
+    workers = workers or available_cpus()
+    if chunksize is None:
+        # a few chunks per worker keeps the pool busy when chunks finish unevenly
+        chunksize = max(1, math.ceil(len(scenarios) / (workers * 4)))
+
+    # scenarios sharing their months before the sale go in the same chunk, where they are computed once
+    groups = defaultdict(list)
+    for i, scenario in enumerate(scenarios):
+        groups[agedcare_sim.prefix_key(scenario)].append(i)
+    order = [i for members in groups.values() for i in members]
+
+    jobs = [(chunk, schedules) for chunk in _chunks([scenarios[i] for i in order], chunksize)]
+    if workers == 1 or len(jobs) == 1:
+        summaries = [summary for chunk in map(_run_chunk, jobs) for summary in chunk]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            # map yields results in submission order whichever worker finishes first
+            summaries = [summary for chunk in pool.map(_run_chunk, jobs) for summary in chunk]
+
+    ordered = [None] * len(scenarios)
+    for i, summary in zip(order, summaries):
+        ordered[i] = summary
+    return ordered
+
+
+def run_sweep(base: dict, grid: dict, workers=None, chunksize=None, schedules=None, cache=True) -> list:
+    """
+    Summary table for every combination in grid applied on top of base.
+    Each row holds the varied arguments followed by SUMMARY_COLUMNS.
+    """
+    scenarios = expand_grid(base, grid)
+    summaries = run_scenarios(scenarios, workers=workers, chunksize=chunksize, schedules=schedules, cache=cache)
+    return [
+        dict({name: scenario[name] for name in grid}, **summary)
+        for scenario, summary in zip(scenarios, summaries)
+    ]
+
+
+def parse_values(cast):
+    """
+    argparse type accepting a single value, a comma separated list, or
+    start:stop:step with stop included (numeric arguments only).
+    """
+
+    def parse(text):
+        if ":" in text and cast in (int, float):
+            try:
+                # decimal steps, so 0.1:0.3:0.1 ends at 0.3 rather than 0.30000000000000004
+                start, stop, step = (Decimal(part.strip()) for part in text.split(":"))
+            except (InvalidOperation, ValueError):
+                raise argparse.ArgumentTypeError(f"Not a valid range: '{text}'")
+            if not all(v.is_finite() for v in (start, stop, step)) or step <= 0 or stop < start:
+                raise argparse.ArgumentTypeError(f"Not a valid range: '{text}'")
+            if cast is int and any(v != v.to_integral_value() for v in (start, stop, step)):
+                raise argparse.ArgumentTypeError(f"Not a valid range: '{text}'")
+            count = int((stop - start) // step) + 1
+            return [cast(start + i * step) for i in range(count)]
+        return [cast(part) for part in text.split(",")]
+
+    return parse
+
+
+def save_summary_csv(filename, rows):
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    logger.info("✅ Saved results to %s", filename)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim sweep",
+        description="Run every combination of the given values. Each flag takes a value, "
+                    "a comma separated list or start:stop:step (stop included).",
+    )
+    agedcare_sim.add_simulation_arguments(parser, wrap_type=parse_values)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--chunksize", type=int, help="Scenarios per task (default: a few tasks per worker)")
+    parser.add_argument("--csv", help="Output summary table to CSV file")
+    agedcare_sim.add_cache_arguments(parser)
+    args = agedcare_sim.parse_simulation_args(parser, argv)
+    agedcare_sim.configure_logging("INFO")
+    use_cache = agedcare_sim.configure_cache(args)
+
+    values = {name: getattr(args, name) for name in agedcare_sim.SIMULATION_PARAMS}
+    base = {name: v[0] for name, v in values.items()}
+    grid = {name: v for name, v in values.items() if len(v) > 1}
+
+    end_date = max(values["start_date"])
+    end_date = agedcare_sim.incr_year(
+        end_date, max(values["months_till_house_sale"]) + max(values["total_months_after_sale"])
+    )
+    schedules = agedcare_sim.load_schedules(args, end_date)
+
+    rows = run_sweep(base, grid, workers=args.workers, chunksize=args.chunksize, schedules=schedules, cache=use_cache)
+
+    headers = list(grid) + SUMMARY_COLUMNS
+    print(" | ".join(headers))
+    for r in rows:
+        print(" | ".join("-" if r[h] is None else f"{r[h]:,}" if isinstance(r[h], (int, float)) else str(r[h]) for h in headers))
+
+    if args.csv:
+        save_summary_csv(args.csv, rows)
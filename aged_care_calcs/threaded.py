@@ -0,0 +1,80 @@
+"""
+Run simulate_finances concurrently on a thread pool.
+
+simulate_finances keeps all of its state in a per-run SimulationState, so
+runs in different threads do not share anything mutable. stress_check
+(CLI: python -m aged_care_calcs.agedcare_sim stress) runs the same
+scenarios serially and concurrently and checks the rows are identical.
+"""
+import argparse
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from . import agedcare_sim
+from .sweep import expand_grid
+
+
+def simulate_many(scenarios, max_workers=None, schedules=None, pool=None) -> list:
+    """
+    simulate_finances for each scenario dict, run on a thread pool.
+    Results are returned in the same order as scenarios. An existing
+    executor can be passed as pool, otherwise one is created for the call.
+    """
+    def run(scenario):
+        return agedcare_sim.simulate_finances(**scenario, schedules=schedules)
+
+    if pool is not None:
+        return list(pool.map(run, scenarios))
+    with ThreadPoolExecutor(max_workers=max_workers) as own_pool:
+        return list(own_pool.map(run, scenarios))
+
+
+def stress_scenarios() -> list:
+    """
+    Scenarios that cross the annual and lifetime MTF caps at different months.
+    """
+    return expand_grid(
+        agedcare_sim.DEFAULT_SCENARIO,
+        {
+            "initial_assets": [20000.0, 140000.0, 600000.0],
+            "rad": [0.0, 750000.0],
+            "months_till_house_sale": [0, 6, 14],
+            "means_tested_lifetime_limit": [20000.0, 82347.0],
+        },
+    )
+
+
+def stress_check(scenarios=None, workers=16, rounds=4, seed=0) -> list:
+    """
+    Run scenarios serially once, then `rounds` times concurrently in a
+    shuffled order, and return the indices of scenarios whose concurrent
+    rows differed from the serial ones (empty when everything matched).
+    """
+    scenarios = stress_scenarios() if scenarios is None else list(scenarios)
+    expected = [agedcare_sim.simulate_finances(**s) for s in scenarios]
+
+    order = list(range(len(scenarios))) * rounds
+    random.Random(seed).shuffle(order)
+    results = simulate_many([scenarios[i] for i in order], max_workers=workers)
+
+    return sorted({i for i, rows in zip(order, results) if rows != expected[i]})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="agedcare_sim stress",
+        description="Check concurrent simulations give exactly the serial results",
+    )
+    parser.add_argument("--workers", type=int, default=16, help="Threads to run at once")
+    parser.add_argument("--rounds", type=int, default=4, help="Times each scenario is repeated concurrently")
+    args = parser.parse_args(argv)
+
+    scenarios = stress_scenarios()
+    mismatched = stress_check(scenarios, workers=args.workers, rounds=args.rounds)
+
+    runs = len(scenarios) * args.rounds
+    if mismatched:
+        print(f"❌ {len(mismatched)} of {len(scenarios)} scenarios differed across {runs} concurrent runs: {mismatched}")
+        return 1
+    print(f"✅ {runs} concurrent runs on {args.workers} threads matched the serial results")
+    return 0
@@ -0,0 +1,339 @@
+"""
+Dated events, compiled into a per-month schedule for the month loop.
+
+A household's plan is its scenario (simulate_finances arguments) plus any
+number of events, each taking effect in one month: either a month index,
+or a date, meaning the first simulated month starting on or after it.
+
+    RadPayment(when, amount)        pay (part of) the RAD out of assets
+    RadDrawdown(when, amount)       draw part of the paid RAD back into assets
+    HouseSale(when, proceeds)       proceeds arrive; no longer a homeowner
+    LumpSum(when, amount)           a gift or inheritance (negative: given away)
+    RateChange(when, ...)           new income_interest_rate / asset_interest_percentage
+    FeeChange(when, ...)            new daily fees, DAP percentage or monthly spending
+
+The scenario itself is a set of events (scenario_events): the house sale
+in month months_till_house_sale, the RAD paid out of it, and incidental
+spending stopping there, as simulate_finances has always done.
+
+compile_timeline turns a plan into a Timeline: the month inputs (rates,
+fees, DAP, spending and means test settings) for each stretch of months
+between changes, and the cash moving in each month with events. The month
+loop looks up the inputs in force and any cash due, then runs the same
+month body whatever the phase, so a plan with many events costs the same
+per month as the plain two-phase one.
+
+The DAP is charged on the part of the agreed RAD (the scenario's rad) not
+yet paid; the RAD paid counts in the means test. RAD payments leave assets
+before any cash arrives in the same month.
+"""
+import dataclasses
+import datetime
+import json
+import math
+from bisect import bisect_right
+from typing import Optional, Union
+
+# home value the means test uses while the resident still owns the house
+PRE_SALE_HOME_VALUE = 1000000
+
+When = Union[int, datetime.date]
+
+
+@dataclasses.dataclass(frozen=True)
+class RadPayment:
+    when: When
+    amount: float
+    # shown in the rad_paid column (simulate_finances shows the RAD paid
+    # from the sale only when there are house proceeds)
+    reported: bool = True
+
+
+@dataclasses.dataclass(frozen=True)
+class RadDrawdown:
+    when: When
+    amount: float
+
+
+@dataclasses.dataclass(frozen=True)
+class HouseSale:
+    when: When
+    proceeds: float
+
+
+@dataclasses.dataclass(frozen=True)
+class LumpSum:
+    when: When
+    amount: float
+
+
+@dataclasses.dataclass(frozen=True)
+class RateChange:
+    when: When
+    income_interest_rate: Optional[float] = None
+    asset_interest_percentage: Optional[float] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class FeeChange:
+    when: When
+    basic_daily_fee: Optional[float] = None
+    special_services_fee: Optional[float] = None
+    dap_percentage: Optional[float] = None
+    incidental_expenditure_mthly: Optional[float] = None
+
+
+# "type" names used in JSON event lists
+EVENT_TYPES = {
+    "rad_payment": RadPayment,
+    "rad_drawdown": RadDrawdown,
+    "house_sale": HouseSale,
+    "lump_sum": LumpSum,
+    "rate_change": RateChange,
+    "fee_change": FeeChange,
+}
+_TYPE_NAMES = {cls: name for name, cls in EVENT_TYPES.items()}
+
+
+def event_from_dict(d):
+    """
+    Event from {"type": "lump_sum", "when": "2027-03-01" or a month index, ...}.
+    """
+    if not isinstance(d, dict):
+        raise ValueError(f"an event must be a JSON object, not {d!r}")
+    d = dict(d)
+    cls = EVENT_TYPES.get(d.pop("type", None))
+    if cls is None:
+        raise ValueError(f"event type must be one of {', '.join(EVENT_TYPES)}")
+    fields = {f.name: f for f in dataclasses.fields(cls)}
+    for name in d:
+        if name not in fields:
+            raise ValueError(f"{_TYPE_NAMES[cls]} event has no field {name!r}")
+    for name, field in fields.items():
+        if name not in d:
+            if field.default is dataclasses.MISSING:
+                raise ValueError(f"{_TYPE_NAMES[cls]} event needs {name!r}")
+            continue
+        value = d[name]
+        if name == "when":
+            d[name] = _parse_when(value)
+        elif name == "reported":
+            d[name] = bool(value)
+        elif value is not None or field.default is dataclasses.MISSING:
+            d[name] = _parse_number(name, value)
+    return cls(**d)
+
+
+def _parse_number(name, value) -> float:
+    # bools are numbers to float(), but never a sensible amount or rate
+    if not isinstance(value, bool):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        if math.isfinite(number):
+            return number
+    raise ValueError(f"event field {name!r} must be a number, not {value!r}")
+
+
+def _parse_when(value) -> When:
+    if isinstance(value, str):
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"event field 'when' must be a month index or a YYYY-MM-DD date, not {value!r}") from None
+    if (isinstance(value, bool) or not isinstance(value, (int, float))
+            or isinstance(value, float) and not value.is_integer() or value < 0):
+        raise ValueError(f"event field 'when' must be a month index (0 or more) or a YYYY-MM-DD date, not {value!r}")
+    return int(value)
+
+
+def event_to_dict(event) -> dict:
+    d = {"type": _TYPE_NAMES[type(event)]}
+    for name, value in dataclasses.asdict(event).items():
+        if value is not None:
+            d[name] = value.isoformat() if isinstance(value, datetime.date) else value
+    return d
+
+
+def load_events(filename) -> list:
+    """
+    Events from a JSON file holding a list of event objects.
+    """
+    with open(filename) as f:
+        raw = json.load(f)
+    if not isinstance(raw, list):
+        raise ValueError(f"{filename}: expected a JSON list of events")
+    return [event_from_dict(d) for d in raw]
+
+
+def scenario_events(scenario) -> list:
+    """
+    The events implied by a scenario's house sale.
+    """
+    sale = scenario["months_till_house_sale"]
+    return [
+        RadPayment(sale, scenario["rad"], reported=scenario["house_value"] > 0),
+        HouseSale(sale, scenario["house_value"]),
+        FeeChange(sale, incidental_expenditure_mthly=0.0),
+    ]
+
+
+def month_index(start_date, when) -> int:
+    """
+    Simulation month in which an event dated `when` takes effect.
+    """
+    if not isinstance(when, datetime.date):
+        if when < 0:
+            raise ValueError(f"event in month {when} is before the first month (0)")
+        return int(when)
+    months = (when.year - start_date.year) * 12 + when.month - start_date.month
+    # that month starts on start_date's day (or the month's last day), so a later day waits a month
+    if when.day > start_date.day:
+        months += 1
+    if months < 0:
+        raise ValueError(f"event on {when} is before the start date {start_date}")
+    return months
+
+
+class MonthInputs:
+    """
+    Everything the month body reads that events can change, already in
+    the form it is used.
+    """
+
+    __slots__ = (
+        "interest_share", "monthly_rate", "monthly_basic_special", "dap_fee",
+        "spending", "homeowner", "home_val", "means_extra",
+    )
+
+    def __init__(self, interest_share, monthly_rate, monthly_basic_special, dap_fee,
+                 spending, homeowner, home_val, means_extra):
+        self.interest_share = interest_share
+        self.monthly_rate = monthly_rate
+        self.monthly_basic_special = monthly_basic_special
+        self.dap_fee = dap_fee
+        self.spending = spending
+        self.homeowner = homeowner
+        self.home_val = home_val
+        self.means_extra = means_extra
+
+
+class MonthCash:
+    """
+    Cash moving at the start of a month: pay leaves assets (RAD payments),
+    then receive arrives. house and rad_paid are what the row reports.
+    """
+
+    __slots__ = ("pay", "receive", "house", "rad_paid")
+
+    def __init__(self):
+        self.pay = 0
+        self.receive = 0
+        self.house = 0
+        self.rad_paid = 0
+
+
+class _Settings:
+    """
+    The raw values events change, turned into MonthInputs on demand.
+    """
+
+    def __init__(self, scenario):
+        self.income_interest_rate = scenario["income_interest_rate"]
+        self.asset_interest_percentage = scenario["asset_interest_percentage"]
+        self.basic_daily_fee = scenario["basic_daily_fee"]
+        self.special_services_fee = scenario["special_services_fee"]
+        self.dap_percentage = scenario["dap_percentage"]
+        self.incidental_expenditure_mthly = scenario["incidental_expenditure_mthly"]
+        self.homeowner = True
+        self.rad_unpaid = scenario["rad"]
+        self.rad_held = 0.0
+
+    def apply(self, event):
+        if isinstance(event, RadPayment):
+            self.rad_unpaid -= event.amount
+            self.rad_held += event.amount
+        elif isinstance(event, RadDrawdown):
+            self.rad_unpaid += event.amount
+            self.rad_held -= event.amount
+        elif isinstance(event, HouseSale):
+            self.homeowner = False
+        elif isinstance(event, (RateChange, FeeChange)):
+            for field in dataclasses.fields(event):
+                value = getattr(event, field.name)
+                if field.name != "when" and value is not None:
+                    setattr(self, field.name, value)
+
+    def inputs(self) -> MonthInputs:
+        return MonthInputs(
+            interest_share=self.asset_interest_percentage / 100,
+            monthly_rate=self.income_interest_rate / 100 / 12,
+            monthly_basic_special=(self.basic_daily_fee + self.special_services_fee) * 30.44,
+            dap_fee=self.rad_unpaid * (self.dap_percentage / 100) / 12,
+            spending=self.incidental_expenditure_mthly,
+            homeowner=self.homeowner,
+            home_val=PRE_SALE_HOME_VALUE if self.homeowner else 0.0,
+            means_extra=self.rad_held,
+        )
+
+
+class Timeline:
+    """
+    A compiled plan: starts[i] is the first month of the i-th stretch of
+    months sharing inputs[i]; cash maps a month to its MonthCash.
+    """
+
+    def __init__(self, n_months, starts, inputs, cash):
+        self.n_months = n_months
+        self.starts = starts
+        self.inputs = inputs
+        self.cash = cash
+        # months where anything changes: new inputs, or cash moving
+        self.boundaries = sorted(set(starts[1:]) | set(cash))
+
+    def inputs_at(self, month) -> MonthInputs:
+        return self.inputs[bisect_right(self.starts, month) - 1]
+
+    def next_boundary(self, month) -> int:
+        """
+        First month after `month` where inputs change or cash moves (n_months if none).
+        """
+        i = bisect_right(self.boundaries, month)
+        return self.boundaries[i] if i < len(self.boundaries) else self.n_months
+
+
+def compile_timeline(scenario, events=(), n_months=None) -> Timeline:
+    """
+    Timeline for a scenario (simulate_finances arguments) plus extra
+    events. Events after the horizon are dropped; events in the same month
+    apply in the order given, after the scenario's own.
+    """
+    if n_months is None:
+        n_months = scenario["months_till_house_sale"] + scenario["total_months_after_sale"]
+    start_date = scenario["start_date"]
+    dated = [(m, e) for m, e in ((month_index(start_date, e.when), e) for e in scenario_events(scenario) + list(events))
+             if m < n_months]
+    # stable, so same-month events keep their order
+    dated.sort(key=lambda me: me[0])
+
+    settings = _Settings(scenario)
+    starts, inputs, cash = [0], [], {}
+    for m, event in dated:
+        if m > starts[-1]:
+            inputs.append(settings.inputs())
+            starts.append(m)
+        settings.apply(event)
+        if isinstance(event, (RadPayment, RadDrawdown, HouseSale, LumpSum)):
+            c = cash.setdefault(m, MonthCash())
+            if isinstance(event, RadPayment):
+                c.pay += event.amount
+                if event.reported:
+                    c.rad_paid += event.amount
+            elif isinstance(event, HouseSale):
+                c.receive += event.proceeds
+                c.house += event.proceeds
+            else:
+                c.receive += event.amount
+    inputs.append(settings.inputs())
+    return Timeline(n_months, starts, inputs, cash)
@@ -1,13 +1,62 @@
 #!/usr/bin/env python3
 from flask import Flask, request, send_file, render_template_string, jsonify, redirect, url_for
-import tempfile
+import contextlib
+import io
 import os
 import datetime
+import json
+import math
+import time
 import uuid
+from collections import deque
 from aged_care_calcs import agedcare_sim
+from aged_care_calcs import batch_sim
+from aged_care_calcs import cache as result_cache
+from aged_care_calcs import history as run_history
+from aged_care_calcs import instrument
+from aged_care_calcs import jobs
+from aged_care_calcs import scenarios as scenario_input
+from aged_care_calcs import solver
+from aged_care_calcs import surface
+from aged_care_calcs.results import SimulationResult
 
 app = Flask(__name__)
-history = []
+
+
+# runs still pending or running after this long are assumed lost (e.g. to a
+# restart): they no longer keep the index page refreshing, and are marked
+# failed when the history is next opened if their server cannot be checked
+# (runs of a stopped server on this host are marked failed straight away)
+HISTORY_STALE_SECONDS = 3600
+
+# Simulations are recorded in a SQLite run history shared by every server
+# process (AGEDCARE_HISTORY_DB, by default in the app's instance folder
+# whatever the working directory), keeping the newest AGEDCARE_HISTORY_SIZE
+# finished runs for up to AGEDCARE_HISTORY_TTL seconds; exports are built
+# only when downloaded, from the stored results, and the most recent are memoized.
+def _history_path():
+    path = os.environ.get("AGEDCARE_HISTORY_DB")
+    if path is None:
+        os.makedirs(app.instance_path, exist_ok=True)
+        path = os.path.join(app.instance_path, "agedcare_history.db")
+    return path
+
+
+history = run_history.RunHistory(
+    _history_path(),
+    max_rows=int(os.environ.get("AGEDCARE_HISTORY_SIZE", "10000")),
+    max_age=float(os.environ.get("AGEDCARE_HISTORY_TTL", str(30 * 24 * 3600))),
+    stale_after=HISTORY_STALE_SECONDS,
+)
+HISTORY_PAGE_SIZE = int(os.environ.get("AGEDCARE_HISTORY_PAGE_SIZE", "25"))
+export_cache = result_cache.ResultCache(max_entries=int(os.environ.get("AGEDCARE_EXPORT_CACHE_SIZE", "32")))
+
+# Simulations run as background jobs on a bounded thread pool: requests return
+# a job id straight away, and new work is refused (429) once
+# AGEDCARE_MAX_QUEUED jobs are already waiting for a thread.
+SIMULATION_THREADS = int(os.environ.get("AGEDCARE_SIM_THREADS", "4"))
+MAX_QUEUED_JOBS = int(os.environ.get("AGEDCARE_MAX_QUEUED", "16"))
+job_queue = jobs.JobQueue(SIMULATION_THREADS, MAX_QUEUED_JOBS, thread_name_prefix="simulate")
 
 # --- Modern Dark Theme HTML ---
 HTML_INDEX = """
@@ -15,6 +64,7 @@ HTML_INDEX = """
 <html lang="en">
 <head>
   <meta charset="utf-8">
+  {% if refresh %}<meta http-equiv="refresh" content="2">{% endif %}
   <title>Aged Care Financial Simulator</title>
   <style>
     :root {
@@ -67,6 +117,15 @@ HTML_INDEX = """
       margin-top: 4px;
       font-size: 1em;
     }
+    label.checkbox input {
+      width: auto;
+      margin-right: 0.5em;
+    }
+    pre.trace {
+      color: var(--muted);
+      font-size: 0.8em;
+      margin: 0.4em 0 0;
+    }
     input:focus {
       outline: none;
       border-color: var(--accent);
@@ -119,6 +178,48 @@ HTML_INDEX = """
       color: var(--muted);
       font-style: italic;
     }
+    .danger {
+      color: var(--danger);
+    }
+    form.inline {
+      display: inline;
+      background: none;
+      padding: 0;
+      box-shadow: none;
+    }
+    form.filters {
+      display: flex;
+      flex-wrap: wrap;
+      align-items: flex-end;
+      gap: 1em;
+      padding: 1em 1.5em;
+    }
+    form.filters label {
+      margin-top: 0;
+    }
+    form.filters button {
+      margin-top: 0;
+    }
+    select {
+      display: block;
+      background: #2c2c2c;
+      border: 1px solid var(--border);
+      color: var(--text);
+      padding: 8px;
+      border-radius: 0.4rem;
+      margin-top: 4px;
+    }
+    .small {
+      font-size: 0.8em;
+    }
+    p.pages a {
+      margin-right: 1em;
+    }
+    form.inline button {
+      margin: 0 0 0 0.5em;
+      padding: 0.2em 0.6em;
+      font-size: 0.85em;
+    }
   </style>
 </head>
 <body>
@@ -134,10 +235,28 @@ HTML_INDEX = """
       <label>Output filename (without extension):
         <input name="output_filename" value="agedcare_sim_result">
       </label>
+      <label class="checkbox">
+        <input type="checkbox" name="trace" value="1"> Record stage timings
+      </label>
       <button type="submit">Run Simulation</button>
     </form>
 
     <h2>Download History</h2>
+    <form class="filters" action="/" method="get">
+      <label>Status
+        <select name="status">
+          <option value="">any</option>
+          {% for status in statuses %}
+            <option value="{{ status }}" {% if filters.status == status %}selected{% endif %}>{{ status }}</option>
+          {% endfor %}
+        </select>
+      </label>
+      <label>From <input type="date" name="since" value="{{ filters.since or '' }}"></label>
+      <label>To <input type="date" name="until" value="{{ filters.until or '' }}"></label>
+      {% if filters.params %}<input type="hidden" name="params" value="{{ filters.params }}">{% endif %}
+      <button type="submit">Filter</button>
+      {% if filters.status or filters.since or filters.until or filters.params %}<a href="/">Clear</a>{% endif %}
+    </form>
     {% if history %}
       <table>
         <tr>
@@ -145,29 +264,124 @@ HTML_INDEX = """
           <th>Initial Assets</th>
           <th>RAD</th>
           <th>House Value</th>
+          <th>Status</th>
           <th>Downloads</th>
         </tr>
         {% for item in history %}
           <tr>
-            <td>{{ item.timestamp }}</td>
+            <td>{{ item.timestamp }}<br><a class="small" href="/?params={{ item.param_hash }}">same parameters</a></td>
             <td>{{ item.params['initial-assets'] }}</td>
             <td>{{ item.params['rad'] }}</td>
             <td>{{ item.params['house-value'] }}</td>
             <td>
-              <a href="/download/{{ item.id }}?type=csv">CSV</a> |
-              <a href="/download/{{ item.id }}?type=excel">Excel</a>
+              {% if item.status in ('pending', 'running') %}
+                {{ item.status }}{% if item.progress is not none %} {{ '%d' % (item.progress * 100) }}%{% endif %}
+                <form class="inline" action="/jobs/{{ item.id }}/cancel" method="post">
+                  <button type="submit">Cancel</button>
+                </form>
+              {% elif item.status == 'failed' %}
+                <span class="danger">failed: {{ item.error }}</span>
+              {% else %}
+                {{ item.status }}
+              {% endif %}
+            </td>
+            <td>
+              {% if item.status == 'done' %}
+                <a href="/download/{{ item.id }}?type=csv">CSV</a> |
+                <a href="/download/{{ item.id }}?type=excel">Excel</a>
+              {% else %}
+                <span class="muted">-</span>
+              {% endif %}
+              {% if item.trace %}<pre class="trace">{{ item.trace }}</pre>{% endif %}
             </td>
           </tr>
         {% endfor %}
       </table>
+      <p class="pages">
+        {% if filters.after %}<a href="{{ newest_url }}">&laquo; Newest</a>{% endif %}
+        {% if older_url %}<a href="{{ older_url }}">Older &raquo;</a>{% endif %}
+      </p>
     {% else %}
-      <p class="muted">No simulations run yet.</p>
+      <p class="muted">No simulations {% if filters.status or filters.since or filters.until or filters.params %}match these filters{% else %}run yet{% endif %}.</p>
     {% endif %}
   </div>
 </body>
 </html>
 """
 
+# JSON API: scenarios per batch engine run, per request, and chunks of one
+# request queued at once (so they run in parallel)
+API_CHUNK_SIZE = int(os.environ.get("AGEDCARE_API_CHUNK", "256"))
+API_MAX_SCENARIOS = int(os.environ.get("AGEDCARE_API_MAX_SCENARIOS", "10000"))
+API_WINDOW = int(os.environ.get("AGEDCARE_API_WINDOW", str(SIMULATION_THREADS)))
+
+
+def _simulation_job(job, args, timer=None):
+    """
+    Run one simulation as a background job, reporting progress every
+    simulated year, and return its SimulationResult. Results come from the shared result cache
+    when the same scenario has run before; traced runs (stage timings go
+    into timer) are always computed. The outcome is recorded in the run history.
+    """
+    history.update(job.id, jobs.RUNNING)
+    try:
+        cache = result_cache.default_cache()
+        key = result_cache.scenario_key(args)
+        results = cache.get(key) if timer is None else None
+        if results is None:
+            n_months = args['months_till_house_sale'] + args['total_months_after_sale']
+            results = SimulationResult()
+            with instrument.collect(timer) if timer is not None else contextlib.nullcontext():
+                for row in agedcare_sim.simulate_finances_iter(**args):
+                    results.append(*row)
+                    if row.month % 12 == 0:
+                        job.update(row.month / n_months)
+            cache.put(key, results)
+    except jobs.JobCancelled:
+        history.update(job.id, jobs.CANCELLED)
+        raise
+    except Exception as e:
+        history.update(job.id, jobs.FAILED, error=str(e))
+        raise
+    trace = None
+    if timer is not None:
+        trace = timer.report()
+        app.logger.info("simulation stage timings:\n%s", trace)
+    history.finish(job.id, results, trace=trace)
+    return results
+
+
+def _wants_json():
+    return request.is_json or request.accept_mimetypes.best == 'application/json'
+
+
+def _history_filters():
+    """
+    The index page's filters from the query string; malformed ones are dropped.
+    """
+    filters = {}
+    if request.args.get('status') in jobs.FINISHED + (jobs.PENDING, jobs.RUNNING):
+        filters['status'] = request.args['status']
+    for name in ('since', 'until'):
+        try:
+            filters[name] = datetime.date.fromisoformat(request.args.get(name, '')).isoformat()
+        except ValueError:
+            pass
+    if request.args.get('params'):
+        filters['params'] = request.args['params']
+    try:
+        run_history.parse_cursor(request.args.get('after', ''))
+        filters['after'] = request.args['after']
+    except ValueError:
+        pass
+    return filters
+
+
+def _unix_day(iso_date, days=0):
+    day = datetime.date.fromisoformat(iso_date) + datetime.timedelta(days=days)
+    return time.mktime(day.timetuple())
+
+
 @app.route('/')
 def index():
     defaults = {
@@ -188,72 +402,417 @@ def index():
         "incidental-expenditure-mthly": 400,
         "asset-interest-percentage": 70,
     }
-    return render_template_string(HTML_INDEX, fields=defaults, history=reversed(history))
+    filters = _history_filters()
+    items, cursor = history.page(
+        HISTORY_PAGE_SIZE,
+        after=filters.get('after'),
+        status=filters.get('status'),
+        param_hash=filters.get('params'),
+        since=_unix_day(filters['since']) if 'since' in filters else None,
+        until=_unix_day(filters['until'], days=1) if 'until' in filters else None,
+    )
+    stale = time.time() - HISTORY_STALE_SECONDS
+    refresh = False
+    for item in items:
+        # live progress for jobs running in this process
+        job = job_queue.get(item["id"])
+        item["progress"] = job.progress if job is not None and not job.done else None
+        if item["status"] in (jobs.PENDING, jobs.RUNNING) and item["created"] > stale:
+            refresh = True
+    listed = {k: v for k, v in filters.items() if k != 'after'}
+    return render_template_string(
+        HTML_INDEX, fields=defaults, history=items, refresh=refresh, filters=filters,
+        statuses=(jobs.PENDING, jobs.RUNNING) + jobs.FINISHED,
+        newest_url=url_for('index', **listed),
+        older_url=url_for('index', after=cursor, **listed) if cursor else None,
+    )
 
 @app.route('/simulate', methods=['POST'])
 def simulate():
     try:
-        params = {k: request.form[k] for k in request.form if k != 'output_filename'}
+        options = ('output_filename', 'trace')
+        params = {k: request.form[k] for k in request.form if k not in options}
         base_filename = request.form.get('output_filename', '').strip() or "agedcare_sim_result"
+        trace = request.form.get('trace') == '1' or request.args.get('trace') == '1'
 
-        args = {k.replace('-', '_'): v for k, v in params.items()}
-        float_fields = [
-            'initial_assets', 'rad', 'house_value', 'dap_percentage', 'income_interest_rate',
-            'basic_daily_fee', 'means_tested_fee', 'means_tested_lifetime_limit',
-            'special_services_fee', 'pension_initial', 'pension_final',
-            'incidental_expenditure_mthly', 'asset_interest_percentage'
-        ]
-        int_fields = ['months_till_house_sale', 'total_months_after_sale']
-        date_fields = ['start_date']
-
-        for f in float_fields:
-            args[f] = float(args[f])
-        for f in int_fields:
-            args[f] = int(args[f])
-        for f in date_fields:
-            args[f] = datetime.datetime.strptime(args[f], "%Y-%m-%d").date()
-
-        results = agedcare_sim.simulate_finances(**args)
-
-        tmpdir = tempfile.mkdtemp()
-        csv_path = os.path.join(tmpdir, f"{base_filename}.csv")
-        excel_path = os.path.join(tmpdir, f"{base_filename}.xlsx")
-
-        agedcare_sim.save_csv(csv_path, results)
-        agedcare_sim.save_excel(excel_path, results)
-
-        item_id = str(uuid.uuid4())
-        history.append({
-            "id": item_id,
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "params": params,
-            "files": {"csv": csv_path, "excel": excel_path}
-        })
+        args = scenario_input.coerce_scenario(params)
 
+        timer = instrument.StageTimer() if trace else None
+        # recorded before it is queued, so the job always finds its row
+        run_id = str(uuid.uuid4())
+        history.add(run_id, params, result_cache.scenario_key(args), base_filename)
+        try:
+            job = job_queue.submit(_simulation_job, args, timer, description="simulate", job_id=run_id)
+        except jobs.QueueFull:
+            history.discard(run_id)
+            raise
+
+        if _wants_json():
+            return jsonify(dict(job.as_dict(), status_url=url_for('job_status', job_id=job.id))), 202
         return redirect(url_for('index'))
 
+    except scenario_input.ScenarioError as e:
+        return jsonify({"error": str(e), "fields": e.errors}), 400
+    except jobs.QueueFull as e:
+        return jsonify({"error": f"Too many simulations queued, try again shortly ({e})"}), 429
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 
+# jobs whose result is a JSON-able dict, returned with their status once done
+JSON_RESULT_JOBS = ("solve", "api batch")
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    Status and progress (0 to 1) of a submitted job, and the result of a
+    finished JSON_RESULT_JOBS job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    status = job.as_dict()
+    if job.status == jobs.DONE and job.description in JSON_RESULT_JOBS:
+        status["result"] = job.result
+    if job.status == jobs.DONE and history.get(job_id) is not None:
+        status["downloads"] = {
+            file_type: url_for('download', item_id=job_id, type=file_type) for file_type in ("csv", "excel")
+        }
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if not job.cancel():
+        return jsonify(dict(job.as_dict(), error="Job already finished")), 409
+    # a job that never started will not record its cancellation itself
+    history.update(job_id, jobs.CANCELLED, only_from=jobs.PENDING)
+    if _wants_json():
+        return jsonify(job.as_dict()), 202
+    return redirect(url_for('index'))
+
+
+def _solve_job(job, args, years, tolerance):
+    response = {}
+    min_months = 0
+    if years is not None:
+        min_months = int(round(years * 12))
+        rad = solver.max_affordable_rad(args, years, tolerance)
+        response["years"] = years
+        response["max_rad"] = None if rad is None or math.isinf(rad) else round(rad, 2)
+        response["rad_unconstrained"] = rad is not None and math.isinf(rad)
+        if rad is None or math.isinf(rad):
+            return response
+        args = dict(args, rad=rad)
+    response["depletion_month"] = solver.depletion_month(args, None, min_months)
+    return response
+
+
+@app.route('/solve', methods=['POST'])
+def solve():
+    """
+    Largest affordable RAD (when 'years' is given) and the depletion month,
+    for the simulation fields posted as a form or JSON object. Answers 202
+    with the job; its status_url gives the answer as "result" once done.
+    """
+    try:
+        params = request.get_json(silent=True) or request.form.to_dict()
+        params = {k: str(v) for k, v in params.items()}
+        years = params.pop('years', '')
+        tolerance = float(params.pop('tolerance', '') or 1.0)
+        args = scenario_input.coerce_scenario(params, optional=('rad',))
+        years = float(years) if years else None
+        if years is not None and not 0 < years * 12 <= scenario_input.MAX_HORIZON_MONTHS:
+            raise scenario_input.ScenarioError(
+                {"years": f"must be above 0 and at most {scenario_input.MAX_HORIZON_MONTHS // 12}"})
+    except scenario_input.ScenarioError as e:
+        return jsonify({"error": str(e), "fields": e.errors}), 400
+    except ValueError as e:
+        return jsonify({"error": f"years and tolerance must be numbers ({e})"}), 400
+    if years is None and 'rad' not in args:
+        return jsonify({"error": "give rad, or years to solve for it"}), 400
+
+    try:
+        job = job_queue.submit(_solve_job, args, years, tolerance, description="solve")
+    except jobs.QueueFull as e:
+        return jsonify({"error": f"Too many simulations queued, try again shortly ({e})"}), 429
+    return jsonify(dict(job.as_dict(), status_url=url_for('job_status', job_id=job.id))), 202
+
+
+def _job_failure(e):
+    """
+    JSON error response for a job that ended without a result: cancelled
+    (409), rejected its input (422) or failed (500).
+    """
+    if isinstance(e, jobs.JobCancelled):
+        return jsonify({"error": "Job cancelled"}), 409
+    if isinstance(e, ValueError):
+        return jsonify({"error": str(e)}), 422
+    app.logger.error("job failed: %s", e)
+    return jsonify({"error": f"Simulation failed: {e}"}), 500
+
+
+def _batch_chunk_job(job, scenarios):
+    result = batch_sim.simulate_finances_shared(scenarios)
+    return [result.result(i) for i in range(len(result))]
+
+
+def _submit_chunk(scenarios):
+    return job_queue.submit(_batch_chunk_job, scenarios, description="api batch chunk")
+
+
+def _batch_results(chunks, first_job=None, progress=None):
+    """
+    (index, SimulationResult) for every scenario, in order. Up to
+    API_WINDOW chunks are queued at once, so they run in parallel, and the
+    next is queued as the oldest is handed out (sooner if the queue is full
+    and nothing of ours is waiting). progress(chunks done) is called after
+    each chunk. Chunks still queued are cancelled if the caller stops early.
+    """
+    pending = deque([first_job] if first_job is not None else [])
+    submitted = len(pending)
+    index = 0
+    try:
+        for done in range(len(chunks)):
+            while submitted < len(chunks) and len(pending) < API_WINDOW:
+                try:
+                    pending.append(_submit_chunk(chunks[submitted]))
+                except jobs.QueueFull:
+                    if not pending:
+                        raise
+                    break
+                submitted += 1
+            for result in pending.popleft().wait():
+                yield index, result
+                index += 1
+            if progress is not None:
+                progress(done + 1)
+    finally:
+        for job in pending:
+            job.cancel()
+
+
+def _api_batch_job(job, chunks):
+    """
+    The format=json answer, run as a job coordinating the chunk jobs.
+    """
+    results = [
+        {"index": i, "columns": r.as_columns()}
+        for i, r in _batch_results(chunks, progress=lambda done: job.update(done / len(chunks)))
+    ]
+    return {"results": results}
+
+
+@app.route('/api/v1/simulate', methods=['POST'])
+def api_simulate():
+    """
+    Simulate a JSON array of scenarios (objects with the form's fields, or
+    {"scenarios": [...]}). Every scenario is validated before any runs;
+    problems come back together as 422. They are simulated in chunks
+    through the batch engine on the job queue.
+
+    ?format=json (default) answers 202 with a job; once it is done its
+    status_url gives {"results": [{"index", "columns"}]} as "result", with
+    each result's columns as lists. ?format=ndjson streams one JSON line
+    per scenario as chunks finish, or per month with &lines=month.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('scenarios')
+    if not isinstance(payload, list):
+        return jsonify({"error": "expected a JSON array of scenarios"}), 400
+    if len(payload) > API_MAX_SCENARIOS:
+        return jsonify({"error": f"at most {API_MAX_SCENARIOS} scenarios per request"}), 413
+    fmt = request.args.get('format', 'json')
+    lines = request.args.get('lines', 'scenario')
+    if fmt not in ('json', 'ndjson') or lines not in ('scenario', 'month'):
+        return jsonify({"error": "format must be json or ndjson, lines scenario or month"}), 400
+
+    args, errors = scenario_input.validate_scenarios(payload)
+    if errors:
+        return jsonify({"error": "invalid scenarios", "scenarios": errors}), 422
+
+    chunks = [args[i:i + API_CHUNK_SIZE] for i in range(0, len(args), API_CHUNK_SIZE)]
+    try:
+        if fmt == 'json':
+            job = job_queue.coordinate(_api_batch_job, chunks, description="api batch")
+            return jsonify(dict(job.as_dict(), status_url=url_for('job_status', job_id=job.id))), 202
+        first_job = _submit_chunk(chunks[0]) if chunks else None
+    except jobs.QueueFull as e:
+        return jsonify({"error": f"Too many simulations queued, try again shortly ({e})"}), 429
+
+    def stream():
+        try:
+            for i, result in _batch_results(chunks, first_job):
+                if lines == 'month':
+                    for row in result.to_dicts():
+                        yield json.dumps(dict(row, index=i)) + "\n"
+                else:
+                    yield json.dumps({"index": i, "columns": result.as_columns()}) + "\n"
+        except Exception as e:
+            # the status line has gone already; report the failure in the stream
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return app.response_class(stream(), mimetype='application/x-ndjson')
+
+
+# Response surfaces run as "surface" jobs and are looked up by job id; the
+# most recent are remembered by scenario, so repeating a request reuses them.
+SURFACE_VARY = ["rad", "dap_percentage", "months_till_house_sale"]
+surface_jobs = result_cache.ResultCache(max_entries=int(os.environ.get("AGEDCARE_SURFACE_CACHE_SIZE", "32")))
+
+
+def _surface_job(job, args, names):
+    return surface.build_surface(args, names)
+
+
+def _surface_exact_job(job, response_surface, point):
+    return response_surface.exact(point)
+
+
+@app.route('/api/v1/surface', methods=['POST'])
+def api_surface():
+    """
+    Precompute a response surface in the background, for
+    {"scenario": {form fields}, "vary": ["rad", ...]} (default: rad,
+    dap_percentage and months_till_house_sale). Answers 202 with the job,
+    or 200 when the same surface is already built; points are then
+    answered by GET surface_url.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('scenario'), dict):
+        return jsonify({"error": "expected {\"scenario\": {...}, \"vary\": [...]}"}), 400
+    names = payload.get('vary', SURFACE_VARY)
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        return jsonify({"error": "vary must be a list of field names"}), 400
+    names = [name.replace('-', '_') for name in names]
+    try:
+        args = scenario_input.coerce_scenario(payload['scenario'])
+        surface.grid_axes(args, names)
+    except scenario_input.ScenarioError as e:
+        return jsonify({"error": str(e), "fields": e.errors}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key = result_cache.scenario_key(args, kind="surface:" + ",".join(names))
+    job_id = surface_jobs.get(key)
+    job = job_queue.get(job_id) if job_id is not None else None
+    if job is None or job.status in (jobs.FAILED, jobs.CANCELLED):
+        try:
+            job = job_queue.submit(_surface_job, args, names, description="surface")
+        except jobs.QueueFull as e:
+            return jsonify({"error": f"Too many simulations queued, try again shortly ({e})"}), 429
+        surface_jobs.put(key, job.id)
+    return jsonify(dict(
+        job.as_dict(),
+        status_url=url_for('job_status', job_id=job.id),
+        surface_url=url_for('api_surface_point', job_id=job.id),
+    )), 200 if job.status == jobs.DONE else 202
+
+
+@app.route('/api/v1/surface/<job_id>')
+def api_surface_point(job_id):
+    """
+    The summary at a point given as query arguments (every varied field),
+    interpolated from the surface and flagged "interpolated" unless it is
+    a grid point. &exact=1 simulates the point instead, e.g. once a slider
+    is released. With no point, the grid itself.
+    """
+    job = job_queue.get(job_id)
+    if job is None or job.description != "surface":
+        return jsonify({"error": "Surface not found"}), 404
+    if not job.done:
+        return jsonify({"error": "Surface not ready", "status": job.status, "progress": job.progress}), 409
+    if job.status != jobs.DONE:
+        return jsonify({"error": f"Surface {job.status}"}), 404
+    response_surface = job.result
+
+    raw = {k: v for k, v in request.args.items() if k != 'exact'}
+    if not raw:
+        return jsonify(dict(response_surface.as_dict(), bounds=response_surface.bounds()))
+    try:
+        point = scenario_input.coerce_scenario(raw, optional=list(scenario_input.FIELD_TYPES))
+    except scenario_input.ScenarioError as e:
+        return jsonify({"error": str(e), "fields": e.errors}), 400
+    errors = {name: "missing" for name in response_surface.axes if name not in point}
+    errors.update({name: "not varied on this surface" for name in point if name not in response_surface.axes})
+    if errors:
+        return jsonify({"error": "give a value for each varied field", "fields": errors}), 400
+
+    if request.args.get('exact') == '1':
+        try:
+            response_surface.check_point(point)
+        except ValueError as e:
+            return jsonify({"error": str(e), "bounds": response_surface.bounds()}), 422
+        try:
+            values = job_queue.submit(_surface_exact_job, response_surface, point, description="surface exact").wait()
+        except jobs.QueueFull as e:
+            return jsonify({"error": f"Too many simulations queued, try again shortly ({e})"}), 429
+        except Exception as e:
+            return _job_failure(e)
+        return jsonify({"point": point, "values": values, "interpolated": False, "exact": True})
+    try:
+        values, interpolated = response_surface.lookup(point)
+    except ValueError as e:
+        return jsonify({"error": str(e), "bounds": response_surface.bounds()}), 422
+    return jsonify({"point": point, "values": values, "interpolated": interpolated, "exact": False})
+
+
+@app.route('/cache')
+def cache_stats():
+    """
+    Hit and miss counters of the shared result cache.
+    """
+    return jsonify(result_cache.default_cache().stats())
+
+
 @app.route('/download/<item_id>')
 def download(item_id):
+    """
+    The simulation's results as CSV or Excel, built in memory from the
+    stored results on first download. The ETag identifies the parameters and rules, so a client
+    holding a copy gets 304 without the export being rebuilt.
+    """
     file_type = request.args.get("type")
-    if file_type not in ["csv", "excel"]:
+    if file_type not in agedcare_sim.EXPORT_TYPES:
         return jsonify({"error": "Invalid type"}), 400
 
-    for item in history:
-        if item["id"] == item_id:
-            file_path = item["files"][file_type]
-            if file_path and os.path.exists(file_path):
-                mime = "text/csv" if file_type == "csv" else \
-                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                return send_file(file_path, mimetype=mime, as_attachment=True,
-                                 download_name=os.path.basename(file_path))
-            return jsonify({"error": "File not found"}), 404
+    item = history.get(item_id)
+    if item is None:
+        return jsonify({"error": "Item not found"}), 404
+    if item["status"] in (jobs.PENDING, jobs.RUNNING):
+        return jsonify({"error": "Simulation not finished", "status": item["status"]}), 409
+    if item["status"] != jobs.DONE:
+        return jsonify({"error": f"Simulation {item['status']}"}), 404
 
-    return jsonify({"error": "Item not found"}), 404
+    # workbooks carry a creation timestamp, so they are only equivalent, not identical
+    etag = f"{item['param_hash']}-{file_type}"
+    weak = file_type == "excel"
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag, weak=weak)
+        return response
+
+    def build():
+        results = history.result(item_id)
+        if results is None:
+            raise LookupError(item_id)
+        return agedcare_sim.export_bytes(results, file_type)
+
+    try:
+        data = export_cache.get_or_compute(etag, build)
+    except LookupError:
+        return jsonify({"error": "Stored results are missing or unreadable; run the simulation again"}), 410
+    mime, extension = agedcare_sim.EXPORT_TYPES[file_type]
+    response = send_file(io.BytesIO(data), mimetype=mime, as_attachment=True,
+                         download_name=f"{item['filename']}.{extension}", etag=False)
+    response.set_etag(etag, weak=weak)
+    return response
 
 
 if __name__ == "__main__":
-    app.run(host"0.0.0.0",debug=True, port=5000)
+    app.run(host="0.0.0.0", debug=True, port=5000, threaded=True)
@@ -17,6 +17,7 @@ python -m aged_care_calcs.agedcare_sim \
     --pension-final 2200 \
     --incidental-expenditure-mthly 400 \
     --asset-interest-percentage 70 \
+    --table \
     --csv out.csv \
     --excel out.xlsx
 
@@ -0,0 +1,27 @@
+"""
+Shared fixtures: the Flask app with its run history on a throwaway database.
+"""
+import pytest
+
+from aged_care_calcs import history as run_history
+from aged_care_calcs import jobs
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    """
+    The app module, with a fresh run history and job queue for the test.
+    """
+    monkeypatch.setenv("AGEDCARE_HISTORY_DB", str(tmp_path / "import.db"))
+    import app as web_app
+
+    monkeypatch.setattr(web_app, "history", run_history.RunHistory(str(tmp_path / "history.db")))
+    queue = jobs.JobQueue(2, 4, thread_name_prefix="test")
+    monkeypatch.setattr(web_app, "job_queue", queue)
+    yield web_app
+    queue.shutdown(wait=True)
+
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
@@ -0,0 +1,120 @@
+"""
+Scenario validation and the JSON / NDJSON batch simulation API.
+"""
+import datetime
+import json
+import threading
+
+import pytest
+
+from aged_care_calcs import agedcare_sim, jobs, scenarios
+
+
+def _form(**changes):
+    form = {name.replace("_", "-"): str(value) for name, value in agedcare_sim.DEFAULT_SCENARIO.items()}
+    form["total-months-after-sale"] = "24"
+    form.update(changes)
+    return form
+
+
+def test_coerce_scenario_reports_every_bad_field():
+    with pytest.raises(scenarios.ScenarioError) as raised:
+        scenarios.coerce_scenario(dict(_form(rad="abc", **{"start-date": "2025-13-01"}), colour="red"))
+    assert set(raised.value.errors) == {"rad", "start_date", "colour"}
+    args = scenarios.coerce_scenario(_form())
+    assert args["start_date"] == datetime.date(2025, 11, 4) and args["months_till_house_sale"] == 6
+
+
+@pytest.mark.parametrize("field, value", [
+    ("rad", -1.0), ("dap_percentage", 101.0), ("initial_assets", float("nan")), ("total_months_after_sale", 2000),
+])
+def test_check_scenario_ranges(field, value):
+    assert field in scenarios.check_scenario(dict(agedcare_sim.DEFAULT_SCENARIO, **{field: value}))
+
+
+def test_check_scenario_allows_negative_interest():
+    assert scenarios.check_scenario(dict(agedcare_sim.DEFAULT_SCENARIO, income_interest_rate=-0.5)) == {}
+
+
+def _cli(sub_command, *changes):
+    argv = [] if sub_command is None else [sub_command]
+    for name, value in dict(agedcare_sim.DEFAULT_SCENARIO, **dict(changes)).items():
+        argv += [f"--{name.replace('_', '-')}", str(value)]
+    return argv
+
+
+@pytest.mark.parametrize("sub_command", [None, "sweep", "montecarlo", "solve"])
+def test_every_cli_entry_point_range_checks(sub_command, capsys):
+    with pytest.raises(SystemExit) as exited:
+        agedcare_sim.main(_cli(sub_command, ("special_services_fee", -70), ("total_months_after_sale", 1300)))
+    assert exited.value.code == 2
+    error = capsys.readouterr().err
+    assert "--special-services-fee: must be at least 0" in error
+    assert "must be at most 1200" in error
+
+
+def test_sweep_checks_each_listed_value(capsys):
+    with pytest.raises(SystemExit):
+        agedcare_sim.main(_cli("sweep", ("dap_percentage", "5,150")))
+    assert "--dap-percentage: must be at most 100" in capsys.readouterr().err
+
+
+def test_invalid_scenarios_answer_422_together(client):
+    response = client.post("/api/v1/simulate", json=[_form(), _form(rad="-5"), "nope"])
+    assert response.status_code == 422
+    body = response.get_json()
+    assert [problem["index"] for problem in body["scenarios"]] == [1, 2]
+
+
+def test_request_limits(web, client, monkeypatch):
+    monkeypatch.setattr(web, "API_MAX_SCENARIOS", 2)
+    assert client.post("/api/v1/simulate", json=[_form()] * 3).status_code == 413
+    assert client.post("/api/v1/simulate", json={"not": "a list"}).status_code == 400
+    assert client.post("/api/v1/simulate?format=xml", json=[_form()]).status_code == 400
+
+
+def test_json_answers_202_then_results(web, client, monkeypatch):
+    monkeypatch.setattr(web, "API_CHUNK_SIZE", 2)
+    forms = [_form(rad=str(rad)) for rad in (0, 250000, 500000, 750000, 1000000)]
+    response = client.post("/api/v1/simulate", json={"scenarios": forms})
+    assert response.status_code == 202
+    submitted = response.get_json()
+    web.job_queue.get(submitted["id"]).wait(30)
+    status = client.get(submitted["status_url"]).get_json()
+    assert status["status"] == jobs.DONE
+    results = status["result"]["results"]
+    assert [r["index"] for r in results] == list(range(5))
+    for form, result in zip(forms, results):
+        expected = agedcare_sim.simulate_finances(**scenarios.coerce_scenario(form))
+        assert result["columns"] == expected.as_columns()
+
+
+def test_chunks_run_in_parallel(web, client, monkeypatch):
+    # each chunk waits for another to be running at the same time
+    together = threading.Barrier(2, timeout=10)
+    run_chunk = web._batch_chunk_job
+
+    def chunk_job(job, chunk):
+        together.wait()
+        return run_chunk(job, chunk)
+
+    monkeypatch.setattr(web, "_batch_chunk_job", chunk_job)
+    monkeypatch.setattr(web, "API_CHUNK_SIZE", 1)
+    monkeypatch.setattr(web, "API_WINDOW", 2)
+    response = client.post("/api/v1/simulate?format=ndjson", json=[_form(), _form(rad="0")])
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["index"] for line in lines] == [0, 1]
+
+
+def test_ndjson_month_lines(client):
+    response = client.post("/api/v1/simulate?format=ndjson&lines=month", json=[_form(), _form(rad="0")])
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 2 * 30
+    assert lines[0]["index"] == 0 and lines[0]["month"] == 1 and lines[-1]["index"] == 1
+
+
+def test_solve_checks_years(client):
+    response = client.post("/solve", json=dict(_form(), years="500"))
+    assert response.status_code == 400
+    assert "years" in response.get_json()["fields"]
@@ -0,0 +1,95 @@
+"""
+The batch file runner: summaries, per-row failures, duplicate ids and time limits.
+"""
+import csv
+import json
+import time
+
+import pytest
+
+from aged_care_calcs import agedcare_sim, batch
+
+
+def _row(**changes):
+    row = {name: str(value) for name, value in agedcare_sim.DEFAULT_SCENARIO.items()}
+    row["total_months_after_sale"] = "24"
+    row.update({name: str(value) for name, value in changes.items()})
+    return row
+
+
+def _write(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def _summary(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_summary_and_outputs(tmp_path):
+    rows = [_row(id=f"r{i}", rad=i * 100000) for i in range(5)]
+    done, failed = batch.run_batch(_write(tmp_path / "in.csv", rows), str(tmp_path / "summary.csv"),
+                                   output_dir=str(tmp_path / "out"), workers=1, chunksize=2)
+    assert (done, failed) == (5, 0)
+    summary = _summary(tmp_path / "summary.csv")
+    assert [s["id"] for s in summary] == [f"r{i}" for i in range(5)]
+    for row, s in zip(rows, summary):
+        scenario = {k: v for k, v in row.items() if k != "id"}
+        result = agedcare_sim.simulate_finances(**batch.coerce_scenario(scenario))
+        assert float(s["final_assets"]) == pytest.approx(result.final(), abs=0.01)
+        assert (tmp_path / "out" / s["output"]).exists()
+
+
+def test_bad_and_duplicate_rows_fail_alone(tmp_path):
+    rows = [_row(id="a"), _row(id="b", rad="-1"), _row(id="a"), _row(id="a/b"), _row(id="a_b")]
+    done, failed = batch.run_batch(_write(tmp_path / "in.csv", rows), str(tmp_path / "summary.jsonl"), workers=1)
+    assert (done, failed) == (5, 3)
+    summary = [json.loads(line) for line in open(tmp_path / "summary.jsonl")]
+    assert [s["status"] for s in summary] == ["ok", "failed", "failed", "ok", "failed"]
+    assert "already used by row 1" in summary[2]["error"]
+    assert "same file name as row 4" in summary[4]["error"]
+
+
+def test_jsonl_input(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text(json.dumps(_row()) + "\n" + "not json\n" + json.dumps([1]) + "\n")
+    assert batch.run_batch(str(path), str(tmp_path / "summary.csv"), workers=1) == (3, 2)
+
+
+def test_slow_row_is_isolated_by_halving(tmp_path, monkeypatch):
+    simulate = batch._simulate
+    runs = []
+
+    def slow_simulate(rows):
+        runs.append(len(rows))
+        outcome = simulate(rows)
+        # files are written by now, so a stopped run leaves some behind
+        if any(row_id == "slow" for _, row_id, _ in rows):
+            time.sleep(5)
+        return outcome
+
+    monkeypatch.setattr(batch, "_simulate", slow_simulate)
+    rows = [_row(id=f"r{i}") for i in range(16)]
+    rows[11]["id"] = "slow"
+    output_dir = tmp_path / "out"
+    done, failed = batch.run_batch(_write(tmp_path / "in.csv", rows), str(tmp_path / "summary.csv"),
+                                   output_dir=str(output_dir), workers=1, chunksize=16, row_timeout=0.3)
+    assert (done, failed) == (16, 1)
+    summary = _summary(tmp_path / "summary.csv")
+    assert [s["id"] for s in summary if s["status"] == "failed"] == ["slow"]
+    assert "timed out" in summary[11]["error"]
+    # halved down to the slow row rather than rerun a row at a time
+    assert sorted(runs, reverse=True) == [16, 8, 8, 4, 4, 2, 2, 1, 1]
+    assert sorted(p.name for p in output_dir.iterdir()) == sorted(f"r{i}.csv" for i in range(16) if i != 11)
+
+
+def test_chunk_limit_grows_with_rows():
+    batch._init_worker(None, None, row_timeout=10.0)
+    assert batch._chunk_limit(1) == pytest.approx(10.0, rel=0.01)
+    assert batch._chunk_limit(batch.CHUNK_ROWS) == 20.0
+    batch._init_worker(None, None, row_timeout=0)
+    assert not batch._chunk_limit(batch.CHUNK_ROWS)
@@ -0,0 +1,55 @@
+"""
+Benchmark timing, comparison against a baseline and the flask benchmark's isolation.
+"""
+import os
+
+from aged_care_calcs import benchmark
+
+
+def _suite(seconds, host=None):
+    return {
+        "format": benchmark.BENCH_FORMAT,
+        "host": host or benchmark.host_info(),
+        "results": {name: {"seconds": s} for name, s in seconds.items()},
+    }
+
+
+def test_measure_reports_time_and_calls_teardown():
+    calls = []
+    bench = benchmark.Benchmark(
+        "noop", lambda state: state.append(1), setup=list, teardown=calls.append, household_months=10,
+    )
+    result = benchmark.measure(bench, min_time=0.001, repeat=2)
+    assert result["seconds"] > 0
+    assert result["throughput"] == 10 / result["seconds"]
+    assert len(calls) == 1 and len(calls[0]) >= result["calls"]
+
+
+def test_compare_flags_regressions():
+    rows = benchmark.compare(_suite({"a": 1.0, "b": 1.0, "gone": 1.0}), _suite({"a": 1.05, "b": 1.5}), threshold=10)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [("a", False), ("b", True)]
+
+
+def test_compare_cli(tmp_path, capsys):
+    baseline, current, other = (str(tmp_path / name) for name in ("base.json", "now.json", "other.json"))
+    benchmark.save(baseline, _suite({"a": 1.0}))
+    benchmark.save(current, _suite({"a": 1.5}))
+    benchmark.save(other, _suite({"a": 1.0}, host={"node": "elsewhere"}))
+    assert benchmark.main(["compare", baseline, current, "--threshold", "10"]) == 1
+    assert benchmark.main(["compare", baseline, current, "--threshold", "60"]) == 0
+    assert benchmark.main(["compare", other, current]) == 2
+    assert benchmark.main(["compare", other, current, "--any-host", "--threshold", "60"]) == 0
+    assert "different host" in capsys.readouterr().out
+
+
+def test_flask_setup_leaves_environment_and_history_alone(monkeypatch):
+    monkeypatch.delenv("AGEDCARE_HISTORY_DB", raising=False)
+    state = benchmark._flask_setup()
+    web = state[0]
+    server_history = state[-1]
+    assert "AGEDCARE_HISTORY_DB" not in os.environ
+    assert web.history is not server_history
+    benchmark._flask_round_trip(state)
+    assert web.history.count() == 1
+    benchmark._flask_teardown(state)
+    assert web.history is server_history
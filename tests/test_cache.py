@@ -0,0 +1,91 @@
+"""
+ResultCache keys, LRU, disk tier format and size-capped eviction.
+"""
+import datetime
+import os
+
+import pytest
+
+from aged_care_calcs import agedcare_sim, cache
+from aged_care_calcs.results import SimulationResult
+from aged_care_calcs.timeline import LumpSum
+
+
+def test_key_normalises_values():
+    scenario = agedcare_sim.DEFAULT_SCENARIO
+    same = dict(scenario, initial_assets=140000, start_date=scenario["start_date"].isoformat())
+    assert cache.scenario_key(scenario) == cache.scenario_key(same)
+    assert cache.scenario_key(scenario) != cache.scenario_key(dict(scenario, rad=1.0))
+    assert cache.scenario_key(scenario) != cache.scenario_key(scenario, kind="summary")
+    assert cache.scenario_key(scenario) != cache.scenario_key(scenario, events=[LumpSum(3, 100.0)])
+
+
+def test_lru_evicts_least_recently_used():
+    lru = cache.ResultCache(max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.stats()["hits"] == 3 and lru.stats()["misses"] == 1
+
+
+def test_disk_tier_round_trip(tmp_path):
+    result = agedcare_sim.simulate_finances(**agedcare_sim.DEFAULT_SCENARIO)
+    first = cache.ResultCache(directory=str(tmp_path))
+    first.put("result", result)
+    first.put("summary", {"final_assets": 1.5, "depletion_month": None})
+    first.put("memory only", object())
+    files = sorted(os.listdir(tmp_path))
+    assert files == ["result" + cache.CACHE_SUFFIX, "summary" + cache.CACHE_SUFFIX]
+    # typed columns and JSON, never a pickle
+    assert (tmp_path / files[0]).read_bytes()[:1] == b"R"
+    assert (tmp_path / files[1]).read_bytes()[:1] == b"J"
+
+    second = cache.ResultCache(directory=str(tmp_path))
+    again = second.get("result")
+    assert isinstance(again, SimulationResult) and again == result
+    assert second.get("summary") == {"final_assets": 1.5, "depletion_month": None}
+    assert second.stats()["disk_hits"] == 2
+
+
+def test_unreadable_file_is_a_miss(tmp_path):
+    (tmp_path / ("bad" + cache.CACHE_SUFFIX)).write_bytes(b"\x80\x04not a cache entry")
+    assert cache.ResultCache(directory=str(tmp_path)).get("bad", "missing") == "missing"
+
+
+def _entry(n):
+    return {"payload": "x" * n}
+
+
+def test_disk_cap_evicts_oldest_files(tmp_path):
+    size = len(cache._encode(_entry(1000)))
+    disk = cache.ResultCache(max_entries=1, directory=str(tmp_path), max_disk_bytes=size * 3)
+    for i, key in enumerate("abcd"):
+        disk.put(key, _entry(1000))
+        os.utime(tmp_path / (key + cache.CACHE_SUFFIX), (1000 + i, 1000 + i))
+    disk.put("e", _entry(1000))
+    left = sorted(name[0] for name in os.listdir(tmp_path))
+    assert "a" not in left and "e" in left
+    assert disk.stats()["disk_bytes"] <= size * 3
+    assert disk.stats()["evictions"] >= 1
+
+
+def test_overwriting_a_key_does_not_grow_the_count(tmp_path):
+    size = len(cache._encode(_entry(1000)))
+    disk = cache.ResultCache(directory=str(tmp_path), max_disk_bytes=size * 3)
+    disk.put("a", _entry(10))
+    for _ in range(10):
+        disk.put("b", _entry(1000))
+    assert disk.stats()["disk_bytes"] == len(cache._encode(_entry(10))) + size
+    assert disk.stats()["evictions"] == 0
+    assert disk.get("a") == _entry(10)
+
+
+def test_cached_simulate_reuses_the_result():
+    results = cache.ResultCache()
+    scenario = dict(agedcare_sim.DEFAULT_SCENARIO, start_date=datetime.date(2025, 1, 1))
+    first = cache.cached_simulate(scenario, cache=results)
+    assert cache.cached_simulate(scenario, cache=results) is first
+    assert first == agedcare_sim.simulate_finances(**scenario)
@@ -0,0 +1,83 @@
+"""
+Checkpoints, prefix keys and the shared pre-sale runs built on them.
+"""
+from aged_care_calcs import agedcare_sim, batch_sim
+from aged_care_calcs.agedcare_sim import DEFAULT_SCENARIO, Simulation, prefix_key
+from aged_care_calcs.timeline import LumpSum
+
+
+def _scenario(**changes):
+    return dict(DEFAULT_SCENARIO, **changes)
+
+
+def _assets(result):
+    return list(result.columns["assets"])
+
+
+def test_prefix_key_ignores_post_sale_inputs():
+    base = prefix_key(_scenario())
+    assert prefix_key(_scenario(house_value=0.0, total_months_after_sale=12)) == base
+    assert prefix_key(_scenario(months_till_house_sale=7)) != base
+    assert prefix_key(_scenario(rad=500000.0)) != base
+
+
+def test_prefix_key_ignores_rad_without_dap():
+    assert prefix_key(_scenario(dap_percentage=0.0, rad=1.0)) == prefix_key(_scenario(dap_percentage=0.0, rad=9e5))
+
+
+def test_checkpoint_is_a_value():
+    sim = Simulation(**_scenario())
+    sim.run_to(3)
+    checkpoint = sim.checkpoint()
+    sim.run_to(5)
+    assert checkpoint.month == 3
+    assert sim.checkpoint().month == 5
+    assert Simulation(**_scenario()).checkpoint().month == 0
+
+
+def test_run_to_stops_at_the_end():
+    sim = Simulation(**_scenario(total_months_after_sale=2))
+    rows = sim.run_to(100)
+    assert len(rows) == sim.n_months and sim.finished
+    assert sim.run_to(100) == []
+
+
+def test_sale_checkpoint_serves_scenarios_with_the_same_prefix():
+    sale = DEFAULT_SCENARIO["months_till_house_sale"]
+    head = Simulation(**_scenario())
+    head.run_to(sale)
+    checkpoint = head.checkpoint()
+
+    for changes in ({"house_value": 250000.0}, {"total_months_after_sale": 24}):
+        other = _scenario(**changes)
+        assert prefix_key(other) == prefix_key(DEFAULT_SCENARIO)
+        expected = agedcare_sim.simulate_finances(**other)
+        resumed = list(agedcare_sim.simulate_finances_iter(**other, checkpoint=checkpoint))
+        assert [row.assets for row in resumed] == _assets(expected)[sale:]
+
+
+def test_shared_runs_match_batch_when_forced(monkeypatch):
+    scenarios = [
+        _scenario(house_value=v, total_months_after_sale=n, months_till_house_sale=sale)
+        for sale in (0, 6, 18) for v in (0.0, 600000.0) for n in (0, 36)
+    ]
+    monkeypatch.setattr(batch_sim, "_sharing_pays", lambda scenarios, groups: True)
+    shared = batch_sim.simulate_finances_shared(scenarios)
+    expected = batch_sim.simulate_finances_batch(scenarios)
+    for i in range(len(scenarios)):
+        assert _assets(shared.result(i)) == _assets(expected.result(i))
+        assert shared.result(i).columns["fees_total"] == expected.result(i).columns["fees_total"]
+
+
+def test_shared_runs_with_events_fall_back_to_batch(monkeypatch):
+    def no_sharing(*_):
+        raise AssertionError("events must not share a prefix")
+
+    monkeypatch.setattr(batch_sim, "_sharing_pays", no_sharing)
+    scenarios = [_scenario(house_value=v) for v in (0.0, 500000.0)]
+    events = [[LumpSum(when=2, amount=10000.0)], []]
+    shared = batch_sim.simulate_finances_shared(scenarios, events=events)
+    expected = batch_sim.simulate_finances_batch(scenarios, events=events)
+    for i in range(len(scenarios)):
+        assert _assets(shared.result(i)) == _assets(expected.result(i))
+
@@ -0,0 +1,54 @@
+"""
+The simulator CLI: quiet default output, --table, and startup without heavy imports.
+"""
+import os
+import subprocess
+import sys
+
+from aged_care_calcs import agedcare_sim, benchmark
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _cli(*extra, code=None):
+    args = ["-m", "aged_care_calcs.agedcare_sim"] if code is None else ["-c", code]
+    proc = subprocess.run(
+        [sys.executable, *args, *benchmark._cli_args(), *extra],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return proc.stdout
+
+
+def test_default_output_is_one_summary_line():
+    out = _cli().splitlines()
+    assert len(out) == 1
+    assert "final assets" in out[0] and "total fees" in out[0]
+
+
+def test_table_prints_every_month():
+    out = _cli("--table").splitlines()
+    months = agedcare_sim.DEFAULT_SCENARIO["months_till_house_sale"] + agedcare_sim.DEFAULT_SCENARIO["total_months_after_sale"]
+    assert out[0].startswith("Month")
+    assert len(out) >= months + 1
+
+
+def test_quiet_prints_nothing():
+    assert _cli("--quiet") == ""
+
+
+def test_cli_run_does_not_import_openpyxl_or_dateutil():
+    code = (
+        "import sys, runpy\n"
+        "try:\n"
+        "    runpy.run_module('aged_care_calcs.agedcare_sim', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in ('openpyxl', 'dateutil') if m in sys.modules))\n"
+    )
+    # -c leaves the scenario flags in sys.argv[1:] for the module's parser
+    assert _cli("--quiet", code=code).strip() == "[]"
+
+
+def test_fin_sim_script_asks_for_the_table():
+    with open(os.path.join(ROOT, "fin_sim.sh")) as f:
+        assert "--table" in f.read()
@@ -0,0 +1,19 @@
+"""
+Concurrent simulate_finances runs must give exactly the serial results.
+"""
+from aged_care_calcs import agedcare_sim, threaded
+
+
+def test_concurrent_runs_match_serial():
+    assert threaded.stress_check(workers=16, rounds=4) == []
+
+
+def test_simulate_many_keeps_order():
+    scenarios = threaded.stress_scenarios()[:8]
+    results = threaded.simulate_many(scenarios, max_workers=4)
+    assert results == [agedcare_sim.simulate_finances(**s) for s in scenarios]
+
+
+def test_stress_cli_reports_success(capsys):
+    assert threaded.main(["--workers", "8", "--rounds", "2"]) == 0
+    assert "✅" in capsys.readouterr().out
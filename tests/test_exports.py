@@ -0,0 +1,59 @@
+"""
+On-demand CSV/Excel exports and the download endpoint.
+"""
+import csv
+import io
+
+from aged_care_calcs import agedcare_sim, jobs
+
+
+def _result():
+    return agedcare_sim.simulate_finances(**dict(agedcare_sim.DEFAULT_SCENARIO, total_months_after_sale=6))
+
+
+def test_csv_export_matches_rows():
+    result = _result()
+    rows = list(csv.reader(io.StringIO(agedcare_sim.export_bytes(result, "csv").decode())))
+    assert rows[0] == result.fieldnames()
+    assert len(rows) == len(result) + 1
+    assert float(rows[-1][2]) == result[-1]["assets"]
+
+
+def test_excel_export_is_a_workbook():
+    from openpyxl import load_workbook
+
+    sheet = load_workbook(io.BytesIO(agedcare_sim.export_bytes(_result(), "excel"))).active
+    assert sheet.max_row == len(_result()) + 1
+
+
+def test_streamed_rows_export_like_the_result():
+    result = _result()
+    months = agedcare_sim.simulate_finances_iter(**dict(agedcare_sim.DEFAULT_SCENARIO, total_months_after_sale=6))
+    buffer = io.StringIO()
+    agedcare_sim.write_csv(buffer, months)
+    assert buffer.getvalue().encode() == agedcare_sim.export_bytes(result, "csv")
+
+
+def test_download_builds_once_and_honours_etags(web, client, monkeypatch):
+    web.history.add("run", {"rad": "0"}, "hash", "out")
+    assert client.get("/download/run?type=csv").status_code == 409
+    web.history.finish("run", _result())
+
+    built = []
+    export = agedcare_sim.export_bytes
+    monkeypatch.setattr(web.agedcare_sim, "export_bytes", lambda r, t: built.append(t) or export(r, t))
+    monkeypatch.setattr(web, "export_cache", web.result_cache.ResultCache(max_entries=4))
+    first = client.get("/download/run?type=csv")
+    assert first.status_code == 200
+    assert first.headers["Content-Disposition"].endswith("out.csv")
+    assert client.get("/download/run?type=csv").data == first.data
+    assert built == ["csv"]
+    assert client.get("/download/run?type=csv", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert client.get("/download/run?type=pdf").status_code == 400
+    assert client.get("/download/missing?type=csv").status_code == 404
+
+
+def test_failed_run_has_no_download(web, client):
+    web.history.add("run", {}, "hash", "out")
+    web.history.update("run", jobs.FAILED, error="boom")
+    assert client.get("/download/run?type=csv").status_code == 404
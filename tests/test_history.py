@@ -0,0 +1,181 @@
+"""
+The SQLite run history: pages, filters, pruning, abandoned runs and stored results.
+"""
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import zlib
+
+import pytest
+
+from aged_care_calcs import agedcare_sim
+from aged_care_calcs import history as run_history
+from aged_care_calcs.history import RunHistory
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "history.db")
+
+
+def _fill(history, n, start=1000.0):
+    for i in range(n):
+        history.add(f"run{i}", {"i": i}, "even" if i % 2 == 0 else "odd", f"out{i}", created=start + i)
+
+
+def _set(path, run_id, **values):
+    db = sqlite3.connect(path)
+    with db:
+        db.execute(f"UPDATE runs SET {', '.join(f'{k} = ?' for k in values)} WHERE id = ?", [*values.values(), run_id])
+    db.close()
+
+
+def test_pages_follow_the_cursor_newest_first(path):
+    history = RunHistory(path)
+    _fill(history, 7)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = history.page(limit=3, after=cursor)
+        seen += [row["id"] for row in rows]
+        if cursor is None:
+            break
+    assert seen == [f"run{i}" for i in reversed(range(7))]
+    assert history.page(limit=7)[1] is None
+
+
+def test_pages_are_stable_when_runs_are_added(path):
+    history = RunHistory(path)
+    _fill(history, 4)
+    first, cursor = history.page(limit=2)
+    history.add("newer", {}, "even", "out", created=5000.0)
+    rest, _ = history.page(limit=2, after=cursor)
+    assert [row["id"] for row in first + rest] == ["run3", "run2", "run1", "run0"]
+
+
+def test_filters(path):
+    history = RunHistory(path)
+    _fill(history, 6)
+    history.update("run1", "done")
+    assert [row["id"] for row in history.page(param_hash="odd")[0]] == ["run5", "run3", "run1"]
+    assert [row["id"] for row in history.page(status="done")[0]] == ["run1"]
+    assert [row["id"] for row in history.page(since=1002.0, until=1004.0)[0]] == ["run3", "run2"]
+
+
+def test_bad_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        run_history.parse_cursor("yesterday")
+
+
+def test_update_only_from(path):
+    history = RunHistory(path)
+    _fill(history, 1)
+    history.update("run0", "running")
+    history.update("run0", "cancelled", only_from="pending")
+    assert history.get("run0")["status"] == "running"
+
+
+def test_prune_keeps_unfinished_runs(path):
+    history = RunHistory(path, max_rows=2)
+    _fill(history, 5)
+    for i in range(4):
+        history.update(f"run{i}", "done")
+    assert history.prune() == 3
+    assert sorted(row["id"] for row in history.page()[0]) == ["run3", "run4"]
+
+
+def test_prune_by_age(path):
+    history = RunHistory(path, max_age=60)
+    history.add("old", {}, "h", "out", created=time.time() - 120)
+    history.add("old-pending", {}, "h", "out", created=time.time() - 120)
+    history.add("new", {}, "h", "out")
+    history.update("old", "done")
+    history.update("new", "done")
+    history.prune()
+    assert history.get("old") is None
+    assert history.get("old-pending") is not None and history.get("new") is not None
+
+
+def _exited_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_reopening_fails_only_runs_whose_owner_is_gone(path):
+    host = socket.gethostname()
+    history = RunHistory(path)
+    history.add("mine", {}, "h", "out", created=time.time() - 7200)
+    history.update("mine", "running")
+    for run_id, owner in (
+        ("dead-pid", f"{host} {_exited_pid()} abc"),
+        ("restarted", f"{host} {os.getpid()} not-this-process"),
+        ("live-pid", f"{host} {os.getppid()} abc"),
+        ("other-host", "elsewhere.example 1 abc"),
+        ("other-host-old", "elsewhere.example 1 abc"),
+        ("legacy", None),
+    ):
+        history.add(run_id, {}, "h", "out")
+        _set(path, run_id, owner=owner)
+    _set(path, "other-host-old", created=time.time() - 7200)
+
+    RunHistory(path, stale_after=3600)
+    status = {row["id"]: row["status"] for row in history.page()[0]}
+    assert status == {
+        "mine": "running",
+        "dead-pid": "failed",
+        "restarted": "failed",
+        "live-pid": "pending",
+        "other-host": "pending",
+        "other-host-old": "failed",
+        "legacy": "pending",
+    }
+    assert "abandoned" in history.get("dead-pid")["error"]
+
+
+def test_old_database_gains_the_owner_column(path):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE runs (seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, created REAL NOT NULL, "
+               "param_hash TEXT NOT NULL, params TEXT NOT NULL, filename TEXT NOT NULL, status TEXT NOT NULL, "
+               "error TEXT, trace TEXT)")
+    db.execute("INSERT INTO runs (id, created, param_hash, params, filename, status) "
+               "VALUES ('old', ?, 'h', '{}', 'out', 'running')", (time.time() - 7200,))
+    db.commit()
+    db.close()
+
+    history = RunHistory(path, stale_after=3600)
+    assert history.get("old")["status"] == "failed"
+    history.add("new", {}, "h", "out")
+    RunHistory(path)
+    assert history.get("new")["status"] == "pending"
+
+
+def test_result_round_trip(path):
+    history = RunHistory(path)
+    history.add("run", {}, "h", "out")
+    result = agedcare_sim.simulate_finances(**dict(agedcare_sim.DEFAULT_SCENARIO, total_months_after_sale=24))
+    history.finish("run", result, trace="timings")
+    stored = history.result("run")
+    assert stored.columns == result.columns
+    assert history.get("run")["status"] == "done" and history.get("run")["trace"] == "timings"
+    assert history.result("missing") is None
+
+
+def test_unreadable_result_is_none(path):
+    history = RunHistory(path)
+    history.add("run", {}, "h", "out")
+    history.finish("run", agedcare_sim.simulate_finances(**agedcare_sim.DEFAULT_SCENARIO))
+    db = sqlite3.connect(path)
+    with db:
+        db.execute("UPDATE results SET data = ?", (zlib.compress(b"not a result"),))
+    db.close()
+    assert history.result("run") is None
+
+
+def test_app_history_defaults_to_the_instance_folder(web, tmp_path, monkeypatch):
+    monkeypatch.delenv("AGEDCARE_HISTORY_DB")
+    monkeypatch.setattr(web.app, "instance_path", str(tmp_path / "instance"))
+    assert web._history_path() == str(tmp_path / "instance" / "agedcare_history.db")
+    assert (tmp_path / "instance").is_dir()
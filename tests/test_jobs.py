@@ -0,0 +1,86 @@
+"""
+JobQueue limits, cancellation and results, and the web job endpoints.
+"""
+import threading
+
+import pytest
+
+from aged_care_calcs import agedcare_sim, jobs
+
+
+def _blocked(job, release):
+    while not release.wait(0.01):
+        job.update(0.5)
+    return "released"
+
+
+def test_result_and_error_are_returned_by_wait():
+    queue = jobs.JobQueue(1, 1)
+    assert queue.submit(lambda job, x: x * 2, 21).wait(5) == 42
+    failing = queue.submit(lambda job: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failing.wait(5)
+    assert failing.status == jobs.FAILED
+    queue.shutdown()
+
+
+def test_queue_full_then_cancel():
+    queue = jobs.JobQueue(max_workers=1, max_queued=1)
+    release = threading.Event()
+    running = queue.submit(_blocked, release)
+    waiting = queue.submit(_blocked, release)
+    with pytest.raises(jobs.QueueFull):
+        queue.submit(_blocked, release)
+
+    # the waiting job is cancelled straight away, the running one at its next update()
+    assert waiting.cancel()
+    assert waiting.status == jobs.CANCELLED
+    assert running.cancel()
+    with pytest.raises(jobs.JobCancelled):
+        running.wait(5)
+    assert running.status == jobs.CANCELLED
+    assert not running.cancel()
+    assert queue.active() == 0
+    queue.shutdown()
+
+
+def test_finished_jobs_are_pruned():
+    queue = jobs.JobQueue(1, 10, keep_finished=2)
+    submitted = [queue.submit(lambda job: None) for _ in range(4)]
+    for job in submitted:
+        job.wait(5)
+    queue.submit(lambda job: None).wait(5)
+    assert queue.get(submitted[0].id) is None
+    queue.shutdown()
+
+
+def _form():
+    return {flag[2:]: str(agedcare_sim.DEFAULT_SCENARIO[flag[2:].replace("-", "_")])
+            for flag, _, _ in agedcare_sim.SIMULATION_ARGUMENTS}
+
+
+def test_simulate_returns_job_and_status(web, client):
+    response = client.post("/simulate", data=_form(), headers={"Accept": "application/json"})
+    assert response.status_code == 202
+    submitted = response.get_json()
+    web.job_queue.get(submitted["id"]).wait(30)
+    status = client.get(submitted["status_url"]).get_json()
+    assert status["status"] == jobs.DONE
+    assert client.get(status["downloads"]["csv"]).status_code == 200
+
+
+def test_full_queue_answers_429_and_cancel_works(web, client, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(web, "job_queue", jobs.JobQueue(max_workers=1, max_queued=0))
+    blocker = web.job_queue.submit(_blocked, release)
+    response = client.post("/simulate", data=_form(), headers={"Accept": "application/json"})
+    assert response.status_code == 429
+    assert web.history.count() == 0
+
+    response = client.post(f"/jobs/{blocker.id}/cancel", headers={"Accept": "application/json"})
+    assert response.status_code == 202
+    with pytest.raises(jobs.JobCancelled):
+        blocker.wait(5)
+    assert client.post(f"/jobs/{blocker.id}/cancel").status_code == 409
+    assert client.get("/jobs/nope").status_code == 404
+    web.job_queue.shutdown()
@@ -0,0 +1,61 @@
+"""
+Life table survival curves and survival-weighted expected costs.
+"""
+import numpy as np
+import pytest
+
+from aged_care_calcs import agedcare_sim, longevity
+
+
+def _table(qx=0.2, ages=range(80, 90)):
+    return longevity.LifeTable({"F": {age: qx for age in ages}})
+
+
+def test_survival_curve():
+    survival = _table().survival("f", 85)
+    assert len(survival) == 5 * 12 + 1
+    assert survival[0] == 1.0
+    assert survival[12] == pytest.approx(0.8)
+    assert survival[-1] == 0.0
+    assert np.all(np.diff(survival) <= 0)
+
+
+def test_fractional_age_uses_the_age_reached_each_month():
+    table = longevity.LifeTable({"M": {80: 0.0, 81: 0.5, 82: 0.5}})
+    survival = table.survival("M", 80.5)
+    # no deaths until the resident turns 81, six months in
+    assert survival[6] == 1.0
+    assert survival[18] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("age", [79.9, 90.0])
+def test_ages_outside_the_table_are_rejected(age):
+    with pytest.raises(ValueError):
+        _table().survival("F", age)
+
+
+def test_gaps_in_the_table_are_rejected():
+    with pytest.raises(ValueError, match="87"):
+        _table(ages=[80, 81, 82, 83, 84, 85, 86, 88, 89]).survival("F", 84)
+
+
+def test_expected_costs_weight_each_month_by_survival():
+    table = _table()
+    scenario = dict(agedcare_sim.DEFAULT_SCENARIO, total_months_after_sale=0)
+    costs = longevity.expected_costs(scenario, table, 85, "F")
+    survival = table.survival("F", 85)
+    result = agedcare_sim.simulate_finances(**agedcare_sim.with_horizon(scenario, len(survival) - 1))
+    fees = result.column("fees_total")
+    assert costs["horizon_months"] == 60
+    assert costs["expected_fees"] == pytest.approx(float(np.dot(survival[:-1], fees)), abs=0.01)
+    assert costs["life_expectancy_months"] == pytest.approx(float(survival[1:].sum()), abs=0.01)
+    # the RAD is refunded on death from the sale month on; everyone dies by the end
+    sale = scenario["months_till_house_sale"]
+    assert costs["expected_rad_refund"] == pytest.approx(scenario["rad"] * survival[sale], abs=0.01)
+
+
+def test_certain_survival_outlives_funds():
+    table = _table(qx=0.0)
+    broke = dict(agedcare_sim.DEFAULT_SCENARIO, initial_assets=0.0, house_value=0.0, rad=0.0,
+                 pension_initial=0.0, total_months_after_sale=0)
+    assert longevity.expected_costs(broke, table, 85, "F")["probability_outlive_funds"] == 1.0
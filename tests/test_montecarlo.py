@@ -0,0 +1,53 @@
+"""
+Monte Carlo rate paths: reproducibility, the constant-rate limit and summaries.
+"""
+import numpy as np
+import pytest
+
+from aged_care_calcs import agedcare_sim, montecarlo
+
+
+def test_same_seed_same_paths_whatever_the_workers():
+    model = montecarlo.MeanReverting(3.5, volatility=1.5)
+    one = montecarlo.simulate_paths(agedcare_sim.DEFAULT_SCENARIO, model, 250, seed=3, workers=1, chunk_paths=100)
+    two = montecarlo.simulate_paths(agedcare_sim.DEFAULT_SCENARIO, model, 250, seed=3, workers=2, chunk_paths=100)
+    assert one.assets.shape == (250, 126)
+    np.testing.assert_array_equal(one.assets, two.assets)
+    other = montecarlo.simulate_paths(agedcare_sim.DEFAULT_SCENARIO, model, 250, seed=4, workers=1, chunk_paths=100)
+    assert not np.array_equal(one.assets, other.assets)
+
+
+def test_zero_volatility_at_the_long_run_is_the_fixed_rate_run():
+    scenario = agedcare_sim.DEFAULT_SCENARIO
+    model = montecarlo.MeanReverting(scenario["income_interest_rate"], volatility=0.0)
+    result = montecarlo.simulate_paths(scenario, model, 3, workers=1)
+    expected = agedcare_sim.simulate_finances(**scenario).column("assets")
+    for path in result.assets:
+        np.testing.assert_allclose(path, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_rates_are_floored_at_zero():
+    rng = np.random.default_rng(0)
+    rates = montecarlo.MeanReverting(0.5, volatility=5.0).rates(rng, 0.5, 50, 60)
+    assert rates.shape == (50, 60)
+    assert rates.min() >= 0.0
+    history = np.linspace(1.0, 4.0, 40)
+    boot = montecarlo.Bootstrap(history, block=6).rates(rng, 2.0, 10, 25)
+    assert boot.shape == (10, 25)
+    # every historical change is +3/39, so each path climbs in equal steps
+    np.testing.assert_allclose(boot[:, -1], 2.0 + 25 * 3 / 39)
+
+
+def test_bootstrap_needs_enough_history():
+    with pytest.raises(ValueError):
+        montecarlo.Bootstrap([1.0, 2.0], block=12)
+
+
+def test_bands_and_depletion_probability():
+    assets = np.array([[5.0, -1.0, 3.0], [4.0, 2.0, -2.0], [3.0, 1.0, 0.0], [2.0, 0.5, 1.0]])
+    result = montecarlo.MonteCarloResult(assets)
+    # a path counts as depleted from its first negative month on
+    np.testing.assert_allclose(result.depletion_probability(), [0.0, 0.25, 0.5])
+    np.testing.assert_allclose(result.percentile_bands((50,))[50], np.median(assets, axis=0))
+    rows = result.summary_rows((50,))
+    assert rows[1] == {"month": 2, "p50": 0.75, "depletion_probability": 0.25}
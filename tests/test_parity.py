@@ -0,0 +1,120 @@
+"""
+The batch engine, fast-forward, checkpoints and event timelines must agree
+with the plain month-by-month scalar simulation.
+"""
+import datetime
+import random
+
+import numpy as np
+import pytest
+
+from aged_care_calcs import agedcare_sim, batch_sim, fast_forward
+from aged_care_calcs.results import SimulationResult
+from aged_care_calcs.timeline import FeeChange, HouseSale, LumpSum, RadDrawdown, RadPayment, RateChange
+
+
+def _scenarios(n, seed):
+    rng = random.Random(seed)
+    scenarios = []
+    for _ in range(n):
+        scenarios.append(dict(
+            agedcare_sim.DEFAULT_SCENARIO,
+            initial_assets=rng.uniform(0, 600000),
+            rad=rng.choice([0.0, 300000.0, 750000.0]),
+            house_value=rng.choice([0.0, 800000.0, rng.uniform(0, 2e6)]),
+            dap_percentage=rng.uniform(0, 9),
+            income_interest_rate=rng.uniform(0, 8),
+            asset_interest_percentage=rng.uniform(0, 100),
+            months_till_house_sale=rng.randint(0, 24),
+            total_months_after_sale=rng.choice([0, 60, 240]),
+            means_tested_lifetime_limit=rng.choice([20000.0, 82347.0]),
+            incidental_expenditure_mthly=rng.uniform(0, 3000),
+            start_date=datetime.date(2025, rng.randint(1, 12), rng.randint(1, 28)),
+        ))
+    return scenarios
+
+
+def _events(scenario, rng):
+    events = []
+    for _ in range(rng.randint(0, 5)):
+        when = rng.randint(0, 60) if rng.random() < 0.5 else (
+            scenario["start_date"] + datetime.timedelta(days=rng.randint(0, 1500)))
+        events.append(rng.choice([
+            LumpSum(when, rng.uniform(-50000, 100000)),
+            RadDrawdown(when, rng.uniform(0, 100000)),
+            RadPayment(when, rng.uniform(0, 100000)),
+            RateChange(when, income_interest_rate=rng.uniform(1, 6)),
+            RateChange(when, asset_interest_percentage=rng.uniform(20, 90)),
+            FeeChange(when, basic_daily_fee=rng.uniform(50, 80), dap_percentage=rng.uniform(5, 9)),
+            FeeChange(when, incidental_expenditure_mthly=rng.uniform(0, 900)),
+            HouseSale(when, rng.uniform(0, 500000)),
+        ]))
+    return events
+
+
+def _assert_same(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    for name, values in expected.columns.items():
+        np.testing.assert_allclose(
+            np.asarray(result.columns[name], dtype=float), np.asarray(values, dtype=float),
+            rtol=1e-9, atol=1e-6, err_msg=name,
+        )
+
+
+@pytest.fixture(scope="module")
+def scenarios():
+    return _scenarios(60, seed=1)
+
+
+def test_batch_matches_scalar(scenarios):
+    batch = batch_sim.simulate_finances_batch(scenarios)
+    for i, scenario in enumerate(scenarios):
+        _assert_same(batch.result(i), agedcare_sim.simulate_finances(**scenario))
+
+
+def test_shared_prefix_matches_batch(scenarios):
+    # many scenarios differing only after the sale, so the prefix is shared
+    shared = [dict(s, house_value=v) for s in scenarios[:6] for v in (0.0, 400000.0, 900000.0)]
+    expected = batch_sim.simulate_finances_batch(shared)
+    result = batch_sim.simulate_finances_shared(shared)
+    for i in range(len(shared)):
+        _assert_same(result.result(i), expected.result(i))
+
+
+def test_fast_forward_matches_scalar(scenarios):
+    for scenario in scenarios:
+        expected = agedcare_sim.simulate_finances(**scenario)
+        assert fast_forward.depletion_month(**scenario) == expected.depletion_month()
+        final = expected.final() if len(expected) else scenario["initial_assets"]
+        assert fast_forward.final_assets(**scenario) == pytest.approx(final, rel=1e-9, abs=1e-6)
+
+
+def test_checkpoint_resume_matches_full_run(scenarios):
+    for scenario in scenarios:
+        expected = agedcare_sim.simulate_finances(**scenario)
+        sim = agedcare_sim.Simulation(**scenario)
+        sim.run_to(len(expected) // 2)
+        checkpoint = sim.checkpoint()
+        resumed = list(agedcare_sim.simulate_finances_iter(**scenario, checkpoint=checkpoint))
+        assert [row.month for row in resumed] == list(expected.columns["month"][checkpoint.month:])
+        tail = SimulationResult.from_months(resumed)
+        assert tail.columns["assets"] == expected.columns["assets"][checkpoint.month:]
+
+
+def test_checkpoint_outside_run_is_rejected(scenarios):
+    sim = agedcare_sim.Simulation(**scenarios[0])
+    bad = sim.checkpoint()._replace(month=sim.n_months + 1)
+    with pytest.raises(ValueError):
+        sim.restore(bad)
+
+
+def test_events_match_across_engines(scenarios):
+    rng = random.Random(5)
+    events = [_events(s, rng) for s in scenarios]
+    batch = batch_sim.simulate_finances_batch(scenarios, events=events)
+    for i, (scenario, extra) in enumerate(zip(scenarios, events)):
+        expected = agedcare_sim.simulate_finances(**scenario, events=extra)
+        _assert_same(batch.result(i), expected)
+        final = expected.final() if len(expected) else scenario["initial_assets"]
+        assert fast_forward.final_assets(**scenario, events=extra) == pytest.approx(final, rel=1e-6, abs=1e-6)
+        assert fast_forward.depletion_month(**scenario, events=extra) == expected.depletion_month()
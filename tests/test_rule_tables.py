@@ -0,0 +1,62 @@
+"""
+RuleTable tiers, clipping, and scalar/array agreement.
+"""
+import numpy as np
+import pytest
+
+from aged_care_calcs import mtf_calc, pension_calc_income_assets as pension
+from aged_care_calcs.rule_tables import RuleTable, deeming_table, taper_table
+
+
+def test_tiers_accumulate():
+    table = RuleTable([100.0, 200.0, 300.0], [0.5, 0.25, 0.0], base=10.0)
+    assert table(50.0) == 10.0
+    assert table(100.0) == 10.0
+    assert table(150.0) == 35.0
+    assert table(250.0) == 72.5
+    assert table(1000.0) == 85.0
+
+
+def test_extend_below_uses_first_rate():
+    table = RuleTable([100.0], [0.5], base=10.0, extend_below=True)
+    assert table(80.0) == 0.0
+
+
+def test_floor_and_cap():
+    table = taper_table(1000.0, 200.0, 0.5)
+    assert table(0.0) == 1000.0
+    assert table(600.0) == 800.0
+    assert table(5000.0) == 0.0
+    capped = RuleTable([0.0], [1.0], cap=50.0)
+    assert capped(80.0) == 50.0
+
+
+def test_deeming_tiers():
+    table = deeming_table(1000.0, 0.01, 0.03)
+    assert table(500.0) == pytest.approx(5.0)
+    assert table(2000.0) == pytest.approx(10.0 + 30.0)
+
+
+def test_arrays_match_scalars():
+    values = np.linspace(-10000.0, 1_200_000.0, 997)
+    for table in (mtf_calc.ASSET_TEST_TABLE, *mtf_calc.INCOME_TEST_TABLES.values(),
+                  pension.INCOME_TEST_TABLE, *pension.ASSETS_TEST_TABLES.values(),
+                  deeming_table(64200.0, 0.0075, 0.0275)):
+        out = table(values)
+        assert out.shape == values.shape
+        np.testing.assert_allclose(out, [table(float(v)) for v in values], rtol=0, atol=1e-9)
+
+
+def test_zero_dim_array_gives_float():
+    assert isinstance(mtf_calc.ASSET_TEST_TABLE(np.float64(300000.0)), float)
+
+
+@pytest.mark.parametrize("breakpoints, rates", [([], []), ([0.0, 1.0], [0.1]), ([1.0, 1.0], [0.1, 0.2])])
+def test_invalid_tables_are_rejected(breakpoints, rates):
+    with pytest.raises(ValueError):
+        RuleTable(breakpoints, rates)
+
+
+def test_pension_is_lower_of_both_tests():
+    assert pension.calculate_age_pension(210.0, 180000.0) == pytest.approx(1116.30 - 3.0)
+    assert pension.calculate_age_pension(0.0, 1_000_000.0) == 0.0
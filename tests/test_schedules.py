@@ -0,0 +1,77 @@
+"""
+ScheduleStore lookup by date and month, indexation and JSON round trip.
+"""
+import dataclasses
+import datetime
+
+import pytest
+
+from aged_care_calcs import agedcare_sim
+from aged_care_calcs.schedules import CURRENT_SCHEDULE, DEFAULT_SCHEDULES, ScheduleStore
+
+
+def _store():
+    later = dataclasses.replace(CURRENT_SCHEDULE, effective_from=datetime.date(2026, 1, 31), annual_cap=40000.0)
+    first = dataclasses.replace(CURRENT_SCHEDULE, effective_from=datetime.date(2025, 1, 1))
+    return ScheduleStore([later, first])
+
+
+def test_at_picks_schedule_in_force():
+    store = _store()
+    assert store.at(datetime.date(2025, 6, 1)).effective_from == datetime.date(2025, 1, 1)
+    assert store.at(datetime.date(2026, 1, 31)).annual_cap == 40000.0
+    with pytest.raises(ValueError):
+        store.at(datetime.date(2024, 12, 31))
+
+
+def test_month_index_matches_index_for_months():
+    store = _store()
+    for start in (datetime.date(2025, 1, 31), datetime.date(2025, 6, 15), datetime.date(2025, 12, 31)):
+        plan = store.index_for_months(start, 30)
+        vector = store.month_index([start.year], [start.month], [start.day], 30)[0]
+        assert plan == vector.tolist()
+        assert plan == [store.schedules.index(store.at(agedcare_sim.add_months(start, m))) for m in range(30)]
+
+
+def test_start_before_first_schedule_is_rejected():
+    with pytest.raises(ValueError):
+        _store().index_for_months(datetime.date(2024, 6, 1), 12)
+
+
+def test_duplicate_dates_and_empty_store_are_rejected():
+    with pytest.raises(ValueError):
+        ScheduleStore([CURRENT_SCHEDULE, CURRENT_SCHEDULE])
+    with pytest.raises(ValueError):
+        ScheduleStore([])
+
+
+def test_projection_indexes_on_the_three_dates():
+    store = DEFAULT_SCHEDULES.projected(datetime.date(2026, 12, 31), 0.03)
+    dates = [s.effective_from for s in store.schedules[1:]]
+    assert dates == [datetime.date(2026, 3, 20), datetime.date(2026, 7, 1), datetime.date(2026, 9, 20)]
+    march, july, september = store.schedules[1:]
+    assert march.annual_cap == round(CURRENT_SCHEDULE.annual_cap * 1.03 ** 0.5, 2)
+    assert march.deeming_threshold_single == CURRENT_SCHEDULE.deeming_threshold_single
+    assert july.deeming_threshold_single == round(CURRENT_SCHEDULE.deeming_threshold_single * 1.03, 2)
+    assert september.annual_cap > march.annual_cap
+
+
+def test_json_round_trip_keeps_version():
+    store = _store()
+    again = ScheduleStore.from_json(store.to_json())
+    assert again.schedules == store.schedules
+    assert again.version == store.version
+    assert again.version != DEFAULT_SCHEDULES.version
+
+
+def test_later_schedule_changes_results():
+    scenario = dict(agedcare_sim.DEFAULT_SCENARIO, start_date=datetime.date(2025, 11, 4))
+    tighter = dataclasses.replace(CURRENT_SCHEDULE, effective_from=datetime.date(2026, 7, 1), annual_cap=1000.0)
+    store = ScheduleStore([CURRENT_SCHEDULE, tighter])
+    base = agedcare_sim.simulate_finances(**scenario)
+    changed = agedcare_sim.simulate_finances(**scenario, schedules=store)
+    # identical until the new schedule takes effect (month 9 is July 2026)
+    assert changed.columns["assets"][:8] == base.columns["assets"][:8]
+    # the 2026 MTF paid so far is already over the new cap, so none is charged for the rest of the year
+    assert changed.columns["mtf"][8:14].tolist() == [0.0] * 6
+    assert base.columns["mtf"][8] > 0
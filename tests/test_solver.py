@@ -0,0 +1,58 @@
+"""
+max_affordable_rad bisection and depletion month solvers.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from aged_care_calcs import agedcare_sim, solver
+
+
+def _lasts(scenario, rad, years):
+    result = agedcare_sim.simulate_finances(**agedcare_sim.with_horizon(dict(scenario, rad=rad), years * 12))
+    return result.depletion_month() is None
+
+
+@pytest.mark.parametrize("dap", [7.0, 0.0])
+def test_max_rad_is_the_boundary(dap):
+    scenario = dict(agedcare_sim.DEFAULT_SCENARIO, dap_percentage=dap, house_value=600000.0)
+    rad = solver.max_affordable_rad(scenario, 10, tolerance=1.0)
+    assert 0 < rad < math.inf
+    assert _lasts(scenario, rad, 10)
+    assert not _lasts(scenario, rad + 1.0, 10)
+
+
+def test_pre_sale_checkpoint_is_shared_only_without_dap():
+    scenario = agedcare_sim.with_horizon(agedcare_sim.DEFAULT_SCENARIO, 120)
+    assert solver._Prober(dict(scenario, dap_percentage=0.0)).pre_sale
+    assert solver._Prober(scenario).pre_sale is None
+
+
+def test_no_rad_lasts_and_rad_irrelevant():
+    broke = dict(agedcare_sim.DEFAULT_SCENARIO, initial_assets=0.0, house_value=0.0, pension_initial=0.0)
+    assert solver.max_affordable_rad(broke, 10) is None
+    # the sale is after the period and no DAP is charged, so the RAD is never paid within it
+    late = dict(agedcare_sim.DEFAULT_SCENARIO, dap_percentage=0.0, months_till_house_sale=60, initial_assets=500000.0)
+    assert solver.max_affordable_rad(late, 2) == math.inf
+
+
+def test_batch_agrees_with_scalar():
+    scenarios = [
+        dict(agedcare_sim.DEFAULT_SCENARIO, initial_assets=assets, house_value=house)
+        for assets in (20000.0, 140000.0, 400000.0) for house in (300000.0, 1000000.0)
+    ]
+    batch = solver.max_affordable_rad_batch(scenarios, 8, tolerance=1.0)
+    for scenario, rad in zip(scenarios, batch):
+        single = solver.max_affordable_rad(scenario, 8, tolerance=1.0)
+        if single is None:
+            assert np.isnan(rad)
+        else:
+            assert rad == pytest.approx(single, abs=2.0)
+
+
+def test_depletion_month_extends_the_horizon():
+    scenario = dict(agedcare_sim.DEFAULT_SCENARIO, total_months_after_sale=12)
+    full = agedcare_sim.simulate_finances(**agedcare_sim.with_horizon(scenario, 600))
+    assert solver.depletion_month(scenario, min_months=600) == full.depletion_month()
+    assert solver.depletion_months_batch([agedcare_sim.with_horizon(scenario, 600)]) == [full.depletion_month()]
@@ -0,0 +1,131 @@
+"""
+The binary result store: writing, reading back, exports and the store CLI.
+"""
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from aged_care_calcs import agedcare_sim, batch, batch_sim, store
+from aged_care_calcs.store import ResultStore, StoreWriter
+
+from test_batch import _row, _write
+
+SCENARIOS = [
+    dict(agedcare_sim.DEFAULT_SCENARIO, rad=rad, months_till_house_sale=sale, total_months_after_sale=after)
+    for rad, sale, after in ((750000.0, 6, 24), (0.0, 0, 36), (300000.0, 12, 0), (500000.0, 3, 12))
+]
+
+
+def _write_store(path, ids=None):
+    with StoreWriter(str(path), "v1", meta={"test": True}, ids=ids is not None) as writer:
+        for half in (SCENARIOS[:2], SCENARIOS[2:]):
+            start = len(writer)
+            writer.append(half, batch_sim.simulate_finances_batch(half),
+                          ids=None if ids is None else ids[start:start + len(half)])
+    return ResultStore(str(path))
+
+
+def test_round_trip(tmp_path):
+    results = _write_store(tmp_path / "s.store")
+    assert len(results) == len(SCENARIOS)
+    assert results.rule_version == "v1" and results.meta == {"test": True}
+    assert results.ids() is None
+    for i, scenario in enumerate(SCENARIOS):
+        expected = agedcare_sim.simulate_finances(**scenario)
+        assert results.result(i).columns == expected.columns
+        assert results.scenario(i) == scenario
+        assert list(results.months("assets", i)) == list(expected.columns["assets"])
+    assert list(results.n_months) == [30, 36, 12, 15]
+
+
+def test_matrix_and_subset(tmp_path):
+    results = _write_store(tmp_path / "s.store")
+    matrix = results.matrix("assets", rows=[2, 0])
+    assert matrix.shape == (2, 30)
+    assert np.isnan(matrix[0, 12:]).all()
+    assert list(matrix[1]) == list(results.months("assets", 0))
+
+    subset = results.subset(rows=[3, 1], columns=["assets"])
+    assert list(subset.columns) == ["scenario", "assets"]
+    assert list(subset.columns["scenario"]) == [3] * 15 + [1] * 36
+
+
+def test_header_counts_only_complete_batches(tmp_path):
+    path = str(tmp_path / "s.store")
+    writer = StoreWriter(path, "v1")
+    writer.append(SCENARIOS[:2], batch_sim.simulate_finances_batch(SCENARIOS[:2]))
+    assert len(ResultStore(path)) == 2
+    writer.close()
+    with pytest.raises(FileExistsError):
+        StoreWriter(path, "v1")
+
+
+def test_writer_checks_counts_and_ids(tmp_path):
+    with StoreWriter(str(tmp_path / "s.store"), "v1", ids=True) as writer:
+        result = batch_sim.simulate_finances_batch(SCENARIOS[:2])
+        with pytest.raises(ValueError, match="id for every"):
+            writer.append(SCENARIOS[:2], result)
+        with pytest.raises(ValueError, match="scenarios but"):
+            writer.append(SCENARIOS[:1], result, ids=["a"])
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    path = tmp_path / "s.store"
+    _write_store(path)
+    header = json.loads((path / "header.json").read_text())
+    (path / "header.json").write_text(json.dumps(dict(header, format=99)))
+    with pytest.raises(ValueError, match="format"):
+        ResultStore(str(path))
+
+
+def test_parse_rows():
+    assert store.parse_rows("0:2, 5, 8:", 10) == [0, 1, 5, 8, 9]
+    with pytest.raises(ValueError):
+        store.parse_rows("10", 10)
+
+
+def test_single_row_export_matches_save_csv(tmp_path):
+    results = _write_store(tmp_path / "s.store")
+    store.export(results, str(tmp_path / "row.csv"), rows=[1])
+    agedcare_sim.save_csv(str(tmp_path / "direct.csv"), agedcare_sim.simulate_finances(**SCENARIOS[1]))
+    assert (tmp_path / "row.csv").read_text() == (tmp_path / "direct.csv").read_text()
+
+
+def test_cli_export_by_id(tmp_path, capsys):
+    path = tmp_path / "s.store"
+    _write_store(path, ids=["a", "b", "dup", "dup"])
+    out = str(tmp_path / "out.csv")
+    assert store.main(["export", str(path), out, "--ids", "b,a", "--columns", "assets"]) == 0
+    with open(out, newline="") as f:
+        assert {row["scenario"] for row in csv.DictReader(f)} == {"0", "1"}
+
+    for ids, message in (("dup", "names rows 2, 3"), ("zzz", "no scenario with id")):
+        with pytest.raises(SystemExit) as exited:
+            store.main(["export", str(path), out, "--ids", ids])
+        assert exited.value.code == 2
+        assert message in capsys.readouterr().err
+
+
+def test_cli_rejects_bad_rows_and_columns(tmp_path, capsys):
+    path = tmp_path / "s.store"
+    _write_store(path)
+    for extra, message in ((["--rows", "7"], "--rows"), (["--columns", "assets,colour"], "unknown columns")):
+        with pytest.raises(SystemExit):
+            store.main(["export", str(path), str(tmp_path / "out.csv"), *extra])
+        assert message in capsys.readouterr().err
+
+
+def test_batch_store_rows_match_the_summary(tmp_path):
+    rows = [_row(id="a"), _row(id="b", rad="-1"), _row(id="c", rad="0")]
+    path = str(tmp_path / "s.store")
+    batch.run_batch(_write(tmp_path / "in.csv", rows), str(tmp_path / "summary.csv"), workers=1, store=path)
+    results = ResultStore(path)
+    assert results.ids() == ["a", "c"]
+    with open(tmp_path / "summary.csv", newline="") as f:
+        summary = {s["id"]: s for s in csv.DictReader(f)}
+    assert summary["b"]["store_row"] == ""
+    row = int(summary["c"]["store_row"])
+    assert results.ids()[row] == "c"
+    assert float(summary["c"]["final_assets"]) == pytest.approx(float(results.months("assets", row)[-1]), abs=0.01)
@@ -0,0 +1,111 @@
+"""
+Response surfaces: grid axes, interpolation, bounds and the surface API.
+"""
+import pytest
+
+from aged_care_calcs import agedcare_sim, surface
+from aged_care_calcs.sweep import run_scenarios
+
+from test_api import _form
+
+SCENARIO = dict(agedcare_sim.DEFAULT_SCENARIO, total_months_after_sale=36)
+
+
+@pytest.fixture(scope="module")
+def rad_dap():
+    return surface.build_surface(SCENARIO, ["rad", "dap_percentage"], cache=False)
+
+
+def test_grid_axes_are_centred_on_the_scenario():
+    axes = surface.grid_axes(SCENARIO, ["rad", "months_till_house_sale"])
+    assert axes["rad"] == [550000.0 + 50000.0 * i for i in range(9)]
+    assert axes["months_till_house_sale"] == list(range(0, 13))
+    assert all(isinstance(v, int) for v in axes["months_till_house_sale"])
+
+
+def test_grid_axes_keep_an_off_step_or_low_centre():
+    axes = surface.grid_axes(dict(SCENARIO, rad=60000.0), ["rad"])
+    assert axes["rad"][0] == 0.0 and 60000.0 in axes["rad"]
+    assert axes["rad"] == sorted(axes["rad"])
+
+
+@pytest.mark.parametrize("names, message", [
+    ([], "at least one"),
+    (["rad", "dap_percentage", "house_value", "initial_assets"], "at most"),
+    (["rad", "start_date"], "cannot be varied"),
+])
+def test_grid_axes_reject(names, message):
+    with pytest.raises(ValueError, match=message):
+        surface.grid_axes(SCENARIO, names)
+
+
+def test_grid_axes_limit_the_size():
+    with pytest.raises(ValueError, match="larger than"):
+        surface.grid_axes(SCENARIO, ["rad"], steps={"rad": (1.0, surface.MAX_POINTS, 0.0)})
+
+
+def test_grid_points_are_the_simulated_values(rad_dap):
+    point = {"rad": 650000.0, "dap_percentage": 6.5}
+    values, interpolated = rad_dap.lookup(point)
+    assert not interpolated
+    expected = run_scenarios([rad_dap.scenario_at(point)], workers=1, cache=False)[0]
+    assert values == pytest.approx(expected)
+    assert rad_dap.exact(point, cache=False) == expected
+
+
+def test_between_nodes_is_interpolated(rad_dap):
+    low, _ = rad_dap.lookup({"rad": 700000.0, "dap_percentage": 7.0})
+    high, _ = rad_dap.lookup({"rad": 750000.0, "dap_percentage": 7.0})
+    values, interpolated = rad_dap.lookup({"rad": 712500.0, "dap_percentage": 7.0})
+    assert interpolated
+    expected = 0.75 * low["final_assets"] + 0.25 * high["final_assets"]
+    assert values["final_assets"] == pytest.approx(expected, abs=0.01)
+
+
+def test_depletion_is_none_when_assets_last():
+    grid = surface.build_surface(dict(SCENARIO, initial_assets=5e6), ["rad"], cache=False)
+    values, _ = grid.lookup({"rad": 725000.0})
+    assert values["depletion_month"] is None
+
+
+def test_points_outside_the_grid_are_rejected(rad_dap):
+    assert rad_dap.bounds() == {"rad": [550000.0, 950000.0], "dap_percentage": [5.0, 9.0]}
+    with pytest.raises(ValueError, match="outside the grid"):
+        rad_dap.lookup({"rad": 1e6, "dap_percentage": 7.0})
+    with pytest.raises(ValueError, match="missing"):
+        rad_dap.lookup({"rad": 700000.0})
+    with pytest.raises(ValueError):
+        rad_dap.exact({"rad": 700000.0, "dap_percentage": 9.5})
+
+
+def test_surface_api(web, client):
+    form = _form(**{"total-months-after-sale": "36"})
+    response = client.post("/api/v1/surface", json={"scenario": form, "vary": ["rad"]})
+    assert response.status_code in (200, 202)
+    submitted = response.get_json()
+    web.job_queue.get(submitted["id"]).wait(60)
+    url = submitted["surface_url"]
+
+    grid = client.get(url).get_json()
+    assert grid["bounds"] == {"rad": [550000.0, 950000.0]}
+
+    answer = client.get(url + "?rad=712500").get_json()
+    assert answer["interpolated"] and not answer["exact"]
+
+    outside = client.get(url + "?rad=1000000")
+    assert outside.status_code == 422 and outside.get_json()["bounds"] == grid["bounds"]
+    assert client.get(url + "?rad=1000000&exact=1").status_code == 422
+    assert client.get(url + "?dap-percentage=5").status_code == 400
+
+    exact = client.get(url + "?rad=712500&exact=1").get_json()
+    assert exact["exact"] and not exact["interpolated"]
+
+    # the same surface is not built twice
+    again = client.post("/api/v1/surface", json={"scenario": form, "vary": ["rad"]})
+    assert again.status_code == 200 and again.get_json()["id"] == submitted["id"]
+
+
+def test_surface_api_rejects_bad_requests(client):
+    assert client.post("/api/v1/surface", json={"vary": ["rad"]}).status_code == 400
+    assert client.post("/api/v1/surface", json={"scenario": _form(), "vary": ["start_date"]}).status_code == 400
+    assert client.get("/api/v1/surface/nope").status_code == 404
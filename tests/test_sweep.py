@@ -0,0 +1,51 @@
+"""
+Sweep value parsing, grid expansion and summaries.
+"""
+import argparse
+
+import pytest
+
+from aged_care_calcs import agedcare_sim, sweep
+
+
+def test_parse_values_lists_and_ranges():
+    assert sweep.parse_values(float)("1,2.5") == [1.0, 2.5]
+    assert sweep.parse_values(float)("0.1:0.3:0.1") == [0.1, 0.2, 0.3]
+    assert sweep.parse_values(int)("0:12:6") == [0, 6, 12]
+    assert sweep.parse_values(float)("0:1:0.4") == [0.0, 0.4, 0.8]
+
+
+@pytest.mark.parametrize("text, cast", [
+    ("1:0:1", float), ("0:1:0", float), ("0:1:-1", float), ("0:inf:1", float), ("a:2:1", float), ("0:6:1.5", int),
+])
+def test_parse_values_rejects_bad_ranges(text, cast):
+    with pytest.raises(argparse.ArgumentTypeError):
+        sweep.parse_values(cast)(text)
+
+
+def test_expand_grid_order():
+    rows = sweep.expand_grid({"a": 0, "b": 0, "c": 9}, {"a": [1, 2], "b": [3, 4]})
+    assert [(r["a"], r["b"], r["c"]) for r in rows] == [(1, 3, 9), (1, 4, 9), (2, 3, 9), (2, 4, 9)]
+
+
+def test_summaries_match_scalar_runs():
+    grid = {"rad": [0.0, 750000.0], "months_till_house_sale": [0, 6, 12], "initial_assets": [20000.0, 140000.0]}
+    rows = sweep.run_sweep(agedcare_sim.DEFAULT_SCENARIO, grid, workers=1, cache=False)
+    assert len(rows) == 12
+    for row, scenario in zip(rows, sweep.expand_grid(agedcare_sim.DEFAULT_SCENARIO, grid)):
+        assert {name: row[name] for name in grid} == {name: scenario[name] for name in grid}
+        result = agedcare_sim.simulate_finances(**scenario)
+        assert row["depletion_month"] == result.depletion_month()
+        assert row["total_fees"] == pytest.approx(result.total("fees_total"), abs=0.01)
+        assert row["total_mtf"] == pytest.approx(result.total("mtf"), abs=0.01)
+        assert row["final_assets"] == pytest.approx(result.final(), abs=0.01)
+
+
+def test_pool_and_cache_give_the_same_rows():
+    grid = {"rad": [0.0, 300000.0, 750000.0], "house_value": [0.0, 800000.0]}
+    serial = sweep.run_sweep(agedcare_sim.DEFAULT_SCENARIO, grid, workers=1, cache=False)
+    assert sweep.run_sweep(agedcare_sim.DEFAULT_SCENARIO, grid, workers=2, chunksize=2, cache=False) == serial
+    cache = sweep.result_cache.ResultCache(max_entries=100)
+    assert sweep.run_sweep(agedcare_sim.DEFAULT_SCENARIO, grid, workers=1, cache=cache) == serial
+    assert sweep.run_sweep(agedcare_sim.DEFAULT_SCENARIO, grid, workers=1, cache=cache) == serial
+    assert cache.stats()["hits"] == len(serial)
@@ -0,0 +1,105 @@
+"""
+Timeline events: parsing, month indices and their effect on a run.
+"""
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from aged_care_calcs import agedcare_sim, benchmark
+from aged_care_calcs.timeline import (
+    FeeChange, HouseSale, LumpSum, RadPayment, RateChange,
+    compile_timeline, event_from_dict, event_to_dict, load_events, month_index,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START = datetime.date(2025, 11, 4)
+
+
+def test_month_index_from_dates():
+    assert month_index(START, START) == 0
+    assert month_index(START, datetime.date(2025, 12, 4)) == 1
+    # a later day waits for the next simulated month
+    assert month_index(START, datetime.date(2025, 12, 5)) == 2
+    assert month_index(START, 7) == 7
+
+
+def test_month_index_rejects_events_before_the_start():
+    with pytest.raises(ValueError):
+        month_index(START, datetime.date(2025, 10, 1))
+    with pytest.raises(ValueError):
+        month_index(START, -3)
+
+
+def test_negative_lump_sum_month_is_rejected_not_dropped():
+    with pytest.raises(ValueError):
+        compile_timeline(agedcare_sim.DEFAULT_SCENARIO, [LumpSum(when=-3, amount=50000)])
+
+
+def test_event_round_trip():
+    events = [
+        LumpSum(3, -2000.0),
+        RadPayment(datetime.date(2026, 2, 1), 100000.0, reported=False),
+        HouseSale(12, 850000.0),
+        RateChange(datetime.date(2027, 1, 1), income_interest_rate=3.0),
+        FeeChange(24, basic_daily_fee=65.0, dap_percentage=8.0),
+    ]
+    assert [event_from_dict(json.loads(json.dumps(event_to_dict(e)))) for e in events] == events
+
+
+def test_event_from_dict_coerces_numbers():
+    assert event_from_dict({"type": "lump_sum", "when": 4.0, "amount": "2500"}) == LumpSum(4, 2500.0)
+    assert event_from_dict({"type": "rate_change", "when": 0, "income_interest_rate": 5}) == RateChange(0, 5.0)
+
+
+@pytest.mark.parametrize("event, field", [
+    ({"type": "lump_sum", "when": 1, "amount": "abc"}, "amount"),
+    ({"type": "lump_sum", "when": 1, "amount": None}, "amount"),
+    ({"type": "lump_sum", "when": 1, "amount": True}, "amount"),
+    ({"type": "lump_sum", "when": 1, "amount": float("nan")}, "amount"),
+    ({"type": "fee_change", "when": 1, "basic_daily_fee": [1]}, "basic_daily_fee"),
+    ({"type": "lump_sum", "when": -3, "amount": 1}, "when"),
+    ({"type": "lump_sum", "when": 1.5, "amount": 1}, "when"),
+    ({"type": "lump_sum", "when": "soon", "amount": 1}, "when"),
+    ({"type": "lump_sum", "amount": 1}, "when"),
+    ({"type": "lump_sum", "when": 1, "amount": 1, "note": "x"}, "note"),
+])
+def test_event_from_dict_names_the_bad_field(event, field):
+    with pytest.raises(ValueError, match=repr(field)):
+        event_from_dict(event)
+
+
+def test_event_from_dict_rejects_unknown_types():
+    with pytest.raises(ValueError, match="event type"):
+        event_from_dict({"type": "windfall", "when": 1, "amount": 1})
+    with pytest.raises(ValueError):
+        event_from_dict([1, 2])
+
+
+def test_lump_sum_moves_assets_from_its_month():
+    scenario = agedcare_sim.DEFAULT_SCENARIO
+    base = agedcare_sim.simulate_finances(**scenario).columns["assets"]
+    boosted = agedcare_sim.simulate_finances(**scenario, events=[LumpSum(3, 50000.0)]).columns["assets"]
+    assert boosted[:3] == base[:3]
+    assert boosted[3] == pytest.approx(base[3] + 50000.0, rel=1e-3)
+
+
+def test_load_events_requires_a_list(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps({"type": "lump_sum", "when": 1, "amount": 1}))
+    with pytest.raises(ValueError, match="list"):
+        load_events(path)
+
+
+def test_cli_reports_bad_events(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps([{"type": "lump_sum", "when": 2, "amount": "abc"}]))
+    proc = subprocess.run(
+        [sys.executable, "-m", "aged_care_calcs.agedcare_sim", *benchmark._cli_args(), "--events", str(path)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert proc.returncode == 2
+    assert "--events" in proc.stderr and "'amount'" in proc.stderr